@@ -0,0 +1,457 @@
+"""
+Pipeline Benchmark Harness
+Measures latency and throughput of the audio pipeline on synthetic speech-like
+audio, writes JSON results and compares them against a stored baseline.
+
+Model calls go to an in-process stub (fixed real-time factor), so the numbers
+reflect pipeline overhead and scheduling rather than Whisper speed and are
+reproducible on any machine.
+
+Usage:
+    python benchmark_pipeline.py --output results.json
+    python benchmark_pipeline.py --save-baseline benchmark_baseline.json
+    python benchmark_pipeline.py --baseline benchmark_baseline.json --threshold 0.25
+    python benchmark_pipeline.py --load-clients 16 --load-duration 10
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import platform
+import socket
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from pipeline import AudioProcessor, PipelineConfig, PipelineOrchestrator, TranscriptionProcessor
+from pipeline.transcription import WHISPER_SAMPLE_RATE
+from pipeline.features import IncrementalLogMel
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+try:
+    import uvicorn
+except ImportError:
+    uvicorn = None
+
+logger = logging.getLogger("benchmark")
+
+DURATIONS = (1.0, 5.0, 30.0)
+SAMPLE_RATES = (16000, 44100, 48000)
+# Regressions smaller than this are timer noise, whatever the ratio
+NOISE_FLOOR_MS = 0.2
+
+
+def synthesize_speech(duration: float, sample_rate: int, seed: int = 0) -> np.ndarray:
+    """
+    Generate speech-like audio: voiced harmonic syllables at a syllabic rate with
+    pitch drift, separated by short pauses, over a low noise floor.
+    
+    Args:
+        duration: Length in seconds
+        sample_rate: Sample rate in Hz
+        seed: Random seed (same seed, same audio)
+    
+    Returns:
+        float32 mono audio
+    """
+    rng = np.random.default_rng(seed)
+    n = int(duration * sample_rate)
+    t = np.arange(n) / sample_rate
+    
+    # Pitch wanders between ~100 and ~220 Hz
+    f0 = 160 + 60 * np.sin(2 * np.pi * 0.3 * t + rng.uniform(0, 2 * np.pi))
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    
+    # ~4 syllables per second, every ~8th syllable slot is a pause
+    syllables = np.maximum(0.0, np.sin(2 * np.pi * 4.0 * t)) ** 2
+    slots = (t * 4.0).astype(int)
+    pauses = rng.random(slots.max() + 1 if n else 1) < 0.125
+    envelope = syllables * ~pauses[slots]
+    
+    audio = 0.3 * voiced * envelope + 0.003 * rng.standard_normal(n)
+    return audio.astype(np.float32)
+
+
+class StubTranscriptionProcessor(TranscriptionProcessor):
+    """Stands in for Whisper: sleeps for audio_duration * rtf and returns fake words."""
+    
+    def __init__(self, rtf: float = 0.05, batch_efficiency: float = 0.5):
+        """
+        Initialize the stub.
+        
+        Args:
+            rtf: Simulated real-time factor of a single decode
+            batch_efficiency: Cost of each extra item in a batch relative to a single decode
+        """
+        super().__init__(model_size="tiny", load_model=False)
+        self.rtf = rtf
+        self.batch_efficiency = batch_efficiency
+    
+    def is_model_loaded(self) -> bool:
+        return True
+    
+    def warm_up(self) -> bool:
+        return True
+    
+    def _fake_result(self, duration: float, word_timestamps: bool = True) -> Dict[str, Any]:
+        words = [
+            {"start": start, "end": min(start + 0.3, duration), "word": f" w{i}", "probability": 0.9}
+            for i, start in enumerate(np.arange(0.0, max(duration - 0.3, 0.0), 0.4))
+        ]
+        text = "".join(word["word"] for word in words).strip()
+        return {
+            "text": text,
+            "segments": [{
+                "start": 0.0,
+                "end": duration,
+                "text": text,
+                "words": words if word_timestamps else []
+            }] if words else [],
+            "language": "en",
+            "language_probability": 1.0,
+            "duration": duration
+        }
+    
+    def _transcribe(self, audio_input, language=None, initial_prompt=None, word_timestamps=False,
+                    beam_size=None, best_of=None):
+        duration = len(audio_input) / WHISPER_SAMPLE_RATE
+        with self._timed("beam_search"):
+            time.sleep(duration * self.rtf)
+        return self._fake_result(duration, word_timestamps)
+    
+    def transcribe_batch(self, audio_arrays, language=None):
+        durations = [len(audio) / WHISPER_SAMPLE_RATE for audio in audio_arrays]
+        longest = max(durations)
+        with self._timed("generate"):
+            time.sleep(longest * self.rtf * (1 + self.batch_efficiency * (len(durations) - 1)))
+        return [self._fake_result(duration, False) for duration in durations]
+
+
+def create_stub_orchestrator(rtf: float = 0.05, **transcription_overrides: Any) -> PipelineOrchestrator:
+    """Build an orchestrator whose model is the stub (cache off so every run decodes)."""
+    config = PipelineConfig()
+    config.cache.enabled = False
+    config.log_level = "WARNING"
+    for name, value in transcription_overrides.items():
+        setattr(config.transcription, name, value)
+    orchestrator = PipelineOrchestrator(config, load_model=False)
+    orchestrator._install_default_model(StubTranscriptionProcessor(rtf))
+    return orchestrator
+
+
+def summarize(samples: List[float], audio_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """Latency statistics in milliseconds (plus speed relative to real time)."""
+    values = np.asarray(samples) * 1000.0
+    summary = {
+        "iterations": len(values),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "min_ms": float(values.min()),
+        "max_ms": float(values.max())
+    }
+    if audio_seconds:
+        summary["x_realtime"] = audio_seconds / (summary["p50_ms"] / 1000.0)
+    return summary
+
+
+def measure(fn: Callable[[], Any], iterations: int, warmup: int = 2) -> List[float]:
+    """Time fn over several iterations after a few untimed warm-up calls."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def measure_async(fn: Callable[[], Awaitable[Any]], iterations: int, warmup: int = 1) -> List[float]:
+    """Async variant of measure."""
+    for _ in range(warmup):
+        await fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def benchmark_audio_processor(iterations: int) -> Dict[str, Dict[str, Any]]:
+    """Benchmark the AudioProcessor building blocks across lengths and sample rates."""
+    processor = AudioProcessor()
+    results = {}
+    
+    for sample_rate in SAMPLE_RATES:
+        for duration in DURATIONS:
+            audio_np = synthesize_speech(duration, sample_rate)
+            audio_b64 = base64.b64encode(audio_np.tobytes()).decode("ascii")
+            suffix = f"{int(duration)}s@{sample_rate}"
+            
+            cases = {
+                "chunk_audio": lambda: processor.chunk_audio(audio_np, sample_rate, 5.0, 0.5),
+                "normalize_audio": lambda: processor.normalize_audio(audio_np),
+                "convert_to_wav": lambda: processor.convert_to_wav(audio_np, sample_rate),
+                "decode_base64_audio": lambda: processor.decode_base64_audio(audio_b64)
+            }
+            if sample_rate != WHISPER_SAMPLE_RATE:
+                cases["resample_audio"] = lambda: processor.resample_audio(
+                    audio_np, sample_rate, WHISPER_SAMPLE_RATE
+                )
+            else:
+                # Full log-mel extraction versus re-slicing frames already computed
+                log_mel = IncrementalLogMel(sample_rate)
+                log_mel.append(audio_np)
+                cases["log_mel_extract"] = lambda: IncrementalLogMel(sample_rate).append(audio_np)
+                cases["log_mel_window"] = lambda: log_mel.window(0, len(audio_np))
+            
+            for name, fn in cases.items():
+                try:
+                    results[f"{name}[{suffix}]"] = summarize(measure(fn, iterations), duration)
+                except Exception as e:
+                    logger.warning(f"Skipping {name}[{suffix}]: {e}")
+    return results
+
+
+async def benchmark_end_to_end(iterations: int, rtf: float) -> Dict[str, Dict[str, Any]]:
+    """Benchmark process_audio_chunk and process_audio_file with the stub model."""
+    orchestrator = create_stub_orchestrator(rtf)
+    results = {}
+    
+    try:
+        for sample_rate in (16000, 48000):
+            for duration in (1.0, 5.0):
+                audio_np = synthesize_speech(duration, sample_rate)
+                orchestrator.audio_processor.default_sample_rate = sample_rate
+                audio_b64 = base64.b64encode(audio_np.tobytes()).decode("ascii")
+                samples = await measure_async(
+                    lambda: orchestrator.process_audio_chunk(audio_b64, 0, sample_rate), iterations
+                )
+                results[f"process_audio_chunk[{int(duration)}s@{sample_rate}]"] = summarize(samples, duration)
+        
+        orchestrator.audio_processor.default_sample_rate = WHISPER_SAMPLE_RATE
+        for duration in (30.0, 120.0):
+            audio_np = synthesize_speech(duration, WHISPER_SAMPLE_RATE)
+            audio_b64 = base64.b64encode(audio_np.tobytes()).decode("ascii")
+            samples = await measure_async(
+                lambda: orchestrator.process_audio_file(audio_b64, WHISPER_SAMPLE_RATE),
+                max(3, iterations // 5)
+            )
+            results[f"process_audio_file[{int(duration)}s@16000]"] = summarize(samples, duration)
+    finally:
+        orchestrator.shutdown()
+    return results
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _load_client(url: str, client_idx: int, duration: float, chunk_seconds: float,
+                       realtime: bool, latencies: List[float], counts: Dict[str, int]) -> None:
+    """One simulated client: stream binary frames and time each chunk's reply."""
+    processor = AudioProcessor()
+    audio_np = synthesize_speech(duration, WHISPER_SAMPLE_RATE, seed=client_idx)
+    chunk_samples = int(chunk_seconds * WHISPER_SAMPLE_RATE)
+    sent_at: Dict[int, float] = {}
+    
+    async with websockets.connect(url, max_size=None) as ws:
+        await ws.send(json.dumps({"type": "hello", "format": "binary", "mode": "chunk"}))
+        await ws.recv()
+        
+        async def receive() -> None:
+            while len(sent_at) or not sending_done.is_set():
+                try:
+                    reply = json.loads(await asyncio.wait_for(ws.recv(), 1.0))
+                except asyncio.TimeoutError:
+                    continue
+                chunk_idx = reply.get("chunk_idx")
+                if chunk_idx in sent_at:
+                    latencies.append(time.perf_counter() - sent_at.pop(chunk_idx))
+                status = reply.get("status", "unknown")
+                counts[status] = counts.get(status, 0) + 1
+        
+        sending_done = asyncio.Event()
+        receiver = asyncio.create_task(receive())
+        start = time.perf_counter()
+        for chunk_idx, offset in enumerate(range(0, len(audio_np), chunk_samples)):
+            if realtime:
+                # Pace like a live microphone: chunk N is available at (N + 1) * chunk_seconds
+                await asyncio.sleep(max(0.0, start + (chunk_idx + 1) * chunk_seconds - time.perf_counter()))
+            frame = processor.encode_binary_frame(
+                audio_np[offset:offset + chunk_samples], WHISPER_SAMPLE_RATE, chunk_idx
+            )
+            sent_at[chunk_idx] = time.perf_counter()
+            await ws.send(frame)
+        sending_done.set()
+        try:
+            await asyncio.wait_for(receiver, 30.0)
+        except asyncio.TimeoutError:
+            counts["lost"] = counts.get("lost", 0) + len(sent_at)
+
+
+def run_load_test(clients: int, duration: float, chunk_seconds: float, realtime: bool,
+                  rtf: float) -> Dict[str, Any]:
+    """
+    Drive /ws/audio with concurrent simulated clients against an in-process server
+    whose orchestrator uses the stub model.
+    
+    Args:
+        clients: Number of concurrent WebSocket clients
+        duration: Seconds of audio each client streams
+        chunk_seconds: Audio per chunk
+        realtime: Pace chunks in real time (False sends as fast as possible)
+        rtf: Real-time factor of the stub model
+    
+    Returns:
+        Latency summary, chunk status counts and throughput
+    """
+    if websockets is None or uvicorn is None:
+        raise RuntimeError("Load test needs the websockets and uvicorn packages")
+    import ws_main
+    
+    ws_main.pipeline_orchestrator = create_stub_orchestrator(rtf, inference_workers=4, max_pending_requests=64)
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(ws_main.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    
+    latencies: List[float] = []
+    counts: Dict[str, int] = {}
+    url = f"ws://127.0.0.1:{port}/ws/audio"
+    
+    async def drive() -> float:
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            _load_client(url, idx, duration, chunk_seconds, realtime, latencies, counts)
+            for idx in range(clients)
+        ])
+        return time.perf_counter() - start
+    
+    try:
+        elapsed = asyncio.run(drive())
+    finally:
+        server.should_exit = True
+        thread.join(10.0)
+        ws_main.pipeline_orchestrator.shutdown()
+        ws_main.pipeline_orchestrator = None
+    
+    result = summarize(latencies) if latencies else {"iterations": 0}
+    result.update({
+        "clients": clients,
+        "chunks_per_second": sum(counts.values()) / elapsed,
+        "statuses": counts,
+        "elapsed_s": elapsed
+    })
+    return result
+
+
+def compare_to_baseline(results: Dict[str, Any], baseline: Dict[str, Any],
+                        threshold: float) -> List[str]:
+    """
+    Find benchmarks whose median got slower than the baseline by more than threshold.
+    
+    Args:
+        results: Current results ("benchmarks" section is compared)
+        baseline: Stored results in the same format
+        threshold: Allowed relative slowdown (0.2 = 20%)
+    
+    Returns:
+        Human-readable regression descriptions (empty if none)
+    """
+    regressions = []
+    for name, current in results["benchmarks"].items():
+        previous = baseline.get("benchmarks", {}).get(name)
+        if previous is None or "p50_ms" not in current or "p50_ms" not in previous:
+            continue
+        slowdown = current["p50_ms"] - previous["p50_ms"]
+        if slowdown > NOISE_FLOOR_MS and current["p50_ms"] > previous["p50_ms"] * (1 + threshold):
+            regressions.append(
+                f"{name}: p50 {previous['p50_ms']:.2f}ms -> {current['p50_ms']:.2f}ms "
+                f"(+{100 * slowdown / previous['p50_ms']:.0f}%)"
+            )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the audio pipeline")
+    parser.add_argument("--iterations", type=int, default=20, help="Timed iterations per benchmark")
+    parser.add_argument("--rtf", type=float, default=0.05, help="Real-time factor of the stub model")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--baseline", help="Compare against this JSON results file")
+    parser.add_argument("--save-baseline", help="Write results as the new baseline to this file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative p50 slowdown")
+    parser.add_argument("--skip-e2e", action="store_true", help="Only benchmark AudioProcessor")
+    parser.add_argument("--load-clients", type=int, default=0, help="Concurrent WebSocket clients (0 = no load test)")
+    parser.add_argument("--load-duration", type=float, default=10.0, help="Seconds of audio per load-test client")
+    parser.add_argument("--load-chunk", type=float, default=1.0, help="Seconds of audio per load-test chunk")
+    parser.add_argument("--load-fast", action="store_true", help="Send load-test chunks without real-time pacing")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.WARNING)
+    logger.setLevel(logging.INFO)
+    
+    results = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "stub_rtf": args.rtf,
+        "benchmarks": {}
+    }
+    
+    logger.info("Benchmarking AudioProcessor...")
+    results["benchmarks"].update(benchmark_audio_processor(args.iterations))
+    if not args.skip_e2e:
+        logger.info("Benchmarking end-to-end processing...")
+        results["benchmarks"].update(asyncio.run(benchmark_end_to_end(args.iterations, args.rtf)))
+    if args.load_clients:
+        logger.info(f"Load test: {args.load_clients} clients x {args.load_duration}s...")
+        results["load_test"] = run_load_test(
+            args.load_clients, args.load_duration, args.load_chunk, not args.load_fast, args.rtf
+        )
+    
+    for name, stats in results["benchmarks"].items():
+        speed = f"  {stats['x_realtime']:.0f}x realtime" if "x_realtime" in stats else ""
+        print(f"{name:45s} p50 {stats['p50_ms']:9.3f}ms  p95 {stats['p95_ms']:9.3f}ms{speed}")
+    if "load_test" in results:
+        print(f"load_test: {json.dumps(results['load_test'])}")
+    
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(results, f, indent=2)
+            logger.info(f"Results written to {path}")
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main()) 
\ No newline at end of file
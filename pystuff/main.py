@@ -109,6 +109,7 @@ def convert_with_ffmpeg(input_path, output_path, format='wav'):
 def split_wav_to_chunks(wav_path, chunk_sec=5, out_dir="chunks"):
     """
     Splits a .wav file into N-second chunks and saves them to out_dir.
+    Reads one chunk at a time, so memory use does not depend on file length.
     Returns a list of chunk file paths.
     """
     if sf is None:
@@ -118,17 +119,14 @@ def split_wav_to_chunks(wav_path, chunk_sec=5, out_dir="chunks"):
         print(f"[ERROR] File not found: {wav_path}")
         return []
     os.makedirs(out_dir, exist_ok=True)
-    data, samplerate = sf.read(wav_path)
-    total_samples = data.shape[0]
+    samplerate = sf.info(wav_path).samplerate
     chunk_samples = int(chunk_sec * samplerate)
     chunk_paths = []
-    for i, start in enumerate(range(0, total_samples, chunk_samples)):
-        end = min(start + chunk_samples, total_samples)
-        chunk_data = data[start:end]
+    for i, chunk_data in enumerate(sf.blocks(wav_path, blocksize=chunk_samples)):
         chunk_path = os.path.join(out_dir, f"chunk_{i+1:03d}.wav")
         sf.write(chunk_path, chunk_data, samplerate)
         chunk_paths.append(chunk_path)
-        print(f"[OK] Saved chunk {i+1}: {chunk_path} ({(end-start)/samplerate:.2f}s)")
+        print(f"[OK] Saved chunk {i+1}: {chunk_path} ({len(chunk_data)/samplerate:.2f}s)")
     return chunk_paths
 
 
@@ -1,19 +1,52 @@
 """
 Audio AI Tone Pipeline Package
 Modular pipeline for audio processing, transcription, and analysis.
+
+Submodules are imported on first attribute access, so ``import pipeline`` (or
+importing just the config) does not pay for numpy/scipy/model dependencies.
 """
 
-from .audio_processor import AudioProcessor
-from .transcription import TranscriptionProcessor
-from .orchestrator import PipelineOrchestrator
-from .config import PipelineConfig, AudioConfig, TranscriptionConfig
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .audio_processor import AudioProcessor
+    from .transcription import TranscriptionProcessor
+    from .orchestrator import PipelineOrchestrator
+    from .streaming import StreamingTranscriber
+    from .config import PipelineConfig, AudioConfig, TranscriptionConfig, SessionConfig, CacheConfig, DiarizationConfig, EmotionConfig, SceneConfig, BackpressureConfig
 
 __version__ = "1.0.0"
-__all__ = [
-    "AudioProcessor",
-    "TranscriptionProcessor", 
-    "PipelineOrchestrator",
-    "PipelineConfig",
-    "AudioConfig",
-    "TranscriptionConfig"
-] 
\ No newline at end of file
+
+# Public name -> submodule defining it
+_LAZY_IMPORTS = {
+    "AudioProcessor": ".audio_processor",
+    "TranscriptionProcessor": ".transcription",
+    "PipelineOrchestrator": ".orchestrator",
+    "StreamingTranscriber": ".streaming",
+    "PipelineConfig": ".config",
+    "AudioConfig": ".config",
+    "TranscriptionConfig": ".config",
+    "SessionConfig": ".config",
+    "CacheConfig": ".config",
+    "DiarizationConfig": ".config",
+    "EmotionConfig": ".config",
+    "SceneConfig": ".config",
+    "BackpressureConfig": ".config"
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    """Import public classes on first access."""
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__) 
\ No newline at end of file
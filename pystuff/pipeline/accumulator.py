@@ -0,0 +1,169 @@
+"""
+Chunk Accumulator Module
+Coalesces consecutive real-time chunks of one session into longer decode windows.
+"""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PendingChunk:
+    """A prepared chunk waiting for its decode window."""
+    audio_np: np.ndarray
+    chunk_idx: int
+    start_time: float  # When the chunk was received (wall clock)
+    future: asyncio.Future
+    duration: float
+
+
+class ChunkAccumulator:
+    """
+    Holds a session's chunks until they fill a decode window, then decodes them together.
+    
+    Whisper pads every call to a 30 s window, so decoding a 1 s chunk costs
+    nearly as much encoder work as decoding 30 s. The accumulator closes a window
+    once it holds ``window_seconds`` of audio or its oldest chunk has waited
+    ``max_latency_ms`` since it was received, and passes it to ``decode_fn``,
+    which returns one result per chunk. Windows are decoded one at a time in
+    arrival order; chunks arriving meanwhile collect into the next window. Each
+    caller awaits its own future, so results fan back out per chunk_idx.
+    """
+    
+    def __init__(self, decode_fn: Callable[[List[PendingChunk]], Awaitable[List[Dict[str, Any]]]],
+                 sample_rate: int, window_seconds: float = 10.0, max_latency_ms: float = 1500.0):
+        """
+        Initialize the accumulator.
+        
+        Args:
+            decode_fn: Coroutine decoding a window of chunks into one result per chunk
+            sample_rate: Sample rate of submitted audio
+            window_seconds: Audio per window before it is decoded without waiting
+            max_latency_ms: Longest a chunk waits for window-mates after it was received
+        """
+        self.decode_fn = decode_fn
+        self.sample_rate = sample_rate
+        self.window_seconds = window_seconds
+        self.max_latency = max_latency_ms / 1000.0
+        self._pending: Deque[PendingChunk] = deque()
+        self._window: List[PendingChunk] = []
+        self._arrived = asyncio.Event()
+        self._room = asyncio.Event()
+        self._room.set()
+        self._task: Optional[asyncio.Task] = None
+        self._windows = 0
+        self._chunks = 0
+    
+    @property
+    def pending_seconds(self) -> float:
+        """Audio waiting for the next window."""
+        return sum(chunk.duration for chunk in self._pending)
+    
+    @property
+    def has_room(self) -> bool:
+        """Whether the next window can take more audio."""
+        return self.pending_seconds < self.window_seconds
+    
+    def _ensure_started(self) -> None:
+        """Start the collector task on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._collect())
+    
+    async def submit(self, audio_np: np.ndarray, chunk_idx: int, start_time: float) -> Dict[str, Any]:
+        """
+        Add a chunk to the next window and wait for its share of the window result.
+        
+        Args:
+            audio_np: Audio samples at sample_rate
+            chunk_idx: Index of the chunk
+            start_time: Time the chunk was received (starts its latency deadline)
+        
+        Returns:
+            Result for this chunk
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(PendingChunk(audio_np, chunk_idx, start_time, future, len(audio_np) / self.sample_rate))
+        self._arrived.set()
+        if not self.has_room:
+            self._room.clear()
+        return await future
+    
+    async def wait_for_room(self) -> None:
+        """Wait until the next window can take more audio."""
+        while not self.has_room:
+            self._room.clear()
+            await self._room.wait()
+    
+    def _take_window(self) -> List[PendingChunk]:
+        """Remove the oldest chunks that fit in one window (at least one)."""
+        window = [self._pending.popleft()]
+        total = window[0].duration
+        while self._pending and total + self._pending[0].duration <= self.window_seconds:
+            total += self._pending[0].duration
+            window.append(self._pending.popleft())
+        if self.has_room:
+            self._room.set()
+        return window
+    
+    async def _collect(self) -> None:
+        """Close windows when full or overdue and decode them in order."""
+        while True:
+            while not self._pending:
+                self._arrived.clear()
+                await self._arrived.wait()
+            
+            # Hold the window open until it is full or its oldest chunk is due
+            deadline = self._pending[0].start_time + self.max_latency
+            while self.pending_seconds < self.window_seconds:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._arrived.clear()
+                try:
+                    await asyncio.wait_for(self._arrived.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            
+            self._window = self._take_window()
+            self._windows += 1
+            self._chunks += len(self._window)
+            try:
+                results = await self.decode_fn(self._window)
+            except Exception as e:
+                for chunk in self._window:
+                    if not chunk.future.done():
+                        chunk.future.set_exception(e)
+            else:
+                for chunk, result in zip(self._window, results):
+                    if not chunk.future.done():
+                        chunk.future.set_result(result)
+            self._window = []
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics."""
+        return {
+            "pending_seconds": self.pending_seconds,
+            "windows": self._windows,
+            "chunks": self._chunks,
+            "avg_window_chunks": self._chunks / self._windows if self._windows else 0.0
+        }
+    
+    def close(self) -> None:
+        """Stop decoding and cancel every chunk still waiting for a result."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for chunk in list(self._pending) + self._window:
+            chunk.future.cancel()
+        self._pending.clear()
+        self._window = []
+        self._room.set() 
\ No newline at end of file
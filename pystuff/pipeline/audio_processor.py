@@ -6,9 +6,13 @@ Handles audio loading, chunking, format conversion, and preprocessing.
 import numpy as np
 import base64
 import io
-from typing import Optional, Tuple, List
+import struct
+import subprocess
+from typing import Optional, Tuple, List, Iterator
 import logging
 
+from .dsp import frame_signal, frame_energy_db, resample, resample_stream
+
 # AUDIO DEPENDENCIES
 try:
     import soundfile as sf
@@ -24,6 +28,16 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# BINARY FRAME FORMAT
+# Little-endian header followed by raw interleaved PCM:
+#   uint32 chunk_idx | uint32 sample_rate | uint8 dtype code | uint8 channels | 2 bytes padding
+# The header is 12 bytes so float32/int16 payloads stay aligned for np.frombuffer.
+FRAME_HEADER = struct.Struct("<IIBB2x")
+FRAME_DTYPES = {
+    0: np.dtype("<f4"),  # float32
+    1: np.dtype("<i2"),  # int16
+}
+
 
 class AudioProcessor:
     """Handles audio processing operations including loading, chunking, and format conversion."""
@@ -57,6 +71,55 @@ class AudioProcessor:
             logger.error(f"Failed to decode base64 audio: {e}")
             raise
     
+    def decode_binary_frame(self, frame: bytes) -> Tuple[np.ndarray, int, int]:
+        """
+        Decode a binary audio frame (see FRAME_HEADER) to a mono float32 array.
+        
+        Mono float32 payloads are returned as a zero-copy view over ``frame``.
+        
+        Args:
+            frame: Raw bytes received from the client
+            
+        Returns:
+            Tuple of (audio_array, sample_rate, chunk_idx)
+        """
+        if len(frame) < FRAME_HEADER.size:
+            raise ValueError(f"Binary frame too short: {len(frame)} bytes")
+        
+        chunk_idx, sample_rate, dtype_code, channels = FRAME_HEADER.unpack_from(frame)
+        dtype = FRAME_DTYPES.get(dtype_code)
+        if dtype is None:
+            raise ValueError(f"Unsupported dtype code in binary frame: {dtype_code}")
+        if channels < 1:
+            raise ValueError("Binary frame must declare at least one channel")
+        
+        payload_size = len(frame) - FRAME_HEADER.size
+        if payload_size % (dtype.itemsize * channels):
+            raise ValueError(f"Binary frame payload of {payload_size} bytes is not a whole number of samples")
+        
+        audio_np = np.frombuffer(frame, dtype=dtype, offset=FRAME_HEADER.size)
+        if channels > 1:
+            audio_np = audio_np.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+        if dtype.kind == "i":
+            audio_np = audio_np.astype(np.float32) / 32768.0
+        
+        return audio_np, sample_rate, chunk_idx
+    
+    def encode_binary_frame(self, audio_np: np.ndarray, sample_rate: int, chunk_idx: int) -> bytes:
+        """
+        Encode a mono float32 audio array as a binary frame (inverse of decode_binary_frame).
+        
+        Args:
+            audio_np: Audio data as numpy array
+            sample_rate: Sample rate of the audio
+            chunk_idx: Index of the chunk
+            
+        Returns:
+            Frame bytes ready to send over a binary WebSocket message
+        """
+        header = FRAME_HEADER.pack(chunk_idx, sample_rate, 0, 1)
+        return header + np.ascontiguousarray(audio_np, dtype="<f4").tobytes()
+    
     def convert_to_wav(self, audio_np: np.ndarray, sample_rate: int) -> bytes:
         """
         Convert numpy audio array to WAV format bytes.
@@ -112,6 +175,150 @@ class AudioProcessor:
         logger.info(f"Split audio into {len(chunks)} chunks of {chunk_duration}s with {overlap_duration}s overlap")
         return chunks
     
+    def chunk_audio_on_silence(self, audio_np: np.ndarray, sample_rate: int,
+                               chunk_duration: float = 5.0, search_duration: float = 1.0,
+                               frame_ms: int = 30) -> List[Tuple[np.ndarray, float]]:
+        """
+        Split audio into non-overlapping chunks cut at the quietest point near each boundary.
+        
+        Cutting in pauses avoids splitting words, so no overlap is needed and chunks
+        can be transcribed independently (and in parallel).
+        
+        Args:
+            audio_np: Audio data as numpy array
+            sample_rate: Sample rate of the audio
+            chunk_duration: Maximum duration of each chunk in seconds
+            search_duration: How far before the maximum to look for a pause, in seconds
+            frame_ms: Energy analysis frame length in milliseconds
+            
+        Returns:
+            List of (chunk_array, start_time) tuples
+        """
+        frame_length = max(1, int(sample_rate * frame_ms / 1000))
+        energy = frame_energy_db(frame_signal(audio_np, frame_length))
+        
+        chunk_samples = int(chunk_duration * sample_rate)
+        search_samples = int(min(search_duration, chunk_duration / 2) * sample_rate)
+        min_samples = int(sample_rate * 0.5)  # Minimum 0.5 seconds
+        
+        chunks = []
+        start = 0
+        while start < len(audio_np):
+            end = start + chunk_samples
+            if end >= len(audio_np):
+                end = len(audio_np)
+            else:
+                # Quietest frame in the search window before the hard limit
+                first_frame = (end - search_samples) // frame_length
+                last_frame = min(end // frame_length, len(energy))
+                if last_frame > first_frame:
+                    quietest = first_frame + int(np.argmin(energy[first_frame:last_frame]))
+                    end = quietest * frame_length + frame_length // 2
+            
+            chunk = audio_np[start:end]
+            if len(chunk) >= min_samples:
+                chunks.append((chunk, start / sample_rate))
+            start = end
+        
+        logger.info(f"Split audio into {len(chunks)} chunks of up to {chunk_duration}s at silence boundaries")
+        return chunks
+    
+    def iter_file_chunks(self, filepath: str, chunk_duration: float = 5.0, overlap_duration: float = 0.5,
+                         target_rate: Optional[int] = None) -> Iterator[Tuple[np.ndarray, float]]:
+        """
+        Lazily read a file as overlapping mono float32 chunks without loading it whole.
+        
+        Uses soundfile block reads when the format is supported, otherwise streams
+        raw PCM from an ffmpeg subprocess. Memory use is bounded by the chunk size.
+        
+        Args:
+            filepath: Path to the audio file
+            chunk_duration: Duration of each chunk in seconds
+            overlap_duration: Overlap between chunks in seconds
+            target_rate: Sample rate of yielded chunks (defaults to default_sample_rate)
+            
+        Yields:
+            (chunk_array, start_time) tuples
+        """
+        target_rate = target_rate or self.default_sample_rate
+        
+        if sf is not None:
+            try:
+                sample_rate = sf.info(filepath).samplerate
+            except Exception:
+                sample_rate = None
+            if sample_rate is not None:
+                yield from self._iter_soundfile_chunks(filepath, sample_rate, chunk_duration,
+                                                       overlap_duration, target_rate)
+                return
+        
+        yield from self._iter_ffmpeg_chunks(filepath, chunk_duration, overlap_duration, target_rate)
+    
+    def _iter_soundfile_chunks(self, filepath: str, sample_rate: int, chunk_duration: float,
+                               overlap_duration: float, target_rate: int) -> Iterator[Tuple[np.ndarray, float]]:
+        """Yield chunks using soundfile block reads, resampled as one continuous stream."""
+        def blocks() -> Iterator[np.ndarray]:
+            for block in sf.blocks(filepath, blocksize=sample_rate, dtype='float32', always_2d=True):
+                yield block.mean(axis=1) if block.shape[1] > 1 else block[:, 0]
+        
+        pieces = resample_stream(blocks(), sample_rate, target_rate)
+        yield from self._chunk_stream(pieces, target_rate, chunk_duration, overlap_duration)
+    
+    def _iter_ffmpeg_chunks(self, filepath: str, chunk_duration: float, overlap_duration: float,
+                            target_rate: int) -> Iterator[Tuple[np.ndarray, float]]:
+        """Yield chunks decoded by an ffmpeg subprocess piping raw float32 PCM."""
+        bytes_per_sample = 4
+        read_size = target_rate * bytes_per_sample
+        
+        process = subprocess.Popen(
+            ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", filepath,
+             "-f", "f32le", "-ac", "1", "-ar", str(target_rate), "pipe:1"],
+            stdout=subprocess.PIPE
+        )
+        
+        def pieces() -> Iterator[np.ndarray]:
+            remainder = b""
+            while True:
+                data = process.stdout.read(read_size)
+                if not data:
+                    break
+                data = remainder + data
+                usable = len(data) - len(data) % bytes_per_sample
+                remainder = data[usable:]
+                yield np.frombuffer(data[:usable], dtype='<f4')
+        
+        try:
+            yield from self._chunk_stream(pieces(), target_rate, chunk_duration, overlap_duration)
+            if process.wait() != 0:
+                raise RuntimeError(f"ffmpeg failed to decode {filepath}")
+        finally:
+            process.stdout.close()
+            process.kill()
+            process.wait()
+    
+    def _chunk_stream(self, pieces: Iterator[np.ndarray], sample_rate: int, chunk_duration: float,
+                      overlap_duration: float) -> Iterator[Tuple[np.ndarray, float]]:
+        """Cut consecutive audio pieces into the same overlapping chunks chunk_audio() makes of the whole."""
+        chunk_samples = int(chunk_duration * sample_rate)
+        step_samples = int((chunk_duration - overlap_duration) * sample_rate)
+        min_samples = sample_rate * 0.5  # Minimum 0.5 seconds
+        
+        buffer = np.zeros(0, dtype=np.float32)
+        start_sample = 0
+        for piece in pieces:
+            buffer = np.concatenate([buffer, piece])
+            while len(buffer) >= chunk_samples:
+                yield buffer[:chunk_samples], start_sample / sample_rate
+                buffer = buffer[step_samples:]
+                start_sample += step_samples
+        
+        # Shorter chunks at the end of the audio
+        while len(buffer):
+            if len(buffer) >= min_samples:
+                yield buffer[:chunk_samples], start_sample / sample_rate
+            buffer = buffer[step_samples:]
+            start_sample += step_samples
+    
     def normalize_audio(self, audio_np: np.ndarray) -> np.ndarray:
         """
         Normalize audio to prevent clipping and improve processing.
@@ -135,37 +342,22 @@ class AudioProcessor:
         """
         Resample audio to target sample rate.
         
+        Uses an in-process polyphase windowed-sinc filter with kernels cached per
+        rate pair (see dsp.resample), so no subprocess or container round trip.
+        
         Args:
             audio_np: Audio data as numpy array
             original_rate: Original sample rate
             target_rate: Target sample rate
             
         Returns:
-            Resampled audio array
+            Resampled audio array (float32)
         """
         if original_rate == target_rate:
             return audio_np
         
-        if ffmpeg is None:
-            logger.warning("ffmpeg not available for resampling - returning original")
-            return audio_np
-        
         try:
-            # Use ffmpeg for resampling
-            with io.BytesIO() as input_io:
-                sf.write(input_io, audio_np, original_rate, format='WAV')
-                input_io.seek(0)
-                
-                with io.BytesIO() as output_io:
-                    (
-                        ffmpeg
-                        .input('pipe:', format='wav')
-                        .output('pipe:', format='wav', ar=target_rate)
-                        .run(input=input_io.read(), output=output_io, quiet=True)
-                    )
-                    output_io.seek(0)
-                    resampled_audio, _ = sf.read(output_io)
-                    return resampled_audio
+            return resample(audio_np, original_rate, target_rate)
         except Exception as e:
             logger.error(f"Failed to resample audio: {e}")
-            return audio_np 
\ No newline at end of file
+            raise 
\ No newline at end of file
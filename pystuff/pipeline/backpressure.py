@@ -0,0 +1,256 @@
+"""
+Backpressure Module
+Bounded per-session chunk queues with overflow policies, and admission
+control of new sessions based on the aggregate real-time factor.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("drop_oldest", "coalesce", "downgrade")
+# Weight of the newest chunk in a session's real-time factor estimate
+RTF_SMOOTHING = 0.3
+
+
+@dataclass
+class QueuedChunk:
+    """A decoded chunk waiting for the pipeline."""
+    audio_np: np.ndarray
+    sample_rate: int
+    chunk_idx: int
+    received_at: float
+    chunk_indices: List[int] = field(default_factory=list)  # Client chunks merged into this one
+    
+    def __post_init__(self):
+        if not self.chunk_indices:
+            self.chunk_indices = [self.chunk_idx]
+    
+    @property
+    def duration(self) -> float:
+        """Audio length in seconds."""
+        return len(self.audio_np) / self.sample_rate
+
+
+class SessionQueue:
+    """
+    Bounded FIFO between a session's socket reader and its pipeline consumer.
+    
+    When a chunk arrives at a full queue the overflow policy decides what gives:
+    "drop_oldest" discards the oldest chunk, "coalesce" merges the two oldest
+    into one longer decode (falling back to dropping once merges would exceed
+    max_coalesce_seconds), and "downgrade" drops like "drop_oldest" while the
+    consumer switches to a smaller model whenever the session is behind.
+    """
+    
+    def __init__(self, max_depth: int = 4, policy: str = "drop_oldest", slow_down_depth: int = 2,
+                 max_coalesce_seconds: float = 30.0):
+        """
+        Initialize the queue.
+        
+        Args:
+            max_depth: Chunks held before the overflow policy applies
+            policy: One of OVERFLOW_POLICIES
+            slow_down_depth: Unfinished chunks (queued plus in flight) at which the session counts as behind
+            max_coalesce_seconds: Longest merged chunk under "coalesce"
+        """
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {policy!r}; expected one of {OVERFLOW_POLICIES}")
+        self.max_depth = max(1, max_depth)
+        self.policy = policy
+        self.slow_down_depth = max(1, min(slow_down_depth, self.max_depth))
+        self.max_coalesce_seconds = max_coalesce_seconds
+        self._chunks: Deque[QueuedChunk] = deque()
+        self._available = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._unfinished = 0
+        self._slow_down_sent = False
+        self.dropped = 0
+        self.coalesced = 0
+    
+    def __len__(self) -> int:
+        return len(self._chunks)
+    
+    @property
+    def behind(self) -> bool:
+        """Whether enough chunks are waiting or in flight that the session is falling behind real time."""
+        return self._unfinished >= self.slow_down_depth
+    
+    @property
+    def queued_seconds(self) -> float:
+        """Audio waiting to be processed."""
+        return sum(chunk.duration for chunk in self._chunks)
+    
+    def put(self, chunk: QueuedChunk) -> List[QueuedChunk]:
+        """
+        Enqueue a chunk, applying the overflow policy if the queue is full.
+        
+        Returns:
+            Chunks dropped to make room (oldest first)
+        """
+        dropped = []
+        while len(self._chunks) >= self.max_depth:
+            if self.policy == "coalesce" and self._coalesce_oldest():
+                continue
+            dropped.append(self._chunks.popleft())
+            self._unfinished -= 1
+        self.dropped += len(dropped)
+        
+        self._chunks.append(chunk)
+        self._unfinished += 1
+        self._idle.clear()
+        self._available.set()
+        return dropped
+    
+    def _coalesce_oldest(self) -> bool:
+        """Merge the two oldest chunks into one decode; False when they cannot be merged."""
+        if len(self._chunks) < 2:
+            return False
+        first, second = self._chunks[0], self._chunks[1]
+        if first.sample_rate != second.sample_rate or first.duration + second.duration > self.max_coalesce_seconds:
+            return False
+        merged = QueuedChunk(
+            audio_np=np.concatenate([first.audio_np, second.audio_np]),
+            sample_rate=first.sample_rate,
+            chunk_idx=first.chunk_idx,
+            received_at=first.received_at,
+            chunk_indices=first.chunk_indices + second.chunk_indices
+        )
+        self._chunks.popleft()
+        self._chunks[0] = merged
+        self._unfinished -= 1
+        self.coalesced += 1
+        return True
+    
+    async def get(self) -> QueuedChunk:
+        """Wait for and remove the oldest chunk."""
+        while not self._chunks:
+            self._available.clear()
+            await self._available.wait()
+        return self._chunks.popleft()
+    
+    def task_done(self) -> None:
+        """Mark a chunk returned by get() as fully processed."""
+        self._unfinished -= 1
+        if self._unfinished <= 0:
+            self._unfinished = 0
+            self._idle.set()
+            # Caught up: the next excursion may warn the client again
+            self._slow_down_sent = False
+    
+    async def join(self) -> None:
+        """Wait until every queued chunk has been processed (e.g. before flushing a stream)."""
+        await self._idle.wait()
+    
+    def should_slow_down(self) -> bool:
+        """True once per excursion behind real time, to send a single "slow_down" message."""
+        if self.behind and not self._slow_down_sent:
+            self._slow_down_sent = True
+            return True
+        return False
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Current depth and policy counters."""
+        return {
+            "depth": len(self._chunks),
+            "max_depth": self.max_depth,
+            "policy": self.policy,
+            "queued_seconds": self.queued_seconds,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced
+        }
+
+
+class AdmissionController:
+    """
+    Estimates the inference demand of live sessions and gates new ones.
+    
+    Each session demands its real-time factor (processing seconds per audio
+    second, smoothed) times the rate at which it sends audio, capped at real
+    time; a session that stops sending stops counting once its audio leaves the
+    window. The load is the summed demand divided by the inference capacity, so
+    1.0 means the workers are exactly keeping up with every live session.
+    """
+    
+    def __init__(self, capacity: float = 1.0, max_load: float = 1.0, window_seconds: float = 10.0):
+        """
+        Initialize the controller.
+        
+        Args:
+            capacity: Processing seconds the server can do per wall second (inference workers)
+            max_load: Load at or above which new sessions are rejected (0 disables admission control)
+            window_seconds: Recent audio used to estimate each session's send rate
+        """
+        self.capacity = max(capacity, 1e-6)
+        self.max_load = max_load
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        # session id -> (smoothed RTF, first observation time, recent (time, audio seconds))
+        self._sessions: Dict[str, Tuple[float, float, Deque[Tuple[float, float]]]] = {}
+        self.rejected = 0
+    
+    def observe(self, session_id: str, audio_seconds: float, processing_seconds: float,
+                now: Optional[float] = None) -> None:
+        """Record one processed chunk of a session."""
+        if audio_seconds <= 0:
+            return
+        now = time.time() if now is None else now
+        rtf = processing_seconds / audio_seconds
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                entry = (rtf, now, deque())
+            else:
+                entry = (entry[0] + RTF_SMOOTHING * (rtf - entry[0]), entry[1], entry[2])
+            entry[2].append((now, audio_seconds))
+            self._sessions[session_id] = entry
+    
+    def forget(self, session_id: str) -> None:
+        """Stop counting a closed session."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+    
+    def load(self, now: Optional[float] = None) -> float:
+        """Summed demand of live sessions as a fraction of capacity."""
+        now = time.time() if now is None else now
+        cutoff = now - self.window_seconds
+        demand = 0.0
+        with self._lock:
+            for rtf, first_seen, recent in self._sessions.values():
+                while recent and recent[0][0] < cutoff:
+                    recent.popleft()
+                if not recent:
+                    continue
+                audio = sum(seconds for _, seconds in recent)
+                # A chunk is received all at once, so the span covers at least its own audio
+                span = max(now - max(first_seen, cutoff), audio)
+                demand += rtf * min(1.0, audio / span)
+        return demand / self.capacity
+    
+    def admit(self) -> bool:
+        """Whether a new session may start."""
+        if self.max_load <= 0 or self.load() < self.max_load:
+            return True
+        self.rejected += 1
+        return False
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Load, limits and rejections."""
+        with self._lock:
+            tracked = len(self._sessions)
+        return {
+            "load": self.load(),
+            "max_load": self.max_load,
+            "capacity": self.capacity,
+            "tracked_sessions": tracked,
+            "rejected": self.rejected
+        } 
\ No newline at end of file
@@ -0,0 +1,191 @@
+"""
+Batching Module
+Dynamic micro-batching of transcription requests across WebSocket sessions.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Set
+import logging
+
+import numpy as np
+
+from .inference_pool import InferencePool, InferenceQueueFull
+
+logger = logging.getLogger(__name__)
+
+
+class BatchSchedulerClosed(InferenceQueueFull):
+    """Raised for chunks still waiting in a batch scheduler that shuts down without a successor."""
+
+
+@dataclass
+class _BatchItem:
+    """A single queued transcription request."""
+    audio_np: np.ndarray
+    chunk_idx: int
+    language: Optional[str]
+    future: asyncio.Future
+
+
+class BatchScheduler:
+    """
+    Collects chunks from many concurrent sessions and transcribes them together.
+    
+    A batch is closed after ``max_wait_ms`` from its first item or once it holds
+    ``max_batch_size`` items, then run as a single batched model call on the
+    inference pool. Each caller awaits its own future, so results fan back out to
+    the session that submitted them.
+    """
+    
+    def __init__(self, batch_fn: Callable[[List[np.ndarray], Optional[str]], List[Dict[str, Any]]],
+                 inference_pool: InferencePool, max_batch_size: int = 8, max_wait_ms: float = 20.0):
+        """
+        Initialize the batch scheduler.
+        
+        Args:
+            batch_fn: Blocking function transcribing a list of arrays with one language
+            inference_pool: Pool the batched calls run on
+            max_batch_size: Maximum chunks per model call
+            max_wait_ms: Maximum time to hold the first chunk of a batch
+        """
+        self.batch_fn = batch_fn
+        self.inference_pool = inference_pool
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._collecting: List[_BatchItem] = []  # Batch the collector is still filling
+        self._inflight: Set[asyncio.Task] = set()
+        self._batches = 0
+        self._items = 0
+    
+    def _ensure_started(self) -> None:
+        """Start the collector task on the running event loop."""
+        if self._task is None or self._task.done():
+            max_queued = self.inference_pool.max_pending * self.max_batch_size
+            self._queue = asyncio.Queue(maxsize=max_queued)
+            self._task = asyncio.get_running_loop().create_task(self._collect())
+    
+    async def submit(self, audio_np: np.ndarray, chunk_idx: int,
+                     language: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Queue a chunk for batched transcription and wait for its result.
+        
+        Args:
+            audio_np: Audio samples at the model sample rate
+            chunk_idx: Index of the chunk
+            language: Language code (optional)
+        
+        Returns:
+            Transcription result for this chunk
+        
+        Raises:
+            InferenceQueueFull: If too many chunks are already waiting
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait(_BatchItem(audio_np, chunk_idx, language, future))
+        except asyncio.QueueFull:
+            raise InferenceQueueFull(f"Batch queue full ({self._queue.maxsize} waiting)")
+        return await future
+    
+    async def _collect(self) -> None:
+        """Group queued items into batches and dispatch them."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = self._collecting = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            self._collecting = []
+            
+            # Items with different forced languages need separate prompts
+            groups: Dict[Optional[str], List[_BatchItem]] = {}
+            for item in batch:
+                groups.setdefault(item.language, []).append(item)
+            for language, items in groups.items():
+                task = loop.create_task(self._dispatch(items, language))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+    
+    async def _dispatch(self, items: List[_BatchItem], language: Optional[str]) -> None:
+        """Run one batch on the inference pool and resolve each caller's future."""
+        items = [item for item in items if not item.future.done()]
+        if not items:
+            return
+        
+        self._batches += 1
+        self._items += len(items)
+        logger.info(f"Dispatching batch of {len(items)} chunks")
+        
+        try:
+            results = await self.inference_pool.run(
+                self.batch_fn, [item.audio_np for item in items], language,
+                wait_for_slot=True
+            )
+        except Exception as e:
+            for item in items:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+        
+        for item, result in zip(items, results):
+            if not item.future.done():
+                result["chunk_idx"] = item.chunk_idx
+                item.future.set_result(result)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batching statistics."""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self._batches,
+            "chunks": self._items,
+            "avg_batch_size": self._items / self._batches if self._batches else 0.0
+        }
+    
+    def adopt(self, items: List[_BatchItem]) -> None:
+        """Queue chunks taken over from a scheduler that shut down (their callers keep waiting)."""
+        items = [item for item in items if not item.future.done()]
+        if not items:
+            return
+        self._ensure_started()
+        for item in items:
+            try:
+                self._queue.put_nowait(item)
+            except asyncio.QueueFull:
+                item.future.set_exception(InferenceQueueFull(f"Batch queue full ({self._queue.maxsize} waiting)"))
+    
+    def shutdown(self, successor: Optional["BatchScheduler"] = None) -> None:
+        """
+        Stop collecting new batches and release every chunk not yet dispatched.
+        
+        Batches already running finish normally. Queued chunks, and those in a
+        batch still being collected, move to successor; without one their
+        callers get BatchSchedulerClosed instead of waiting for a timeout.
+        
+        Args:
+            successor: Scheduler replacing this one (e.g. after a config change)
+        """
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        pending, self._collecting = self._collecting, []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        
+        if successor is not None:
+            successor.adopt(pending)
+            return
+        for item in pending:
+            if not item.future.done():
+                item.future.set_exception(BatchSchedulerClosed("Batch scheduler shut down before the chunk was transcribed")) 
\ No newline at end of file
@@ -0,0 +1,175 @@
+"""
+Transcription Cache Module
+Content-addressed cache of transcription results (in-memory LRU + optional SQLite tier).
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptionCache:
+    """
+    Caches transcription results keyed by a hash of the PCM samples and decode settings.
+    
+    Results are stored as JSON so every hit returns a fresh copy. The memory tier
+    evicts least-recently-used entries above ``max_memory_bytes``; the optional
+    disk tier (SQLite) evicts least-recently-accessed rows above ``max_disk_bytes``.
+    """
+    
+    def __init__(self, max_memory_bytes: int = 64 * 1024 * 1024, disk_path: Optional[str] = None,
+                 max_disk_bytes: int = 1024 * 1024 * 1024):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_memory_bytes: Size budget of the in-memory tier
+            disk_path: SQLite file for the persistent tier (None disables it)
+            max_disk_bytes: Size budget of the disk tier
+        """
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.disk_path = disk_path
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        
+        self._db = None
+        self._disk_bytes = 0
+        if disk_path:
+            self._open_disk_tier(disk_path)
+    
+    def _open_disk_tier(self, disk_path: str) -> None:
+        """Open (or create) the SQLite tier."""
+        try:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+            self._db.commit()
+            self._disk_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            logger.info(f"Transcription disk cache opened at {disk_path} ({self._disk_bytes} bytes)")
+        except Exception as e:
+            logger.error(f"Failed to open disk cache at {disk_path}: {e}")
+            self._db = None
+    
+    @staticmethod
+    def make_key(audio_np: np.ndarray, **settings: Any) -> str:
+        """
+        Build the cache key for an audio array and the settings that affect the result.
+        
+        Args:
+            audio_np: Exact samples passed to the model
+            **settings: Model and decode settings (model_size, compute_type, language, ...)
+        
+        Returns:
+            Hex digest identifying the result
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(np.ascontiguousarray(audio_np, dtype=np.float32).tobytes())
+        digest.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a result, promoting disk hits into memory."""
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self._hits += 1
+                return json.loads(value)
+            
+            if self._db is not None:
+                row = self._db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE results SET accessed = ? WHERE key = ?", (time.time(), key))
+                    self._db.commit()
+                    self._hits += 1
+                    self._disk_hits += 1
+                    self._put_memory(key, row[0])
+                    return json.loads(row[0])
+            
+            self._misses += 1
+            return None
+    
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """Store a result in every enabled tier."""
+        value = json.dumps(result)
+        with self._lock:
+            self._put_memory(key, value)
+            if self._db is not None:
+                self._put_disk(key, value)
+    
+    def _put_memory(self, key: str, value: str) -> None:
+        """Insert into the memory tier and evict least-recently-used entries."""
+        if len(value) > self.max_memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = value
+        self._memory_bytes += len(value)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+    
+    def _put_disk(self, key: str, value: str) -> None:
+        """Insert into the disk tier and evict least-recently-accessed rows."""
+        try:
+            row = self._db.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._disk_bytes -= row[0]
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, len(value), time.time())
+            )
+            self._disk_bytes += len(value)
+            
+            while self._disk_bytes > self.max_disk_bytes:
+                oldest = self._db.execute(
+                    "SELECT key, size FROM results ORDER BY accessed LIMIT 64"
+                ).fetchall()
+                if not oldest:
+                    break
+                for evicted_key, size in oldest:
+                    self._db.execute("DELETE FROM results WHERE key = ?", (evicted_key,))
+                    self._disk_bytes -= size
+                    if self._disk_bytes <= self.max_disk_bytes:
+                        break
+            self._db.commit()
+        except Exception as e:
+            logger.error(f"Failed to write disk cache: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss rates and bytes held per tier."""
+        lookups = self._hits + self._misses
+        return {
+            "hits": self._hits,
+            "disk_hits": self._disk_hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_enabled": self._db is not None,
+            "disk_bytes": self._disk_bytes
+        }
+    
+    def close(self) -> None:
+        """Close the disk tier."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None 
\ No newline at end of file
@@ -20,6 +20,14 @@ class AudioConfig:
     overlap_duration: float = 0.5
     min_chunk_duration: float = 0.5
     normalize_audio: bool = True
+    enable_vad: bool = True  # Skip silent chunks and trim silence before transcription
+    vad_aggressiveness: int = 2  # webrtcvad mode, 0 (least) to 3 (most aggressive)
+    vad_frame_ms: int = 30  # Analysis frame length (10, 20 or 30 ms)
+    vad_energy_threshold_db: float = -45.0  # Frames quieter than this are silence
+    vad_min_speech_ratio: float = 0.05  # Voiced fraction needed to transcribe a chunk
+    vad_padding_ms: int = 200  # Audio kept around voiced regions when trimming
+    split_on_silence: bool = True  # Cut file chunks in pauses instead of overlapping them
+    silence_search_duration: float = 1.0  # Seconds before each cut searched for a pause
 
 
 @dataclass
@@ -31,6 +39,83 @@ class TranscriptionConfig:
     language: Optional[str] = None
     beam_size: int = 5
     best_of: int = 5
+    cpu_threads: int = 0  # CTranslate2 threads per worker (0 = library default)
+    num_workers: int = 1  # CTranslate2 workers able to decode concurrently
+    inference_workers: int = 1  # Threads dispatching inference off the event loop
+    max_pending_requests: int = 8  # Queued + running requests before backpressure
+    request_timeout: float = 30.0  # Seconds before a chunk result is abandoned
+    enable_batching: bool = False  # Batch real-time chunks across sessions
+    batch_max_size: int = 8  # Maximum chunks per batched model call
+    batch_max_wait_ms: float = 20.0  # Maximum time a chunk waits for batch-mates
+    file_parallelism: int = 0  # Concurrent chunks per file (0 = inference_workers)
+    max_warm_models: int = 2  # Models kept loaded for per-session tiers
+    model_memory_budget_mb: float = 0.0  # Estimated memory for loaded models (0 = unlimited)
+    two_pass: bool = False  # Draft with a fast model, then refine with model_size in the background
+    draft_model_size: str = "tiny"  # Model for the immediate draft pass
+    draft_beam_size: int = 1  # Beam width of the draft pass (1 = greedy)
+    incremental_features: bool = True  # Compute log-mel frames once and reuse them for re-decoded and overlapping audio
+
+
+@dataclass
+class SessionConfig:
+    """Per-session (WebSocket connection) configuration."""
+    streaming_max_buffer: float = 15.0  # Seconds of unconfirmed audio before force-commit
+    streaming_prompt_chars: int = 200  # Committed text passed as initial_prompt
+    coalesce_window_seconds: float = 0.0  # Decode a session's consecutive chunks together up to this much audio (0 = off)
+    coalesce_max_latency_ms: float = 1500.0  # Longest a chunk waits for window-mates before it is decoded
+
+
+@dataclass
+class CacheConfig:
+    """Transcription result cache configuration."""
+    enabled: bool = True
+    max_memory_mb: float = 64.0  # In-memory LRU tier budget
+    disk_path: Optional[str] = None  # SQLite file for the persistent tier (None = memory only)
+    max_disk_mb: float = 1024.0  # Disk tier budget
+
+
+@dataclass
+class DiarizationConfig:
+    """Speaker diarization configuration (used when enable_speaker_diarization is set)."""
+    backend: str = "auto"  # "auto" (resemblyzer if installed), "resemblyzer" or "mfcc"
+    similarity_threshold: float = 0.75  # Cosine similarity needed to reuse a known speaker
+    max_speakers: int = 8  # Speakers per session before voices are forced onto the nearest one
+    min_segment_seconds: float = 0.3  # Voiced audio needed for a window to create or move a speaker
+    window_seconds: float = 1.5  # Longest stretch of speech embedded as one window
+
+
+@dataclass
+class EmotionConfig:
+    """Emotion detection configuration (used when enable_emotion_detection is set)."""
+    model_path: Optional[str] = None  # Trained classifier JSON (None = built-in prosody prototypes)
+    pitch_floor_hz: float = 70.0  # Lowest pitch tracked
+    pitch_ceiling_hz: float = 400.0  # Highest pitch tracked
+    voicing_threshold: float = 0.45  # Autocorrelation peak needed to call a frame pitched
+
+
+@dataclass
+class SceneConfig:
+    """Scene classification configuration (used when enable_scene_classification is set)."""
+    backend: str = "rules"  # "rules", or "ollama" to relabel windows with a local LLM in the background
+    window_seconds: float = 60.0  # Speech covered by the sliding context window
+    window_segments: int = 50  # Maximum segments in the context window
+    ollama_host: str = "http://localhost:11434"
+    ollama_model: str = "llama3.2"
+    llm_batch_size: int = 8  # Session windows per LLM call
+    llm_min_interval: float = 2.0  # Minimum seconds between LLM calls
+    llm_timeout: float = 15.0  # Seconds before an LLM call is abandoned
+
+
+@dataclass
+class BackpressureConfig:
+    """Per-session queueing and admission control for real-time WebSocket sessions."""
+    max_queue_depth: int = 4  # Chunks waiting per session before the overflow policy applies
+    slow_down_depth: int = 2  # Unfinished chunks (queued plus in flight) at which the client is told to slow down
+    overflow_policy: str = "drop_oldest"  # "drop_oldest", "coalesce" or "downgrade"
+    max_coalesce_seconds: float = 30.0  # Longest merged decode under "coalesce" (one Whisper window)
+    downgrade_model_size: str = "tiny"  # Model used while a session is behind under "downgrade"
+    max_load: float = 1.0  # Reject new sessions above this aggregate RTF per inference worker (0 = off)
+    load_window_seconds: float = 10.0  # Recent audio used to estimate each session's load
 
 
 @dataclass
@@ -38,6 +123,12 @@ class PipelineConfig:
     """Main pipeline configuration."""
     audio: AudioConfig = field(default_factory=AudioConfig)
     transcription: TranscriptionConfig = field(default_factory=TranscriptionConfig)
+    session: SessionConfig = field(default_factory=SessionConfig)
+    cache: CacheConfig = field(default_factory=CacheConfig)
+    diarization: DiarizationConfig = field(default_factory=DiarizationConfig)
+    emotion: EmotionConfig = field(default_factory=EmotionConfig)
+    scene: SceneConfig = field(default_factory=SceneConfig)
+    backpressure: BackpressureConfig = field(default_factory=BackpressureConfig)
     enable_speaker_diarization: bool = False
     enable_emotion_detection: bool = False
     enable_scene_classification: bool = False
@@ -51,7 +142,15 @@ class PipelineConfig:
                 "chunk_duration": self.audio.chunk_duration,
                 "overlap_duration": self.audio.overlap_duration,
                 "min_chunk_duration": self.audio.min_chunk_duration,
-                "normalize_audio": self.audio.normalize_audio
+                "normalize_audio": self.audio.normalize_audio,
+                "enable_vad": self.audio.enable_vad,
+                "vad_aggressiveness": self.audio.vad_aggressiveness,
+                "vad_frame_ms": self.audio.vad_frame_ms,
+                "vad_energy_threshold_db": self.audio.vad_energy_threshold_db,
+                "vad_min_speech_ratio": self.audio.vad_min_speech_ratio,
+                "vad_padding_ms": self.audio.vad_padding_ms,
+                "split_on_silence": self.audio.split_on_silence,
+                "silence_search_duration": self.audio.silence_search_duration
             },
             "transcription": {
                 "model_size": self.transcription.model_size,
@@ -59,7 +158,66 @@ class PipelineConfig:
                 "compute_type": self.transcription.compute_type,
                 "language": self.transcription.language,
                 "beam_size": self.transcription.beam_size,
-                "best_of": self.transcription.best_of
+                "best_of": self.transcription.best_of,
+                "cpu_threads": self.transcription.cpu_threads,
+                "num_workers": self.transcription.num_workers,
+                "inference_workers": self.transcription.inference_workers,
+                "max_pending_requests": self.transcription.max_pending_requests,
+                "request_timeout": self.transcription.request_timeout,
+                "enable_batching": self.transcription.enable_batching,
+                "batch_max_size": self.transcription.batch_max_size,
+                "batch_max_wait_ms": self.transcription.batch_max_wait_ms,
+                "file_parallelism": self.transcription.file_parallelism,
+                "max_warm_models": self.transcription.max_warm_models,
+                "model_memory_budget_mb": self.transcription.model_memory_budget_mb,
+                "two_pass": self.transcription.two_pass,
+                "draft_model_size": self.transcription.draft_model_size,
+                "draft_beam_size": self.transcription.draft_beam_size,
+                "incremental_features": self.transcription.incremental_features
+            },
+            "session": {
+                "streaming_max_buffer": self.session.streaming_max_buffer,
+                "streaming_prompt_chars": self.session.streaming_prompt_chars,
+                "coalesce_window_seconds": self.session.coalesce_window_seconds,
+                "coalesce_max_latency_ms": self.session.coalesce_max_latency_ms
+            },
+            "cache": {
+                "enabled": self.cache.enabled,
+                "max_memory_mb": self.cache.max_memory_mb,
+                "disk_path": self.cache.disk_path,
+                "max_disk_mb": self.cache.max_disk_mb
+            },
+            "diarization": {
+                "backend": self.diarization.backend,
+                "similarity_threshold": self.diarization.similarity_threshold,
+                "max_speakers": self.diarization.max_speakers,
+                "min_segment_seconds": self.diarization.min_segment_seconds,
+                "window_seconds": self.diarization.window_seconds
+            },
+            "emotion": {
+                "model_path": self.emotion.model_path,
+                "pitch_floor_hz": self.emotion.pitch_floor_hz,
+                "pitch_ceiling_hz": self.emotion.pitch_ceiling_hz,
+                "voicing_threshold": self.emotion.voicing_threshold
+            },
+            "scene": {
+                "backend": self.scene.backend,
+                "window_seconds": self.scene.window_seconds,
+                "window_segments": self.scene.window_segments,
+                "ollama_host": self.scene.ollama_host,
+                "ollama_model": self.scene.ollama_model,
+                "llm_batch_size": self.scene.llm_batch_size,
+                "llm_min_interval": self.scene.llm_min_interval,
+                "llm_timeout": self.scene.llm_timeout
+            },
+            "backpressure": {
+                "max_queue_depth": self.backpressure.max_queue_depth,
+                "slow_down_depth": self.backpressure.slow_down_depth,
+                "overflow_policy": self.backpressure.overflow_policy,
+                "max_coalesce_seconds": self.backpressure.max_coalesce_seconds,
+                "downgrade_model_size": self.backpressure.downgrade_model_size,
+                "max_load": self.backpressure.max_load,
+                "load_window_seconds": self.backpressure.load_window_seconds
             },
             "enable_speaker_diarization": self.enable_speaker_diarization,
             "enable_emotion_detection": self.enable_emotion_detection,
@@ -79,6 +237,14 @@ class PipelineConfig:
             config.audio.overlap_duration = audio_config.get("overlap_duration", 0.5)
             config.audio.min_chunk_duration = audio_config.get("min_chunk_duration", 0.5)
             config.audio.normalize_audio = audio_config.get("normalize_audio", True)
+            config.audio.enable_vad = audio_config.get("enable_vad", True)
+            config.audio.vad_aggressiveness = audio_config.get("vad_aggressiveness", 2)
+            config.audio.vad_frame_ms = audio_config.get("vad_frame_ms", 30)
+            config.audio.vad_energy_threshold_db = audio_config.get("vad_energy_threshold_db", -45.0)
+            config.audio.vad_min_speech_ratio = audio_config.get("vad_min_speech_ratio", 0.05)
+            config.audio.vad_padding_ms = audio_config.get("vad_padding_ms", 200)
+            config.audio.split_on_silence = audio_config.get("split_on_silence", True)
+            config.audio.silence_search_duration = audio_config.get("silence_search_duration", 1.0)
         
         if "transcription" in config_dict:
             trans_config = config_dict["transcription"]
@@ -88,6 +254,71 @@ class PipelineConfig:
             config.transcription.language = trans_config.get("language")
             config.transcription.beam_size = trans_config.get("beam_size", 5)
             config.transcription.best_of = trans_config.get("best_of", 5)
+            config.transcription.cpu_threads = trans_config.get("cpu_threads", 0)
+            config.transcription.num_workers = trans_config.get("num_workers", 1)
+            config.transcription.inference_workers = trans_config.get("inference_workers", 1)
+            config.transcription.max_pending_requests = trans_config.get("max_pending_requests", 8)
+            config.transcription.request_timeout = trans_config.get("request_timeout", 30.0)
+            config.transcription.enable_batching = trans_config.get("enable_batching", False)
+            config.transcription.batch_max_size = trans_config.get("batch_max_size", 8)
+            config.transcription.batch_max_wait_ms = trans_config.get("batch_max_wait_ms", 20.0)
+            config.transcription.file_parallelism = trans_config.get("file_parallelism", 0)
+            config.transcription.max_warm_models = trans_config.get("max_warm_models", 2)
+            config.transcription.model_memory_budget_mb = trans_config.get("model_memory_budget_mb", 0.0)
+            config.transcription.two_pass = trans_config.get("two_pass", False)
+            config.transcription.draft_model_size = trans_config.get("draft_model_size", "tiny")
+            config.transcription.draft_beam_size = trans_config.get("draft_beam_size", 1)
+            config.transcription.incremental_features = trans_config.get("incremental_features", True)
+        
+        if "session" in config_dict:
+            session_config = config_dict["session"]
+            config.session.streaming_max_buffer = session_config.get("streaming_max_buffer", 15.0)
+            config.session.streaming_prompt_chars = session_config.get("streaming_prompt_chars", 200)
+            config.session.coalesce_window_seconds = session_config.get("coalesce_window_seconds", 0.0)
+            config.session.coalesce_max_latency_ms = session_config.get("coalesce_max_latency_ms", 1500.0)
+        
+        if "cache" in config_dict:
+            cache_config = config_dict["cache"]
+            config.cache.enabled = cache_config.get("enabled", True)
+            config.cache.max_memory_mb = cache_config.get("max_memory_mb", 64.0)
+            config.cache.disk_path = cache_config.get("disk_path")
+            config.cache.max_disk_mb = cache_config.get("max_disk_mb", 1024.0)
+        
+        if "diarization" in config_dict:
+            diarization_config = config_dict["diarization"]
+            config.diarization.backend = diarization_config.get("backend", "auto")
+            config.diarization.similarity_threshold = diarization_config.get("similarity_threshold", 0.75)
+            config.diarization.max_speakers = diarization_config.get("max_speakers", 8)
+            config.diarization.min_segment_seconds = diarization_config.get("min_segment_seconds", 0.3)
+            config.diarization.window_seconds = diarization_config.get("window_seconds", 1.5)
+        
+        if "emotion" in config_dict:
+            emotion_config = config_dict["emotion"]
+            config.emotion.model_path = emotion_config.get("model_path")
+            config.emotion.pitch_floor_hz = emotion_config.get("pitch_floor_hz", 70.0)
+            config.emotion.pitch_ceiling_hz = emotion_config.get("pitch_ceiling_hz", 400.0)
+            config.emotion.voicing_threshold = emotion_config.get("voicing_threshold", 0.45)
+        
+        if "scene" in config_dict:
+            scene_config = config_dict["scene"]
+            config.scene.backend = scene_config.get("backend", "rules")
+            config.scene.window_seconds = scene_config.get("window_seconds", 60.0)
+            config.scene.window_segments = scene_config.get("window_segments", 50)
+            config.scene.ollama_host = scene_config.get("ollama_host", "http://localhost:11434")
+            config.scene.ollama_model = scene_config.get("ollama_model", "llama3.2")
+            config.scene.llm_batch_size = scene_config.get("llm_batch_size", 8)
+            config.scene.llm_min_interval = scene_config.get("llm_min_interval", 2.0)
+            config.scene.llm_timeout = scene_config.get("llm_timeout", 15.0)
+        
+        if "backpressure" in config_dict:
+            backpressure_config = config_dict["backpressure"]
+            config.backpressure.max_queue_depth = backpressure_config.get("max_queue_depth", 4)
+            config.backpressure.slow_down_depth = backpressure_config.get("slow_down_depth", 2)
+            config.backpressure.overflow_policy = backpressure_config.get("overflow_policy", "drop_oldest")
+            config.backpressure.max_coalesce_seconds = backpressure_config.get("max_coalesce_seconds", 30.0)
+            config.backpressure.downgrade_model_size = backpressure_config.get("downgrade_model_size", "tiny")
+            config.backpressure.max_load = backpressure_config.get("max_load", 1.0)
+            config.backpressure.load_window_seconds = backpressure_config.get("load_window_seconds", 10.0)
         
         config.enable_speaker_diarization = config_dict.get("enable_speaker_diarization", False)
         config.enable_emotion_detection = config_dict.get("enable_emotion_detection", False)
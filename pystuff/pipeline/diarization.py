@@ -0,0 +1,311 @@
+"""
+Speaker Diarization Module
+Labels voiced audio with speakers by clustering voice embeddings online.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import threading
+
+import numpy as np
+
+from .dsp import frame_signal, frame_energy_db, frame_mfcc
+from .vad import VadResult
+
+# Optional neural speaker encoder
+try:
+    from resemblyzer import VoiceEncoder
+except ImportError:
+    logging.warning("resemblyzer not installed - using MFCC speaker embeddings.")
+    VoiceEncoder = None
+
+logger = logging.getLogger(__name__)
+
+SPEAKER_LABEL = "SPEAKER_{:02d}"
+MFCC_COEFFICIENTS = 20  # c0 (loudness) is dropped, so embeddings are 2 * 19 wide
+
+
+@dataclass
+class SpeakerWindows:
+    """Embedded voiced windows of one chunk, not yet labelled with speakers."""
+    windows: List[Tuple[int, int]]  # Sample ranges within the chunk
+    embeddings: np.ndarray  # Unit-length embeddings (n_windows, dim)
+    voiced_seconds: np.ndarray  # Voiced audio per window
+
+
+class OnlineSpeakerClusterer:
+    """
+    Incremental centroid clustering of speaker embeddings.
+    
+    Each embedding joins the most similar speaker when the cosine similarity
+    reaches the threshold, otherwise it starts a new speaker. Centroids are
+    running means, so assigning a segment costs O(speakers) and no history is
+    kept. One clusterer lives per session so labels stay stable across chunks.
+    """
+    
+    def __init__(self, similarity_threshold: float = 0.75, max_speakers: int = 8):
+        """
+        Initialize the clusterer.
+        
+        Args:
+            similarity_threshold: Minimum cosine similarity to join an existing speaker
+            max_speakers: Speakers created before new voices are forced onto the nearest one
+        """
+        self.similarity_threshold = similarity_threshold
+        self.max_speakers = max(1, max_speakers)
+        self._lock = threading.Lock()
+        self._sums: Optional[np.ndarray] = None  # (max_speakers, dim) embedding sums
+        self._centroids: Optional[np.ndarray] = None  # (max_speakers, dim) unit-length means
+        self.counts: List[int] = []
+    
+    @property
+    def num_speakers(self) -> int:
+        """Number of speakers discovered so far."""
+        return len(self.counts)
+    
+    def assign(self, embeddings: np.ndarray, update: Optional[np.ndarray] = None) -> List[int]:
+        """
+        Assign each embedding to a speaker, updating centroids in order.
+        
+        Args:
+            embeddings: Unit-length embeddings of shape (n, dim)
+            update: Per-embedding flags; False assigns the nearest known speaker
+                without moving its centroid or creating a speaker (short segments)
+        
+        Returns:
+            Speaker index per embedding (-1 when no speaker is known yet)
+        """
+        if update is None:
+            update = np.ones(len(embeddings), dtype=bool)
+        
+        labels = []
+        with self._lock:
+            for embedding, learn in zip(embeddings, update):
+                if self._sums is None:
+                    self._sums = np.zeros((self.max_speakers, len(embedding)))
+                    self._centroids = np.zeros((self.max_speakers, len(embedding)))
+                
+                speakers = len(self.counts)
+                if speakers:
+                    similarities = self._centroids[:speakers] @ embedding
+                    best = int(np.argmax(similarities))
+                    similarity = similarities[best]
+                else:
+                    best, similarity = -1, -np.inf
+                
+                if not learn:
+                    labels.append(best)
+                    continue
+                if similarity < self.similarity_threshold and speakers < self.max_speakers:
+                    best = speakers
+                    self.counts.append(0)
+                
+                self.counts[best] += 1
+                self._sums[best] += embedding
+                self._centroids[best] = self._sums[best] / (np.linalg.norm(self._sums[best]) + 1e-10)
+                labels.append(best)
+        return labels
+
+
+class SpeakerDiarizer:
+    """Embeds voiced windows of a chunk and labels them with an OnlineSpeakerClusterer."""
+    
+    def __init__(self, sample_rate: int = 16000, backend: str = "auto",
+                 similarity_threshold: float = 0.75, max_speakers: int = 8,
+                 min_segment_seconds: float = 0.3, window_seconds: float = 1.5,
+                 frame_ms: int = 30, energy_threshold_db: float = -45.0):
+        """
+        Initialize the speaker diarizer.
+        
+        Args:
+            sample_rate: Sample rate of the analysed audio
+            backend: "auto" (resemblyzer when installed), "resemblyzer" or "mfcc"
+            similarity_threshold: Cosine similarity needed to reuse a speaker
+            max_speakers: Maximum speakers per clusterer (session)
+            min_segment_seconds: Voiced audio needed before a window may create
+                or move a speaker; shorter windows take the nearest label
+            window_seconds: Voiced segments longer than this are split so a
+                change of speaker inside one pause-free stretch is caught
+            frame_ms: Frame length used when no VAD result is supplied
+            energy_threshold_db: Voiced-frame threshold used when no VAD result is supplied
+        """
+        self.sample_rate = sample_rate
+        self.similarity_threshold = similarity_threshold
+        self.max_speakers = max_speakers
+        self.min_segment_seconds = min_segment_seconds
+        self.window_seconds = window_seconds
+        self.frame_length = int(sample_rate * frame_ms / 1000)
+        self.energy_threshold_db = energy_threshold_db
+        
+        self._encoder = None
+        if backend in ("auto", "resemblyzer") and VoiceEncoder is not None:
+            self._encoder = VoiceEncoder("cpu", verbose=False)
+        elif backend == "resemblyzer":
+            logger.warning("resemblyzer requested but not installed - using MFCC speaker embeddings")
+        self.backend = "resemblyzer" if self._encoder is not None else "mfcc"
+        logger.info(f"Speaker diarizer using {self.backend} embeddings")
+    
+    def new_clusterer(self) -> OnlineSpeakerClusterer:
+        """Create the clusterer holding one session's speakers."""
+        return OnlineSpeakerClusterer(self.similarity_threshold, self.max_speakers)
+    
+    def diarize(self, audio_np: np.ndarray, clusterer: OnlineSpeakerClusterer,
+                vad_result: Optional[VadResult] = None) -> List[Dict[str, Any]]:
+        """
+        Label the voiced parts of a chunk with speakers.
+        
+        Args:
+            audio_np: Mono float32 audio at self.sample_rate
+            clusterer: Session clusterer (updated in place)
+            vad_result: VAD analysis of audio_np; its frames and voiced segments
+                are reused instead of re-framing the audio
+        
+        Returns:
+            Speaker turns [{"start", "end", "speaker"}] in seconds relative to audio_np
+        """
+        return self.label_windows(self.embed_windows(audio_np, vad_result), clusterer)
+    
+    def embed_windows(self, audio_np: np.ndarray, vad_result: Optional[VadResult] = None) -> SpeakerWindows:
+        """
+        Embed the voiced windows of a chunk without touching any clusterer.
+        
+        Chunks can be embedded in parallel; label_windows() then assigns speakers
+        in timeline order (see diarize for the arguments).
+        """
+        if vad_result is not None and vad_result.frames is not None:
+            frames, flags, frame_length = vad_result.frames, vad_result.frame_flags, vad_result.frame_length
+            segments = vad_result.segments
+        else:
+            frames = frame_signal(audio_np, self.frame_length)
+            flags = frame_energy_db(frames) > self.energy_threshold_db
+            frame_length = self.frame_length
+            segments = [(0, len(audio_np))] if flags.any() else []
+        
+        windows = self._split_windows(segments)
+        if not windows:
+            return SpeakerWindows(windows, np.zeros((0, 0)), np.zeros(0))
+        embeddings, voiced_seconds = self._embed(audio_np, frames, flags, frame_length, windows)
+        return SpeakerWindows(windows, embeddings, voiced_seconds)
+    
+    def label_windows(self, speaker_windows: SpeakerWindows,
+                      clusterer: OnlineSpeakerClusterer) -> List[Dict[str, Any]]:
+        """Assign embedded windows to speakers (updates the clusterer, so call in timeline order)."""
+        if not speaker_windows.windows:
+            return []
+        labels = clusterer.assign(speaker_windows.embeddings,
+                                  speaker_windows.voiced_seconds >= self.min_segment_seconds)
+        
+        turns = []
+        for (start, end), label in zip(speaker_windows.windows, labels):
+            if label < 0:
+                continue
+            speaker = SPEAKER_LABEL.format(label)
+            start_s, end_s = start / self.sample_rate, end / self.sample_rate
+            if turns and turns[-1]["speaker"] == speaker and start_s - turns[-1]["end"] < 1e-6:
+                turns[-1]["end"] = end_s
+            else:
+                turns.append({"start": start_s, "end": end_s, "speaker": speaker})
+        return turns
+    
+    def _split_windows(self, segments: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Cut voiced sample ranges into near-equal windows of at most window_seconds."""
+        max_samples = max(1, int(self.window_seconds * self.sample_rate))
+        windows = []
+        for start, end in segments:
+            pieces = max(1, -(-(end - start) // max_samples))
+            bounds = np.linspace(start, end, pieces + 1).astype(int)
+            windows.extend(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+        return windows
+    
+    def _embed(self, audio_np: np.ndarray, frames: np.ndarray, flags: np.ndarray, frame_length: int,
+               windows: List[Tuple[int, int]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Embed every window of a chunk.
+        
+        Returns:
+            Tuple of (unit-length embeddings (n_windows, dim), voiced seconds per window)
+        """
+        n_frames = len(frames)
+        frame_ranges = [
+            (start // frame_length, min(-(-end // frame_length), n_frames))
+            for start, end in windows
+        ]
+        voiced_seconds = np.array([
+            np.count_nonzero(flags[first:last]) * frame_length / self.sample_rate
+            for first, last in frame_ranges
+        ])
+        
+        if self._encoder is not None:
+            embeddings = np.stack([self._encoder.embed_utterance(audio_np[start:end]) for start, end in windows])
+        else:
+            # One batched MFCC pass over the chunk serves every window; voiced frames only
+            cepstra = frame_mfcc(frames, self.sample_rate, MFCC_COEFFICIENTS)[:, 1:]
+            embeddings = np.zeros((len(windows), 2 * cepstra.shape[1]))
+            for i, (first, last) in enumerate(frame_ranges):
+                voiced = cepstra[first:last][flags[first:last]]
+                if len(voiced):
+                    embeddings[i] = np.concatenate([voiced.mean(axis=0), voiced.std(axis=0)])
+        
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-10), voiced_seconds
+
+
+def _best_speaker(start: float, end: float, turn_starts: np.ndarray, turn_ends: np.ndarray,
+                  speakers: List[str]) -> str:
+    """Speaker of the turn overlapping [start, end] the most (nearest turn if none overlap)."""
+    overlap = np.minimum(turn_ends, end) - np.maximum(turn_starts, start)
+    best = int(np.argmax(overlap))
+    if overlap[best] <= 0:
+        distance = np.maximum(turn_starts - end, start - turn_ends)
+        best = int(np.argmin(distance))
+    return speakers[best]
+
+
+def assign_speakers(segments: List[Dict[str, Any]], turns: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Attach speaker labels to transcript segments and their words.
+    
+    Args:
+        segments: Transcript segments with start/end (and optional words) in seconds
+        turns: Speaker turns on the same timeline (see SpeakerDiarizer.diarize)
+    
+    Returns:
+        New segment list with "speaker" on every segment and word
+    """
+    if not turns:
+        return segments
+    turn_starts = np.array([turn["start"] for turn in turns])
+    turn_ends = np.array([turn["end"] for turn in turns])
+    speakers = [turn["speaker"] for turn in turns]
+    
+    return [
+        {
+            **segment,
+            "speaker": _best_speaker(segment["start"], segment["end"], turn_starts, turn_ends, speakers),
+            "words": assign_word_speakers(segment.get("words") or [], turns)
+        }
+        for segment in segments
+    ]
+
+
+def assign_word_speakers(words: List[Dict[str, Any]], turns: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Attach speaker labels to timed words.
+    
+    Args:
+        words: Words with start/end in seconds
+        turns: Speaker turns on the same timeline
+    
+    Returns:
+        New word list with "speaker" on every word
+    """
+    if not turns or not words:
+        return words
+    turn_starts = np.array([turn["start"] for turn in turns])
+    turn_ends = np.array([turn["end"] for turn in turns])
+    speakers = [turn["speaker"] for turn in turns]
+    return [
+        {**word, "speaker": _best_speaker(word["start"], word["end"], turn_starts, turn_ends, speakers)}
+        for word in words
+    ] 
\ No newline at end of file
@@ -0,0 +1,322 @@
+"""
+DSP Utilities Module
+Vectorized signal helpers shared by the pipeline stages.
+"""
+
+from functools import lru_cache
+from math import gcd
+from typing import Iterable, Iterator
+import logging
+
+import numpy as np
+
+# Optional fast path for polyphase resampling
+try:
+    from scipy.signal import resample_poly, firwin
+except ImportError:
+    logging.warning("scipy not installed - using NumPy polyphase resampler.")
+    resample_poly = None
+    firwin = None
+
+# Resampling filter: half length in taps per unit of max(up, down), Kaiser beta
+RESAMPLE_HALF_LENGTH = 10
+RESAMPLE_KAISER_BETA = 5.0
+RESAMPLE_BLOCK = 16384  # Output samples per vectorized block in the NumPy path
+
+
+def frame_signal(audio_np: np.ndarray, frame_length: int, hop_length: int = None) -> np.ndarray:
+    """
+    Split a 1-D signal into frames without copying.
+    
+    Args:
+        audio_np: Audio data as numpy array
+        frame_length: Samples per frame
+        hop_length: Samples between frame starts (defaults to frame_length)
+    
+    Returns:
+        Read-only array of shape (n_frames, frame_length); a trailing partial frame is dropped
+    """
+    hop_length = hop_length or frame_length
+    audio_np = np.ascontiguousarray(audio_np)
+    if len(audio_np) < frame_length:
+        return np.zeros((0, frame_length), dtype=audio_np.dtype)
+    
+    n_frames = 1 + (len(audio_np) - frame_length) // hop_length
+    stride = audio_np.strides[0]
+    return np.lib.stride_tricks.as_strided(
+        audio_np,
+        shape=(n_frames, frame_length),
+        strides=(stride * hop_length, stride),
+        writeable=False
+    )
+
+
+def frame_energy_db(frames: np.ndarray) -> np.ndarray:
+    """
+    Compute per-frame RMS energy in dBFS.
+    
+    Args:
+        frames: Framed audio of shape (n_frames, frame_length)
+    
+    Returns:
+        Array of shape (n_frames,) with energies in dB relative to full scale
+    """
+    power = np.mean(np.square(frames, dtype=np.float64), axis=1)
+    return 10.0 * np.log10(power + 1e-10)
+
+
+@lru_cache(maxsize=16)
+def mel_filterbank(sample_rate: int, n_fft: int, n_mels: int) -> np.ndarray:
+    """
+    Build (once per configuration) a triangular mel filterbank.
+    
+    Args:
+        sample_rate: Sample rate of the analysed audio
+        n_fft: FFT size the filters apply to
+        n_mels: Number of mel bands between 0 Hz and Nyquist
+    
+    Returns:
+        Read-only array of shape (n_mels, n_fft // 2 + 1)
+    """
+    def hz_to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+    
+    def mel_to_hz(mel):
+        return 700.0 * (10.0 ** (mel / 2595.0) - 1.0)
+    
+    edges = mel_to_hz(np.linspace(0.0, hz_to_mel(sample_rate / 2), n_mels + 2))
+    bins = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    lower, center, upper = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+    filters = np.maximum(0.0, np.minimum((bins - lower) / (center - lower), (upper - bins) / (upper - center)))
+    filters.setflags(write=False)
+    return filters
+
+
+@lru_cache(maxsize=16)
+def slaney_mel_filterbank(sample_rate: int, n_fft: int, n_mels: int) -> np.ndarray:
+    """
+    Build (once per configuration) the Slaney-scale, area-normalized mel filterbank Whisper uses.
+    
+    Args:
+        sample_rate: Sample rate of the analysed audio
+        n_fft: FFT size the filters apply to
+        n_mels: Number of mel bands between 0 Hz and Nyquist
+    
+    Returns:
+        Read-only array of shape (n_mels, n_fft // 2 + 1)
+    """
+    # Linear below 1 kHz, logarithmic above
+    f_sp = 200.0 / 3
+    min_log_hz = 1000.0
+    min_log_mel = min_log_hz / f_sp
+    log_step = np.log(6.4) / 27.0
+    
+    def hz_to_mel(hz):
+        hz = np.asarray(hz, dtype=np.float64)
+        return np.where(hz >= min_log_hz, min_log_mel + np.log(np.maximum(hz, min_log_hz) / min_log_hz) / log_step,
+                        hz / f_sp)
+    
+    def mel_to_hz(mel):
+        return np.where(mel >= min_log_mel, min_log_hz * np.exp(log_step * (mel - min_log_mel)), mel * f_sp)
+    
+    edges = mel_to_hz(np.linspace(0.0, hz_to_mel(sample_rate / 2), n_mels + 2))
+    bins = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    lower, center, upper = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+    filters = np.maximum(0.0, np.minimum((bins - lower) / (center - lower), (upper - bins) / (upper - center)))
+    filters *= (2.0 / (edges[2:] - edges[:-2]))[:, None]
+    filters.setflags(write=False)
+    return filters
+
+
+@lru_cache(maxsize=16)
+def _dct_matrix(n_mels: int, n_coefficients: int) -> np.ndarray:
+    """Orthonormal DCT-II basis of shape (n_mels, n_coefficients)."""
+    n = np.arange(n_mels)[:, None]
+    k = np.arange(n_coefficients)[None, :]
+    basis = np.cos(np.pi * k * (2 * n + 1) / (2 * n_mels)) * np.sqrt(2.0 / n_mels)
+    basis[:, 0] /= np.sqrt(2.0)
+    basis.setflags(write=False)
+    return basis
+
+
+@lru_cache(maxsize=16)
+def hann_window(length: int) -> np.ndarray:
+    """Periodic Hann window, cached per frame length."""
+    window = np.hanning(length + 1)[:-1]
+    window.setflags(write=False)
+    return window
+
+
+def frame_power_spectrum(frames: np.ndarray, n_fft: int = None) -> np.ndarray:
+    """
+    Hann-windowed power spectrum of every frame in one batched FFT.
+    
+    Args:
+        frames: Framed audio of shape (n_frames, frame_length), e.g. VadResult.frames
+        n_fft: FFT size (defaults to the next power of two >= frame_length)
+    
+    Returns:
+        Array of shape (n_frames, n_fft // 2 + 1)
+    """
+    frame_length = frames.shape[1]
+    n_fft = n_fft or 1 << max(0, frame_length - 1).bit_length()
+    spectrum = np.fft.rfft(frames * hann_window(frame_length), n=n_fft, axis=1)
+    return np.square(spectrum.real) + np.square(spectrum.imag)
+
+
+def frame_log_mel(frames: np.ndarray, sample_rate: int, n_mels: int = 40) -> np.ndarray:
+    """
+    Compute a log-mel spectrum for every frame in one batched FFT.
+    
+    Args:
+        frames: Framed audio of shape (n_frames, frame_length), e.g. VadResult.frames
+        sample_rate: Sample rate of the audio
+        n_mels: Number of mel bands
+    
+    Returns:
+        Array of shape (n_frames, n_mels) with natural-log mel energies
+    """
+    power = frame_power_spectrum(frames)
+    n_fft = 2 * (power.shape[1] - 1)
+    return np.log(power @ mel_filterbank(sample_rate, n_fft, n_mels).T + 1e-10)
+
+
+def frame_mfcc(frames: np.ndarray, sample_rate: int, n_mfcc: int = 20, n_mels: int = 40) -> np.ndarray:
+    """
+    Compute MFCCs for every frame (log-mel followed by a cached DCT basis).
+    
+    Args:
+        frames: Framed audio of shape (n_frames, frame_length)
+        sample_rate: Sample rate of the audio
+        n_mfcc: Number of cepstral coefficients (including c0)
+        n_mels: Number of mel bands
+    
+    Returns:
+        Array of shape (n_frames, n_mfcc)
+    """
+    return frame_log_mel(frames, sample_rate, n_mels) @ _dct_matrix(n_mels, n_mfcc)
+
+
+@lru_cache(maxsize=32)
+def _lowpass_kernel(up: int, down: int) -> np.ndarray:
+    """
+    Design (once per rate pair) the anti-aliasing FIR used for up/down resampling.
+    
+    Returns:
+        Linear-phase low-pass kernel with unit DC gain
+    """
+    max_rate = max(up, down)
+    num_taps = 2 * RESAMPLE_HALF_LENGTH * max_rate + 1
+    if firwin is not None:
+        kernel = firwin(num_taps, 1.0 / max_rate, window=("kaiser", RESAMPLE_KAISER_BETA))
+    else:
+        n = np.arange(num_taps) - (num_taps - 1) / 2
+        kernel = np.sinc(n / max_rate) * np.kaiser(num_taps, RESAMPLE_KAISER_BETA)
+        kernel /= kernel.sum()
+    kernel.setflags(write=False)
+    return kernel
+
+
+@lru_cache(maxsize=32)
+def _polyphase_kernel(up: int, down: int) -> np.ndarray:
+    """
+    Split the low-pass kernel into ``up`` polyphase branches.
+    
+    Returns:
+        Array of shape (up, taps_per_phase) with branch p holding kernel[p::up]
+    """
+    kernel = _lowpass_kernel(up, down)
+    taps = -(-len(kernel) // up)
+    padded = np.zeros(taps * up)
+    padded[:len(kernel)] = kernel * up
+    phases = padded.reshape(taps, up).T.copy()
+    phases.setflags(write=False)
+    return phases
+
+
+def resample(audio_np: np.ndarray, original_rate: int, target_rate: int) -> np.ndarray:
+    """
+    Resample audio with a polyphase windowed-sinc filter, in process.
+    
+    Filter kernels are cached per rate pair, so repeated calls (one per chunk)
+    only pay for the convolution.
+    
+    Args:
+        audio_np: Mono audio data as numpy array
+        original_rate: Original sample rate
+        target_rate: Target sample rate
+    
+    Returns:
+        Resampled float32 audio array
+    """
+    if original_rate == target_rate or len(audio_np) == 0:
+        return np.asarray(audio_np, dtype=np.float32)
+    
+    divisor = gcd(original_rate, target_rate)
+    up, down = target_rate // divisor, original_rate // divisor
+    
+    if resample_poly is not None:
+        return resample_poly(audio_np, up, down, window=_lowpass_kernel(up, down)).astype(np.float32)
+    
+    phases = _polyphase_kernel(up, down)
+    taps = phases.shape[1]
+    half_len = (len(_lowpass_kernel(up, down)) - 1) // 2
+    
+    # Output m sits at position m * down + half_len on the (virtual) upsampled, filtered grid
+    num_out = -(-len(audio_np) * up // down)
+    padded = np.concatenate([np.zeros(taps), np.asarray(audio_np, dtype=np.float64), np.zeros(taps)])
+    offsets = np.arange(taps)
+    
+    output = np.empty(num_out, dtype=np.float32)
+    for block_start in range(0, num_out, RESAMPLE_BLOCK):
+        positions = np.arange(block_start, min(block_start + RESAMPLE_BLOCK, num_out)) * down + half_len
+        phase, base = positions % up, positions // up
+        samples = padded[base[:, None] - offsets[None, :] + taps]
+        output[block_start:block_start + len(positions)] = np.einsum("mt,mt->m", phases[phase], samples)
+    return output
+
+
+def resample_stream(blocks: Iterable[np.ndarray], original_rate: int, target_rate: int) -> Iterator[np.ndarray]:
+    """
+    Resample audio that arrives in blocks exactly as resample() would in one piece.
+    
+    Each block is filtered together with enough neighbouring input to cover the
+    low-pass kernel, and the filter's edge padding is trimmed, so block
+    boundaries leave no transients. Blocks may have any length.
+    
+    Args:
+        blocks: Consecutive mono audio blocks at original_rate
+        original_rate: Original sample rate
+        target_rate: Target sample rate
+    
+    Yields:
+        Consecutive float32 blocks at target_rate
+    """
+    if original_rate == target_rate:
+        for block in blocks:
+            yield np.asarray(block, dtype=np.float32)
+        return
+    
+    divisor = gcd(original_rate, target_rate)
+    up, down = target_rate // divisor, original_rate // divisor
+    # Input samples covering the kernel's half length, rounded to whole output steps
+    half_len = (len(_lowpass_kernel(up, down)) - 1) // 2
+    context = -(-(half_len // up + 2) // down) * down
+    
+    history = np.zeros(0, dtype=np.float32)  # Already emitted input kept as left context
+    pending = np.zeros(0, dtype=np.float32)  # Input not yet emitted
+    for block in blocks:
+        pending = np.concatenate([pending, np.asarray(block, dtype=np.float32)])
+        # Emit whole output steps whose right context has arrived
+        ready = (len(pending) - context) // down * down
+        if ready <= 0:
+            continue
+        output = resample(np.concatenate([history, pending[:ready + context]]), original_rate, target_rate)
+        skip = len(history) * up // down
+        yield output[skip:skip + ready * up // down]
+        history = np.concatenate([history, pending[:ready]])[-context:]
+        pending = pending[ready:]
+    
+    if len(pending):
+        output = resample(np.concatenate([history, pending]), original_rate, target_rate)
+        yield output[len(history) * up // down:]
@@ -0,0 +1,325 @@
+"""
+Emotion Detection Module
+Labels transcript segments with emotions from vectorized prosody features.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+import json
+import logging
+
+import numpy as np
+
+from .dsp import frame_signal, frame_energy_db, frame_power_spectrum, hann_window
+from .vad import VadResult
+
+logger = logging.getLogger(__name__)
+
+# Per-segment feature vector, in classifier input order
+FEATURE_NAMES = (
+    "pitch_mean",  # Semitones relative to 100 Hz
+    "pitch_std",  # Semitones
+    "energy_mean",  # dB below the loudest frame of the chunk
+    "energy_std",  # dB
+    "spectral_centroid",  # kHz
+    "speech_rate",  # Energy peaks (syllable nuclei) per second of segment
+    "voiced_ratio"  # Pitched fraction of voiced frames
+)
+
+# Default classifier: prototypes in standardized feature space (nearest prototype wins)
+DEFAULT_FEATURE_MEAN = (6.0, 2.5, -10.0, 6.0, 1.5, 4.0, 0.6)
+DEFAULT_FEATURE_SCALE = (6.0, 1.2, 4.0, 2.0, 0.5, 1.5, 0.2)
+DEFAULT_PROTOTYPES = {
+    "neutral": (0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0),
+    "happy": (1.0, 1.2, 0.5, 0.3, 0.5, 0.5, 0.3),
+    "sad": (-0.5, -1.0, -1.0, -0.5, -1.0, -1.0, 0.0),
+    "angry": (0.5, 0.5, 1.2, 0.0, 1.5, 0.8, 0.0)
+}
+
+OCTAVE_TOLERANCE = 0.9  # Fraction of the strongest autocorrelation peak an earlier peak needs to win
+SYLLABLE_PROMINENCE_DB = 3.0  # Rise of an energy peak over its neighbourhood to count as a syllable
+SYLLABLE_NEIGHBOURHOOD = 3  # Frames on each side searched for the neighbourhood minimum
+
+
+@dataclass
+class ProsodyFrames:
+    """Frame-level prosody of one chunk, aggregated per segment once segment times are known."""
+    pitch: np.ndarray  # Per-frame f0 in Hz (0 where unpitched)
+    energy: np.ndarray  # Per-frame energy in dB relative to the loudest frame
+    centroid: np.ndarray  # Per-frame spectral centroid in kHz
+    voiced: np.ndarray  # Per-frame speech decisions
+    peaks: np.ndarray  # Per-frame syllable-nucleus flags
+    hop_length: int
+    frame_length: int
+    sample_rate: int
+
+
+@lru_cache(maxsize=16)
+def _window_autocorrelation(frame_length: int, n_fft: int) -> np.ndarray:
+    """Normalized autocorrelation of the Hann window, used to unbias frame autocorrelations."""
+    window = hann_window(frame_length)
+    autocorr = np.fft.irfft(np.abs(np.fft.rfft(window, n=n_fft)) ** 2, n=n_fft)[:frame_length]
+    autocorr = autocorr / autocorr[0]
+    autocorr.setflags(write=False)
+    return autocorr
+
+
+class EmotionClassifier:
+    """Linear softmax classifier over standardized prosody features."""
+    
+    def __init__(self, labels: Sequence[str], weights: np.ndarray, bias: np.ndarray,
+                 mean: np.ndarray, scale: np.ndarray):
+        """
+        Initialize the classifier.
+        
+        Args:
+            labels: Class names
+            weights: Array of shape (n_classes, n_features)
+            bias: Array of shape (n_classes,)
+            mean: Feature means used for standardization
+            scale: Feature scales used for standardization
+        """
+        self.labels = list(labels)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.bias = np.asarray(bias, dtype=np.float64)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+    
+    @classmethod
+    def default(cls) -> 'EmotionClassifier':
+        """
+        Nearest-prototype classifier over DEFAULT_PROTOTYPES.
+        
+        With unit variance, -|z - p|^2 / 2 ranks classes like the linear
+        function p.z - |p|^2 / 2, so the prototypes become weights and biases.
+        """
+        prototypes = np.array(list(DEFAULT_PROTOTYPES.values()))
+        return cls(
+            labels=list(DEFAULT_PROTOTYPES),
+            weights=prototypes,
+            bias=-0.5 * np.sum(prototypes ** 2, axis=1),
+            mean=DEFAULT_FEATURE_MEAN,
+            scale=DEFAULT_FEATURE_SCALE
+        )
+    
+    @classmethod
+    def load(cls, filepath: str) -> 'EmotionClassifier':
+        """
+        Load a trained classifier from JSON.
+        
+        The file holds "labels", "weights" (n_classes x len(FEATURE_NAMES)), "bias",
+        "mean" and "scale".
+        """
+        with open(filepath, 'r') as f:
+            model = json.load(f)
+        classifier = cls(model["labels"], model["weights"], model["bias"], model["mean"], model["scale"])
+        if classifier.weights.shape != (len(classifier.labels), len(FEATURE_NAMES)):
+            raise ValueError(f"Emotion model weights must be {len(classifier.labels)} x {len(FEATURE_NAMES)}")
+        return classifier
+    
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        """
+        Class probabilities for a batch of feature vectors.
+        
+        Args:
+            features: Array of shape (n_segments, n_features)
+        
+        Returns:
+            Array of shape (n_segments, n_classes)
+        """
+        logits = ((features - self.mean) / self.scale) @ self.weights.T + self.bias
+        logits -= logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        return probabilities / probabilities.sum(axis=1, keepdims=True)
+
+
+class EmotionDetector:
+    """Extracts frame prosody from the VAD frames of a chunk and classifies transcript segments."""
+    
+    def __init__(self, sample_rate: int = 16000, model_path: Optional[str] = None,
+                 pitch_floor_hz: float = 70.0, pitch_ceiling_hz: float = 400.0,
+                 voicing_threshold: float = 0.45, frame_ms: int = 30,
+                 energy_threshold_db: float = -45.0):
+        """
+        Initialize the emotion detector.
+        
+        Args:
+            sample_rate: Sample rate of the analysed audio
+            model_path: JSON classifier (see EmotionClassifier.load); None uses the built-in prototypes
+            pitch_floor_hz: Lowest pitch searched for
+            pitch_ceiling_hz: Highest pitch searched for
+            voicing_threshold: Normalized autocorrelation peak needed to call a frame pitched
+            frame_ms: Frame length used when no VAD result is supplied
+            energy_threshold_db: Speech threshold used when no VAD result is supplied
+        """
+        self.sample_rate = sample_rate
+        self.min_lag = int(sample_rate / pitch_ceiling_hz)
+        self.max_lag = int(np.ceil(sample_rate / pitch_floor_hz))
+        self.voicing_threshold = voicing_threshold
+        self.frame_length = int(sample_rate * frame_ms / 1000)
+        self.energy_threshold_db = energy_threshold_db
+        
+        self.classifier = EmotionClassifier.default()
+        if model_path:
+            try:
+                self.classifier = EmotionClassifier.load(model_path)
+                logger.info(f"Loaded emotion classifier from {model_path}")
+            except Exception as e:
+                logger.error(f"Failed to load emotion classifier {model_path}, using defaults: {e}")
+    
+    def analyze(self, audio_np: np.ndarray, vad_result: Optional[VadResult] = None) -> ProsodyFrames:
+        """
+        Compute frame-level prosody for a chunk.
+        
+        The VAD frames, energies and speech flags are reused; a single batched
+        FFT per frame yields both the autocorrelation (pitch) and the spectral
+        centroid. Frames shorter than two pitch periods are widened around the
+        same hop so the VAD frame grid is kept.
+        
+        Args:
+            audio_np: Mono float32 audio at self.sample_rate
+            vad_result: VAD analysis of audio_np
+        
+        Returns:
+            ProsodyFrames on the VAD frame grid
+        """
+        if vad_result is not None and vad_result.frames is not None:
+            frames, energy, voiced = vad_result.frames, vad_result.frame_energy, vad_result.frame_flags
+            hop_length = vad_result.frame_length
+        else:
+            hop_length = self.frame_length
+            frames = frame_signal(audio_np, hop_length)
+            energy = frame_energy_db(frames)
+            voiced = energy > self.energy_threshold_db
+        
+        if frames.shape[1] < 2 * self.max_lag:
+            padded = np.concatenate([audio_np, np.zeros(2 * self.max_lag, dtype=audio_np.dtype)])
+            frames = frame_signal(padded, 2 * self.max_lag, hop_length)[:len(energy)]
+        frame_length = frames.shape[1]
+        
+        n_fft = 1 << (2 * frame_length - 1).bit_length()
+        power = frame_power_spectrum(frames, n_fft)
+        
+        # Pitch: autocorrelation peak within the allowed lag range, unbiased by the window
+        autocorr = np.fft.irfft(power, n=n_fft, axis=1)[:, :self.max_lag + 1]
+        autocorr /= autocorr[:, :1] + 1e-10
+        autocorr /= _window_autocorrelation(frame_length, n_fft)[:self.max_lag + 1]
+        # Shortest lag holding a local peak within OCTAVE_TOLERANCE of the best avoids halved pitch
+        search = autocorr[:, self.min_lag:]
+        peaks = np.zeros_like(search, dtype=bool)
+        peaks[:, 1:-1] = (search[:, 1:-1] >= search[:, :-2]) & (search[:, 1:-1] >= search[:, 2:])
+        candidates = peaks & (search >= OCTAVE_TOLERANCE * search.max(axis=1, keepdims=True))
+        best = np.where(candidates.any(axis=1), np.argmax(candidates, axis=1), np.argmax(search, axis=1))
+        lags = self.min_lag + best
+        strength = autocorr[np.arange(len(lags)), lags]
+        pitch = np.where(voiced & (strength >= self.voicing_threshold), self.sample_rate / lags, 0.0)
+        
+        # Brightness: power-weighted mean frequency
+        frequencies = np.fft.rfftfreq(n_fft, 1.0 / self.sample_rate)
+        centroid = (power @ frequencies) / (power.sum(axis=1) + 1e-10) / 1000.0
+        
+        relative_energy = energy - (energy.max() if len(energy) else 0.0)
+        
+        return ProsodyFrames(
+            pitch=pitch,
+            energy=relative_energy,
+            centroid=centroid,
+            voiced=np.asarray(voiced, dtype=bool),
+            peaks=self._syllable_peaks(relative_energy, voiced),
+            hop_length=hop_length,
+            frame_length=frame_length,
+            sample_rate=self.sample_rate
+        )
+    
+    @staticmethod
+    def _syllable_peaks(energy: np.ndarray, voiced: np.ndarray) -> np.ndarray:
+        """Flag voiced local energy maxima that rise SYLLABLE_PROMINENCE_DB over their neighbourhood."""
+        if len(energy) < 3:
+            return np.zeros(len(energy), dtype=bool)
+        smoothed = np.convolve(energy, np.ones(3) / 3.0, mode="same")
+        padded = np.pad(smoothed, SYLLABLE_NEIGHBOURHOOD, mode="edge")
+        neighbourhood = np.lib.stride_tricks.sliding_window_view(padded, 2 * SYLLABLE_NEIGHBOURHOOD + 1)
+        is_max = smoothed >= neighbourhood.max(axis=1)
+        prominent = smoothed - neighbourhood.min(axis=1) >= SYLLABLE_PROMINENCE_DB
+        return is_max & prominent & voiced
+    
+    def segment_features(self, prosody: ProsodyFrames, segments: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Aggregate frame prosody over every segment at once.
+        
+        Frames are mapped to the segment containing their centre and all
+        statistics are accumulated with bincount, so the cost is one pass over
+        the frames regardless of the number of segments.
+        
+        Args:
+            prosody: Frame-level prosody of the chunk
+            segments: Segments with start/end seconds on the chunk timeline (sorted)
+        
+        Returns:
+            Array of shape (n_segments, len(FEATURE_NAMES)); NaN rows for segments without speech
+        """
+        n_segments = len(segments)
+        starts = np.array([segment["start"] for segment in segments])
+        ends = np.array([segment["end"] for segment in segments])
+        centres = (np.arange(len(prosody.voiced)) * prosody.hop_length + prosody.hop_length / 2) / prosody.sample_rate
+        
+        owner = np.searchsorted(starts, centres, side="right") - 1
+        inside = (owner >= 0) & (centres < ends[np.clip(owner, 0, None)])
+        speech = inside & prosody.voiced
+        pitched = speech & (prosody.pitch > 0)
+        
+        def sums(mask, values=None):
+            return np.bincount(owner[mask], weights=None if values is None else values[mask], minlength=n_segments)
+        
+        speech_frames = sums(speech)
+        pitched_frames = sums(pitched)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            semitones = 12.0 * np.log2(np.where(pitched, prosody.pitch, 100.0) / 100.0)
+            pitch_mean = sums(pitched, semitones) / pitched_frames
+            pitch_std = np.sqrt(np.maximum(sums(pitched, semitones ** 2) / pitched_frames - pitch_mean ** 2, 0.0))
+            energy_mean = sums(speech, prosody.energy) / speech_frames
+            energy_std = np.sqrt(np.maximum(sums(speech, prosody.energy ** 2) / speech_frames - energy_mean ** 2, 0.0))
+            centroid = sums(speech, prosody.centroid) / speech_frames
+            speech_rate = sums(speech & prosody.peaks) / np.maximum(ends - starts, prosody.hop_length / prosody.sample_rate)
+            voiced_ratio = pitched_frames / speech_frames
+        
+        # Unpitched speech (whispers, fricatives) still gets a neutral pitch contour
+        pitch_mean = np.where(pitched_frames > 0, pitch_mean, DEFAULT_FEATURE_MEAN[0])
+        pitch_std = np.where(pitched_frames > 0, pitch_std, DEFAULT_FEATURE_MEAN[1])
+        features = np.stack([pitch_mean, pitch_std, energy_mean, energy_std, centroid, speech_rate, voiced_ratio],
+                            axis=1)
+        features[speech_frames == 0] = np.nan
+        return features
+    
+    def label_segments(self, prosody: ProsodyFrames, segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Classify every segment of a chunk in one batch.
+        
+        Args:
+            prosody: Frame-level prosody of the chunk (see analyze)
+            segments: Transcript segments on the chunk timeline
+        
+        Returns:
+            New segment list with "emotion" and "emotion_confidence" on segments containing speech
+        """
+        if not segments:
+            return segments
+        features = self.segment_features(prosody, segments)
+        has_speech = ~np.isnan(features).any(axis=1)
+        probabilities = np.zeros((len(segments), len(self.classifier.labels)))
+        if has_speech.any():
+            probabilities[has_speech] = self.classifier.predict_proba(features[has_speech])
+        
+        labelled = []
+        for segment, speech, row in zip(segments, has_speech, probabilities):
+            if not speech:
+                labelled.append(segment)
+                continue
+            best = int(np.argmax(row))
+            labelled.append({
+                **segment,
+                "emotion": self.classifier.labels[best],
+                "emotion_confidence": float(row[best])
+            })
+        return labelled 
\ No newline at end of file
@@ -0,0 +1,258 @@
+"""
+Features Module
+Incremental Whisper log-mel extraction, so overlapping or re-decoded audio
+reuses feature frames instead of recomputing its STFT on every model call.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+import logging
+
+import numpy as np
+
+from .dsp import frame_signal, frame_power_spectrum, slaney_mel_filterbank
+
+logger = logging.getLogger(__name__)
+
+# Whisper front end: 25 ms Hann windows every 10 ms at 16 kHz
+WHISPER_N_FFT = 400
+WHISPER_HOP_LENGTH = 160
+WHISPER_N_MELS = 80
+# Floor of the mel power before log10, and dynamic range kept below each input's peak
+LOG_MEL_FLOOR = 1e-10
+LOG_MEL_RANGE = 8.0
+
+
+class IncrementalLogMel:
+    """
+    Whisper log-mel features of a growing audio timeline, computed once per frame.
+    
+    Frame f is the Hann-windowed power spectrum centred on sample f * hop_length
+    of the timeline (the first frames are reflect-padded, as Whisper pads the
+    start of its input). append() computes every frame whose window is complete
+    and keeps the raw log10 mel energies in a rolling array; window() slices them
+    for any hop-aligned stretch of the timeline and applies Whisper's per-input
+    dynamic-range clamp and scaling, so re-decoding that audio costs no FFT work.
+    Frames near the end of the audio, whose window is still incomplete, are
+    computed zero-padded on demand and not stored.
+    """
+    
+    def __init__(self, sample_rate: int = 16000, n_mels: int = WHISPER_N_MELS,
+                 n_fft: int = WHISPER_N_FFT, hop_length: int = WHISPER_HOP_LENGTH, trailing_frames: int = 0):
+        """
+        Initialize the extractor.
+        
+        Args:
+            sample_rate: Sample rate of appended audio
+            n_mels: Mel bands (80, or 128 for large-v3)
+            n_fft: FFT size and window length
+            hop_length: Samples between frames
+            trailing_frames: Extra frames of end padding the model's extractor produces
+                (2999 for faster-whisper < 1.1, which pads every input with 30 s of silence)
+        """
+        self.sample_rate = sample_rate
+        self.n_mels = n_mels
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.trailing_frames = trailing_frames
+        self.filters = slaney_mel_filterbank(sample_rate, n_fft, n_mels)
+        self.reset()
+        self.frames_computed = 0
+        self.frames_served = 0
+    
+    def reset(self) -> None:
+        """Forget all audio; the timeline restarts at sample 0."""
+        self._store = np.empty((0, self.n_mels), dtype=np.float32)  # Rows are frames
+        self._head = 0  # Row of the first retained frame
+        self._count = 0  # Retained frames
+        self.first_frame = 0  # Timeline frame index of the first retained frame
+        self._samples = np.zeros(0, dtype=np.float32)  # Audio still needed for frames not yet stored
+        self._samples_start = 0  # Timeline sample index of _samples[0]
+        self.total_samples = 0
+    
+    @property
+    def stored_frames(self) -> int:
+        """Frames currently held in the rolling array."""
+        return self._count
+    
+    def append(self, audio_np: np.ndarray) -> None:
+        """Extend the timeline and compute every frame whose window is now complete."""
+        if len(audio_np) == 0:
+            return
+        self._samples = np.concatenate([self._samples, np.asarray(audio_np, dtype=np.float32)])
+        self.total_samples += len(audio_np)
+        
+        half = self.n_fft // 2
+        next_frame = self.first_frame + self._count
+        last_frame = (self.total_samples - half) // self.hop_length
+        if self.total_samples < half or last_frame < next_frame:
+            return
+        self._push(self._log_mel(next_frame, last_frame + 1 - next_frame))
+        
+        # Later frames only look back half a window from their centre
+        keep_from = max(0, (last_frame + 1) * self.hop_length - half)
+        if keep_from > self._samples_start:
+            self._samples = self._samples[keep_from - self._samples_start:]
+            self._samples_start = keep_from
+    
+    def trim(self, before_sample: int) -> None:
+        """Drop stored frames centred before a timeline sample (audio that will not be decoded again)."""
+        target = before_sample // self.hop_length
+        drop = min(max(target - self.first_frame, 0), self._count)
+        self._head += drop
+        self._count -= drop
+        self.first_frame += drop
+        if not self._count and target > self.first_frame:
+            # Frames not computed yet are skipped rather than computed later
+            self.first_frame = target
+    
+    def window(self, start_sample: int, num_samples: int, gain: float = 1.0) -> np.ndarray:
+        """
+        Whisper input features for a stretch of the timeline.
+        
+        Args:
+            start_sample: First timeline sample (a multiple of hop_length)
+            num_samples: Samples in the stretch
+            gain: Amplitude scale applied to the stretch (e.g. by normalization)
+        
+        Returns:
+            float32 array of shape (n_mels, num_samples // hop_length + 1 + trailing_frames),
+            as Whisper's feature extractor produces for that audio
+        
+        Raises:
+            ValueError: The stretch is not hop-aligned or not retained
+        
+        Frames within half a window of an edge of the stretch that lies inside the
+        timeline see the neighbouring audio instead of Whisper's edge padding.
+        """
+        if start_sample % self.hop_length:
+            raise ValueError(f"Feature window start {start_sample} is not a multiple of {self.hop_length}")
+        first = start_sample // self.hop_length
+        count = num_samples // self.hop_length + 1 + self.trailing_frames
+        if first < self.first_frame or start_sample + num_samples > self.total_samples:
+            raise ValueError(f"Samples {start_sample}-{start_sample + num_samples} are not retained")
+        
+        # Frames whose window lies wholly past the stretch only see padding
+        audible = min(count, (start_sample + num_samples + self.n_fft // 2 - 1) // self.hop_length + 1 - first)
+        reused = max(0, min(audible, self.first_frame + self._count - first))
+        row = self._head + first - self.first_frame
+        parts = [self._store[row:row + reused]]
+        if reused < audible:
+            parts.append(self._log_mel(first + reused, audible - reused))
+        if audible < count:
+            parts.append(np.full((count - audible, self.n_mels), np.log10(LOG_MEL_FLOOR), dtype=np.float32))
+        log_spec = np.concatenate(parts) if len(parts) > 1 else parts[0]
+        self.frames_served += count
+        
+        log_spec = log_spec.T
+        if gain != 1.0:
+            # Power scales with gain squared
+            log_spec = log_spec + 2.0 * np.log10(max(gain, LOG_MEL_FLOOR))
+        log_spec = np.maximum(log_spec, log_spec.max() - LOG_MEL_RANGE)
+        return ((log_spec + 4.0) / 4.0).astype(np.float32)
+    
+    def _log_mel(self, first: int, count: int) -> np.ndarray:
+        """Raw log10 mel energies of frames [first, first + count), zero-padded past the audio."""
+        half = self.n_fft // 2
+        start = first * self.hop_length - half
+        end = (first + count - 1) * self.hop_length + half
+        signal = self._samples[max(start, 0) - self._samples_start:max(end - self._samples_start, 0)]
+        # Whisper zero-pads the end of its input and reflect-pads the start
+        signal = np.pad(signal, (0, end - max(start, 0) - len(signal)))
+        if start < 0:
+            signal = np.pad(signal, (-start, 0), mode="reflect")
+        
+        power = frame_power_spectrum(frame_signal(signal, self.n_fft, self.hop_length), self.n_fft)
+        self.frames_computed += count
+        return np.log10(np.maximum(power @ self.filters.T, LOG_MEL_FLOOR)).astype(np.float32)
+    
+    def _push(self, frames: np.ndarray) -> None:
+        """Append frames to the rolling array, compacting or growing it as needed."""
+        needed = self._count + len(frames)
+        if self._head + needed > len(self._store):
+            if needed <= len(self._store) // 2:
+                self._store[:self._count] = self._store[self._head:self._head + self._count]
+            else:
+                grown = np.empty((max(2 * len(self._store), needed), self.n_mels), dtype=np.float32)
+                grown[:self._count] = self._store[self._head:self._head + self._count]
+                self._store = grown
+            self._head = 0
+        self._store[self._head + self._count:self._head + needed] = frames
+        self._count = needed
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Frames computed versus frames handed to the model."""
+        return {
+            "frames_computed": self.frames_computed,
+            "frames_served": self.frames_served,
+            "stored_frames": self._count,
+            "reuse_ratio": 1.0 - self.frames_computed / self.frames_served if self.frames_served else 0.0
+        }
+
+
+class PrecomputedFeatureExtractor:
+    """
+    Wraps a faster-whisper FeatureExtractor so a call can supply its own features.
+    
+    WhisperModel.transcribe() only accepts waveforms and extracts features
+    itself; inside use(), the next extraction of a waveform with the registered
+    length on the same thread returns the precomputed features instead. Every
+    other call (other threads, other lengths, chunked extraction) is passed
+    through, so the model stays shareable between workers.
+    """
+    
+    def __init__(self, extractor: Any, n_mels: int, trailing_frames: int):
+        """
+        Initialize the wrapper (use wrap() to check the extractor's layout first).
+        
+        Args:
+            extractor: faster-whisper FeatureExtractor
+            n_mels: Mel bands the extractor produces
+            trailing_frames: Padding frames it appends beyond len(audio) // hop_length + 1
+        """
+        self.extractor = extractor
+        self.n_mels = n_mels
+        self.trailing_frames = trailing_frames
+        self._pending = threading.local()
+        self.hits = 0
+    
+    @classmethod
+    def wrap(cls, extractor: Any) -> Optional["PrecomputedFeatureExtractor"]:
+        """Wrap an extractor whose frames IncrementalLogMel can reproduce, else return None."""
+        probe_frames = 10
+        try:
+            hop_length = extractor.hop_length
+            shape = extractor(np.zeros(probe_frames * hop_length, dtype=np.float32)).shape
+        except Exception as e:
+            logger.info(f"Precomputed features disabled: {e}")
+            return None
+        if hop_length != WHISPER_HOP_LENGTH or len(shape) != 2 or shape[1] <= probe_frames:
+            logger.info(f"Precomputed features disabled: unexpected feature layout {shape}")
+            return None
+        return cls(extractor, shape[0], shape[1] - probe_frames - 1)
+    
+    def new_log_mel(self, sample_rate: int = 16000) -> IncrementalLogMel:
+        """Incremental extractor producing features in this model's layout."""
+        return IncrementalLogMel(sample_rate, self.n_mels, trailing_frames=self.trailing_frames)
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.extractor, name)
+    
+    @contextmanager
+    def use(self, audio_np: np.ndarray, features: np.ndarray) -> Iterator[None]:
+        """Serve features for the next extraction of audio_np on this thread (ignored if their shape is wrong)."""
+        expected = (self.n_mels, len(audio_np) // WHISPER_HOP_LENGTH + 1 + self.trailing_frames)
+        self._pending.entry = (len(audio_np), features) if features.shape == expected else None
+        try:
+            yield
+        finally:
+            self._pending.entry = None
+    
+    def __call__(self, waveform: np.ndarray, *args: Any, **kwargs: Any) -> np.ndarray:
+        entry = getattr(self._pending, "entry", None)
+        if entry is not None and not args and kwargs.get("chunk_length") is None and len(waveform) == entry[0]:
+            self._pending.entry = None
+            self.hits += 1
+            return entry[1]
+        return self.extractor(waveform, *args, **kwargs) 
\ No newline at end of file
@@ -0,0 +1,187 @@
+"""
+Inference Pool Module
+Runs blocking model calls on a bounded worker thread pool so the event loop stays responsive.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+import logging
+
+from .metrics import PipelineMetrics
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceQueueFull(RuntimeError):
+    """Raised when the inference pool has no free slot for a new request."""
+
+
+class InferencePool:
+    """
+    Bounded thread pool for model inference.
+    
+    CTranslate2 releases the GIL while decoding, so threads give real parallelism
+    while sharing a single loaded model. At most ``max_pending`` requests may be
+    queued or running at once; beyond that callers are told to back off, or
+    wait in line: a finishing request hands its slot to the oldest waiter.
+    """
+    
+    def __init__(self, max_workers: int = 1, max_pending: int = 8,
+                 default_timeout: Optional[float] = None,
+                 metrics: Optional[PipelineMetrics] = None):
+        """
+        Initialize the inference pool.
+        
+        Args:
+            max_workers: Number of worker threads running inference
+            max_pending: Maximum requests queued or running at once
+            default_timeout: Per-request timeout in seconds (None for no timeout)
+            metrics: Records "queue_wait" (submit to worker start) and "inference" times
+        """
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(self.max_workers, max_pending)
+        self.default_timeout = default_timeout
+        self.metrics = metrics
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self._pending = 0
+        # Callers waiting for a slot, oldest first, each with the loop its future belongs to
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self._completed = 0
+        self._rejected = 0
+        self._timed_out = 0
+        logger.info(f"Inference pool started with {self.max_workers} workers, {self.max_pending} slots")
+    
+    def _try_reserve(self) -> bool:
+        """Reserve a slot if one is free."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                return False
+            self._pending += 1
+            return True
+    
+    def _release(self, _future: Future) -> None:
+        """Free a slot once the worker thread has actually finished."""
+        with self._lock:
+            self._completed += 1
+        self._free_slot()
+    
+    def _free_slot(self) -> None:
+        """Hand a slot to the oldest waiter, or return it to the pool if nobody waits."""
+        with self._lock:
+            if not self._waiters:
+                self._pending -= 1
+                return
+            loop, waiter = self._waiters.popleft()
+        try:
+            loop.call_soon_threadsafe(self._grant, waiter)
+        except RuntimeError:
+            # The waiter's event loop is closed
+            self._free_slot()
+    
+    def _grant(self, waiter: asyncio.Future) -> None:
+        """Wake a waiter with the slot it was handed (on its own loop)."""
+        if waiter.cancelled():
+            self._free_slot()
+        else:
+            waiter.set_result(None)
+    
+    async def _wait_for_slot(self) -> None:
+        """Reserve a slot, waiting in line behind earlier callers when none is free."""
+        with self._lock:
+            if self._pending < self.max_pending:
+                self._pending += 1
+                return
+            loop = asyncio.get_running_loop()
+            entry = (loop, loop.create_future())
+            self._waiters.append(entry)
+        
+        try:
+            await entry[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                queued = entry in self._waiters
+                if queued:
+                    self._waiters.remove(entry)
+            if not queued and entry[1].done() and not entry[1].cancelled():
+                # Cancelled after the slot was handed over: pass it on
+                self._free_slot()
+            raise
+    
+    @property
+    def pending(self) -> int:
+        """Number of requests currently queued or running."""
+        return self._pending
+    
+    def is_saturated(self) -> bool:
+        """Check whether new requests would currently be rejected."""
+        return self._pending >= self.max_pending
+    
+    async def run(self, fn: Callable[..., Any], *args: Any, timeout: Optional[float] = None,
+                  wait_for_slot: bool = False) -> Any:
+        """
+        Run a blocking function on the pool.
+        
+        Args:
+            fn: Blocking callable to execute
+            *args: Positional arguments for fn
+            timeout: Seconds to wait for the result (defaults to default_timeout)
+            wait_for_slot: Wait for a free slot instead of failing fast
+        
+        Returns:
+            Return value of fn
+        
+        Raises:
+            InferenceQueueFull: If no slot is free and wait_for_slot is False
+            asyncio.TimeoutError: If the result is not ready within the timeout
+        """
+        if wait_for_slot:
+            await self._wait_for_slot()
+        elif not self._try_reserve():
+            with self._lock:
+                self._rejected += 1
+            raise InferenceQueueFull(f"Inference queue full ({self.max_pending} pending)")
+        
+        future = self._executor.submit(self._timed_call, time.perf_counter(), fn, *args)
+        future.add_done_callback(self._release)
+        
+        timeout = self.default_timeout if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            # The worker keeps its slot until it really finishes
+            with self._lock:
+                self._timed_out += 1
+            raise
+    
+    def _timed_call(self, submitted_at: float, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run fn on a worker thread, recording queue wait and run time."""
+        if self.metrics is None:
+            return fn(*args)
+        started_at = time.perf_counter()
+        self.metrics.observe("queue_wait", started_at - submitted_at)
+        try:
+            return fn(*args)
+        finally:
+            self.metrics.observe("inference", time.perf_counter() - started_at)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool usage statistics."""
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "waiting": len(self._waiters),
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "timed_out": self._timed_out
+        }
+    
+    def shutdown(self, wait: bool = False) -> None:
+        """Stop the worker threads."""
+        self._executor.shutdown(wait=wait)
+        logger.info("Inference pool shut down") 
\ No newline at end of file
@@ -0,0 +1,64 @@
+"""
+IPC Module
+Length-prefixed message framing between the WebSocket front process and
+inference worker processes over a local stream socket.
+"""
+
+import asyncio
+import json
+import struct
+from typing import Any, Dict, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Little-endian: header length, payload length (bytes)
+MESSAGE_PREFIX = struct.Struct("<II")
+# Headers are small JSON control records; anything larger is a framing error
+MAX_HEADER_BYTES = 1 << 20
+
+
+def encode_message(header: Dict[str, Any], payload: Optional[bytes] = None) -> bytes:
+    """
+    Encode one message: MESSAGE_PREFIX + JSON header + optional binary payload.
+    
+    Args:
+        header: JSON-serializable control record (always carries "op")
+        payload: Raw bytes sent after the header (e.g. a binary audio frame)
+    
+    Returns:
+        Wire bytes for a single transport write
+    """
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    payload = payload or b""
+    return b"".join((MESSAGE_PREFIX.pack(len(header_bytes), len(payload)), header_bytes, payload))
+
+
+def write_message(writer: asyncio.StreamWriter, header: Dict[str, Any],
+                  payload: Optional[bytes] = None) -> None:
+    """
+    Queue one message on a stream writer.
+    
+    The whole message goes out in a single write() so messages from concurrent
+    tasks never interleave; callers drain when they need backpressure.
+    """
+    writer.write(encode_message(header, payload))
+
+
+async def read_message(reader: asyncio.StreamReader) -> Tuple[Dict[str, Any], Optional[bytes]]:
+    """
+    Read one message from a stream.
+    
+    Returns:
+        Tuple of (header, payload or None)
+    
+    Raises:
+        asyncio.IncompleteReadError: The peer closed the connection
+        ValueError: The stream is not speaking this framing
+    """
+    header_length, payload_length = MESSAGE_PREFIX.unpack(await reader.readexactly(MESSAGE_PREFIX.size))
+    if header_length > MAX_HEADER_BYTES:
+        raise ValueError(f"IPC header of {header_length} bytes exceeds {MAX_HEADER_BYTES}")
+    header = json.loads(await reader.readexactly(header_length))
+    payload = await reader.readexactly(payload_length) if payload_length else None
+    return header, payload 
\ No newline at end of file
@@ -0,0 +1,140 @@
+"""
+Segment Merge Module
+Merges per-chunk transcripts of overlapping windows into one absolute timeline.
+"""
+
+import re
+from typing import Any, Dict, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Words this close in time with the same text are the same word seen by two chunks
+DUPLICATE_WORD_TOLERANCE = 0.3
+
+
+def _normalize_word(word: str) -> str:
+    """Normalize a word for duplicate checks (case and punctuation insensitive)."""
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def _midpoint(item: Dict[str, Any]) -> float:
+    """Midpoint of an item with start/end times."""
+    return (item["start"] + item["end"]) / 2.0
+
+
+class ChunkMerger:
+    """
+    Incremental merge_chunk_results() for chunk results arriving in timeline order.
+    
+    A chunk's range ends at the middle of its overlap with the next chunk, so
+    add() returns the de-duplicated segments of the previous chunk once the next
+    one arrives, and finish() returns those of the last chunk.
+    """
+    
+    def __init__(self):
+        self._pending = None  # Latest chunk, waiting for the end of its range
+        self._owned_start = float("-inf")
+        self._last_word = None
+        self.chunks = 0
+        self.duration = 0.0
+    
+    def add(self, result: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Add the next chunk result (chunk-relative "segments"); failed chunks are ignored.
+        
+        Returns:
+            Absolute, de-duplicated segments of the previous chunk (empty for the first)
+        """
+        if result.get("status") != "success":
+            return []
+        self.chunks += 1
+        self.duration = max(self.duration, result["start_time"] + result["duration"])
+        
+        previous, self._pending = self._pending, result
+        if previous is None:
+            return []
+        # Ownership boundary at the middle of the overlap
+        boundary = (previous["start_time"] + previous["duration"] + result["start_time"]) / 2.0
+        segments = self._emit(previous, boundary)
+        self._owned_start = boundary
+        return segments
+    
+    def finish(self) -> List[Dict[str, Any]]:
+        """Segments of the last chunk added."""
+        previous, self._pending = self._pending, None
+        return self._emit(previous, float("inf")) if previous is not None else []
+    
+    def _emit(self, chunk: Dict[str, Any], owned_end: float) -> List[Dict[str, Any]]:
+        """Words (or whole segments) of a chunk inside its owned range, on the absolute timeline."""
+        offset = chunk["start_time"]
+        owned_start = self._owned_start
+        merged: List[Dict[str, Any]] = []
+        
+        for segment in chunk.get("segments", []):
+            words = [
+                {**word, "start": word["start"] + offset, "end": word["end"] + offset}
+                for word in segment.get("words") or []
+            ]
+            
+            if not words:
+                start, end = segment["start"] + offset, segment["end"] + offset
+                if owned_start <= (start + end) / 2.0 < owned_end:
+                    merged.append({**segment, "start": start, "end": end, "chunk_idx": chunk["chunk_idx"]})
+                continue
+            
+            kept = [word for word in words if owned_start <= _midpoint(word) < owned_end]
+            
+            # Same word decoded by both chunks with slightly shifted timings
+            if kept and self._last_word is not None:
+                first = kept[0]
+                if (_normalize_word(first["word"]) == _normalize_word(self._last_word["word"]) and
+                        abs(first["start"] - self._last_word["start"]) < DUPLICATE_WORD_TOLERANCE):
+                    kept = kept[1:]
+            if not kept:
+                continue
+            
+            self._last_word = kept[-1]
+            # Per-segment labels (speaker, emotion, ...) carry over to the re-split segment
+            merged.append({
+                **segment,
+                "start": kept[0]["start"],
+                "end": kept[-1]["end"],
+                "text": "".join(word["word"] for word in kept).strip(),
+                "words": kept,
+                "chunk_idx": chunk["chunk_idx"]
+            })
+        return merged
+
+
+def merge_chunk_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge chunk results from overlapping windows into one de-duplicated timeline.
+    
+    Each chunk owns the time range between the midpoints of its overlaps with the
+    previous and next chunk. Words (or, without word timestamps, whole segments)
+    are kept only by the chunk whose range contains their midpoint, so audio in
+    an overlap is transcribed into the timeline exactly once.
+    
+    Args:
+        results: Chunk results with "start_time", "duration" and chunk-relative "segments"
+    
+    Returns:
+        Dictionary with "text", absolute-timestamped "segments" and total "duration"
+    """
+    merger = ChunkMerger()
+    merged: List[Dict[str, Any]] = []
+    chunks = sorted(
+        (result for result in results if result.get("status") == "success"),
+        key=lambda result: result["start_time"]
+    )
+    for chunk in chunks:
+        merged.extend(merger.add(chunk))
+    merged.extend(merger.finish())
+    logger.info(f"Merged {merger.chunks} chunks into {len(merged)} segments")
+    
+    return {
+        "text": " ".join(segment["text"] for segment in merged if segment["text"]),
+        "segments": merged,
+        "duration": merger.duration
+    }
@@ -0,0 +1,183 @@
+"""
+Metrics Module
+Per-stage latency histograms and counters, exported in Prometheus text format.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) shared by every stage histogram
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Processing time / audio duration; values above 1.0 fall behind real time
+RTF_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 5.0)
+
+METRIC_PREFIX = "tone"
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics)."""
+    
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        """
+        Initialize the histogram.
+        
+        Args:
+            buckets: Sorted upper bounds; an implicit +Inf bucket is added
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value: float) -> None:
+        """Record one value."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+    
+    def cumulative_counts(self) -> List[int]:
+        """Counts of values <= each bucket bound, ending with the +Inf bucket."""
+        total = 0
+        cumulative = []
+        for count in self.counts:
+            total += count
+            cumulative.append(total)
+        return cumulative
+    
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile by linear interpolation inside the matching bucket."""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        lower = 0.0
+        for bound, cumulative, count in zip(self.buckets, self.cumulative_counts(), self.counts):
+            if cumulative >= rank:
+                fraction = (rank - (cumulative - count)) / count if count else 1.0
+                return lower + (bound - lower) * fraction
+            lower = bound
+        return self.buckets[-1]
+
+
+class PipelineMetrics:
+    """
+    Thread-safe registry of pipeline timings and counters.
+    
+    Stages are free-form names (e.g. "decode", "prepare", "queue_wait",
+    "encode", "generate", "send"); each gets its own latency histogram on
+    first use. Real-time factor has a dedicated histogram.
+    """
+    
+    def __init__(self):
+        """Initialize empty metrics."""
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Histogram] = {}
+        self._rtf = Histogram(RTF_BUCKETS)
+        self._counters: Dict[str, float] = {}
+        self.started_at = time.time()
+    
+    def observe(self, stage: str, seconds: float) -> None:
+        """Record the duration of one stage."""
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = Histogram()
+            histogram.observe(seconds)
+    
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        """Time the enclosed block as one observation of stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+    
+    def observe_rtf(self, processing_time: float, audio_duration: float) -> Optional[float]:
+        """
+        Record the real-time factor of one chunk.
+        
+        Returns:
+            The real-time factor, or None for empty audio
+        """
+        if audio_duration <= 0:
+            return None
+        rtf = processing_time / audio_duration
+        with self._lock:
+            self._rtf.observe(rtf)
+        return rtf
+    
+    def increment(self, name: str, value: float = 1) -> None:
+        """Add to a counter."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Summaries (count, mean, estimated p50/p95) per stage plus counters."""
+        def summary(histogram: Histogram) -> Dict[str, Any]:
+            return {
+                "count": histogram.count,
+                "mean": histogram.sum / histogram.count if histogram.count else None,
+                "p50": histogram.quantile(0.5),
+                "p95": histogram.quantile(0.95)
+            }
+        
+        with self._lock:
+            return {
+                "stages": {stage: summary(histogram) for stage, histogram in sorted(self._stages.items())},
+                "real_time_factor": summary(self._rtf),
+                "counters": dict(self._counters)
+            }
+    
+    def render_prometheus(self, gauges: Optional[Dict[str, float]] = None) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+        
+        Args:
+            gauges: Point-in-time values (queue depth, sessions, ...) to export alongside
+        
+        Returns:
+            Exposition text
+        """
+        lines = []
+        
+        def histogram_lines(name: str, histogram: Histogram, labels: str) -> None:
+            separator = "," if labels else ""
+            bounds = [f"{bound:g}" for bound in histogram.buckets] + ["+Inf"]
+            for bound, count in zip(bounds, histogram.cumulative_counts()):
+                lines.append(f'{name}_bucket{{{labels}{separator}le="{bound}"}} {count}')
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{name}_sum{suffix} {histogram.sum:.6f}")
+            lines.append(f"{name}_count{suffix} {histogram.count}")
+        
+        with self._lock:
+            name = f"{METRIC_PREFIX}_stage_duration_seconds"
+            lines.append(f"# HELP {name} Time spent in each pipeline stage.")
+            lines.append(f"# TYPE {name} histogram")
+            for stage, histogram in sorted(self._stages.items()):
+                histogram_lines(name, histogram, f'stage="{stage}"')
+            
+            name = f"{METRIC_PREFIX}_real_time_factor"
+            lines.append(f"# HELP {name} Chunk processing time divided by chunk audio duration.")
+            lines.append(f"# TYPE {name} histogram")
+            histogram_lines(name, self._rtf, "")
+            
+            for counter, value in sorted(self._counters.items()):
+                name = f"{METRIC_PREFIX}_{counter}_total"
+                lines.append(f"# TYPE {name} counter")
+                lines.append(f"{name} {value:g}")
+        
+        for gauge, value in sorted((gauges or {}).items()):
+            name = f"{METRIC_PREFIX}_{gauge}"
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value:g}")
+        
+        name = f"{METRIC_PREFIX}_uptime_seconds"
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {time.time() - self.started_at:.3f}")
+        return "\n".join(lines) + "\n" 
\ No newline at end of file
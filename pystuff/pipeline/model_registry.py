@@ -0,0 +1,219 @@
+"""
+Model Registry Module
+Lazily loads Whisper models per (size, device, compute_type) and keeps a bounded warm pool.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+import logging
+
+from .transcription import TranscriptionProcessor
+
+logger = logging.getLogger(__name__)
+
+ModelKey = Tuple[str, str, str]
+
+# Approximate float32 weight sizes in MB, used for the memory budget
+MODEL_SIZE_MB = {
+    "tiny": 150,
+    "base": 290,
+    "small": 970,
+    "medium": 3100,
+    "large": 6200,
+}
+COMPUTE_TYPE_SCALE = {
+    "float32": 1.0,
+    "float16": 0.5,
+    "bfloat16": 0.5,
+    "int8_float16": 0.3,
+    "int8_bfloat16": 0.3,
+    "int8_float32": 0.3,
+    "int8": 0.25,
+}
+
+
+def estimate_model_mb(model_size: str, compute_type: str) -> float:
+    """Rough resident size of a model in MB."""
+    base = MODEL_SIZE_MB.get(model_size.split(".")[0].split("-")[0], MODEL_SIZE_MB["large"])
+    return base * COMPUTE_TYPE_SCALE.get(compute_type, 1.0)
+
+
+@dataclass
+class _ModelEntry:
+    """A loaded model and its bookkeeping."""
+    processor: TranscriptionProcessor
+    estimated_mb: float
+    loaded_at: float
+    last_used: float
+    uses: int = 0
+
+
+class ModelRegistry:
+    """
+    Registry of warm Whisper models.
+    
+    Models load on first request; concurrent requests for the same model share
+    one load. Beyond ``max_warm`` models or ``memory_budget_mb`` the least
+    recently used unpinned model is dropped. Callers keep their own reference
+    to the processor they are using, so eviction or a default-model swap never
+    interrupts a request already in flight.
+    """
+    
+    def __init__(self, factory: Callable[[str, str, str], TranscriptionProcessor],
+                 max_warm: int = 2, memory_budget_mb: float = 0.0):
+        """
+        Initialize the model registry.
+        
+        Args:
+            factory: Builds a loaded TranscriptionProcessor for (model_size, device, compute_type)
+            max_warm: Maximum number of models kept loaded
+            memory_budget_mb: Estimated memory budget for loaded models (0 = unlimited)
+        """
+        self.factory = factory
+        self.max_warm = max(1, max_warm)
+        self.memory_budget_mb = memory_budget_mb
+        self._models: "OrderedDict[ModelKey, _ModelEntry]" = OrderedDict()
+        self._loading: Dict[ModelKey, threading.Event] = {}
+        self._pinned: Set[ModelKey] = set()
+        self._lock = threading.Lock()
+        self._loads = 0
+        self._evictions = 0
+    
+    def get(self, model_size: str, device: str, compute_type: str) -> TranscriptionProcessor:
+        """
+        Get a loaded model, loading it (blocking) if it is not warm.
+        
+        Args:
+            model_size: Whisper model size
+            device: Device to run on
+            compute_type: Compute type for quantization
+        
+        Returns:
+            Loaded TranscriptionProcessor
+        
+        Raises:
+            RuntimeError: If the model fails to load
+        """
+        key = (model_size, device, compute_type)
+        while True:
+            with self._lock:
+                entry = self._models.get(key)
+                if entry is not None:
+                    self._models.move_to_end(key)
+                    entry.last_used = time.time()
+                    entry.uses += 1
+                    return entry.processor
+                event = self._loading.get(key)
+                is_loader = event is None
+                if is_loader:
+                    event = threading.Event()
+                    self._loading[key] = event
+            if is_loader:
+                break
+            # Another thread is loading this model; wait and look again
+            event.wait()
+        
+        try:
+            logger.info(f"Loading Whisper {model_size} ({device}, {compute_type}) into registry")
+            processor = self.factory(model_size, device, compute_type)
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+            event.set()
+        
+        if not processor.is_model_loaded():
+            raise RuntimeError(f"Failed to load Whisper {model_size} model")
+        
+        now = time.time()
+        with self._lock:
+            self._models[key] = _ModelEntry(
+                processor=processor,
+                estimated_mb=estimate_model_mb(model_size, compute_type),
+                loaded_at=now,
+                last_used=now,
+                uses=1
+            )
+            self._loads += 1
+            self._evict(keep=key)
+        return processor
+    
+    def register(self, processor: TranscriptionProcessor) -> None:
+        """Add an already loaded processor to the warm pool."""
+        key = (processor.model_size, processor.device, processor.compute_type)
+        now = time.time()
+        with self._lock:
+            self._models[key] = _ModelEntry(
+                processor=processor,
+                estimated_mb=estimate_model_mb(processor.model_size, processor.compute_type),
+                loaded_at=now,
+                last_used=now
+            )
+            self._evict(keep=key)
+    
+    def pin(self, model_size: str, device: str, compute_type: str) -> None:
+        """Protect a model (e.g. the default tier) from eviction; unpins all others."""
+        with self._lock:
+            self._pinned = {(model_size, device, compute_type)}
+            self._evict()
+    
+    def clear(self) -> None:
+        """Drop every warm model (e.g. after thread settings change); in-flight users keep theirs."""
+        with self._lock:
+            self._evictions += len(self._models)
+            self._models.clear()
+    
+    def processors(self) -> List[TranscriptionProcessor]:
+        """All warm processors."""
+        with self._lock:
+            return [entry.processor for entry in self._models.values()]
+    
+    def is_warm(self, model_size: str, device: str, compute_type: str) -> bool:
+        """Check whether a model is loaded."""
+        return (model_size, device, compute_type) in self._models
+    
+    def _evict(self, keep: Optional[ModelKey] = None) -> None:
+        """Drop least recently used models until within max_warm and the memory budget."""
+        def over_budget() -> bool:
+            if len(self._models) > self.max_warm:
+                return True
+            total_mb = sum(entry.estimated_mb for entry in self._models.values())
+            return bool(self.memory_budget_mb) and total_mb > self.memory_budget_mb
+        
+        while over_budget():
+            victim = next(
+                (key for key in self._models if key not in self._pinned and key != keep),
+                None
+            )
+            if victim is None:
+                break
+            self._models.pop(victim)
+            self._evictions += 1
+            logger.info(f"Evicted Whisper {victim[0]} ({victim[1]}, {victim[2]}) from registry")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get warm models and load/eviction counts."""
+        with self._lock:
+            models = [
+                {
+                    "model_size": key[0],
+                    "device": key[1],
+                    "compute_type": key[2],
+                    "estimated_mb": entry.estimated_mb,
+                    "uses": entry.uses,
+                    "idle_seconds": time.time() - entry.last_used,
+                    "pinned": key in self._pinned
+                }
+                for key, entry in self._models.items()
+            ]
+        return {
+            "max_warm": self.max_warm,
+            "memory_budget_mb": self.memory_budget_mb,
+            "estimated_mb": sum(model["estimated_mb"] for model in models),
+            "loading": len(self._loading),
+            "loads": self._loads,
+            "evictions": self._evictions,
+            "models": models
+        } 
\ No newline at end of file
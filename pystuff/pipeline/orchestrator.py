@@ -4,12 +4,30 @@ Main coordinator for the audio processing pipeline.
 """
 
 import asyncio
-from typing import Dict, Any, Optional, List
+from collections import deque
+from typing import Dict, Any, Optional, List, Tuple, AsyncIterator, Deque, Callable, Awaitable, Set
 import logging
 import time
 
+import numpy as np
+
 from .audio_processor import AudioProcessor
-from .transcription import TranscriptionProcessor
+from .transcription import TranscriptionProcessor, WHISPER_SAMPLE_RATE
+from .model_registry import ModelRegistry
+from .vad import VoiceActivityDetector, VadResult
+from .diarization import SpeakerDiarizer, SpeakerWindows, OnlineSpeakerClusterer, assign_speakers, assign_word_speakers
+from .emotion import EmotionDetector, ProsodyFrames
+from .scene import SceneClassifier, SceneLLMScheduler, OllamaSceneBackend
+from .backpressure import AdmissionController
+from .accumulator import ChunkAccumulator, PendingChunk
+from .inference_pool import InferencePool, InferenceQueueFull
+from .batching import BatchScheduler
+from .streaming import StreamingTranscriber, words_to_event
+from .features import IncrementalLogMel
+from .session import SessionState
+from .merge import ChunkMerger, merge_chunk_results
+from .cache import TranscriptionCache
+from .metrics import PipelineMetrics
 from .config import PipelineConfig
 
 # Import dependencies for status checking
@@ -29,30 +47,103 @@ logger = logging.getLogger(__name__)
 class PipelineOrchestrator:
     """Main orchestrator for the audio processing pipeline."""
     
-    def __init__(self, config: Optional[PipelineConfig] = None):
+    def __init__(self, config: Optional[PipelineConfig] = None, load_model: bool = True):
         """
         Initialize the pipeline orchestrator.
         
         Args:
             config: Pipeline configuration (uses default if None)
+            load_model: Load the default model now; pass False and await warm_up()
+                to load it in the background instead
         """
         self.config = config or PipelineConfig()
+        self.metrics = PipelineMetrics()
         self.audio_processor = AudioProcessor(self.config.audio.default_sample_rate)
+        self.model_registry = ModelRegistry(
+            self._load_processor,
+            max_warm=self.config.transcription.max_warm_models,
+            memory_budget_mb=self.config.transcription.model_memory_budget_mb
+        )
         self.transcription_processor = TranscriptionProcessor(
             model_size=self.config.transcription.model_size,
             device=self.config.transcription.device,
-            compute_type=self.config.transcription.compute_type
+            compute_type=self.config.transcription.compute_type,
+            cpu_threads=self.config.transcription.cpu_threads,
+            num_workers=self.config.transcription.num_workers,
+            load_model=load_model,
+            beam_size=self.config.transcription.beam_size,
+            best_of=self.config.transcription.best_of
+        )
+        self.transcription_processor.metrics = self.metrics
+        self.ready = self.transcription_processor.is_model_loaded()
+        if self.ready:
+            self.model_registry.register(self.transcription_processor)
+        self.model_registry.pin(
+            self.config.transcription.model_size,
+            self.config.transcription.device,
+            self.config.transcription.compute_type
+        )
+        self._model_swap: Optional[asyncio.Future] = None
+        self._background_tasks: Set[asyncio.Task] = set()
+        self.inference_pool = InferencePool(
+            max_workers=self.config.transcription.inference_workers,
+            max_pending=self.config.transcription.max_pending_requests,
+            default_timeout=self.config.transcription.request_timeout,
+            metrics=self.metrics
+        )
+        self.batch_scheduler = self._create_batch_scheduler()
+        self.sessions: Dict[str, SessionState] = {}
+        self.admission = AdmissionController(
+            capacity=self.config.transcription.inference_workers,
+            max_load=self.config.backpressure.max_load,
+            window_seconds=self.config.backpressure.load_window_seconds
         )
+        self.vad = self._create_vad()
+        self.diarizer = self._create_diarizer()
+        self.emotion_detector = self._create_emotion_detector()
+        self.scene_llm = self._create_scene_llm()
+        self.cache = self._create_cache()
+        self.vad_stats = {
+            "chunks_analyzed": 0,
+            "chunks_skipped": 0,
+            "seconds_skipped": 0.0,
+            "seconds_trimmed": 0.0
+        }
         
         # Set up logging
         logging.basicConfig(level=getattr(logging, self.config.log_level))
         
         logger.info("Pipeline orchestrator initialized")
     
+    async def warm_up(self) -> bool:
+        """
+        Load the default model and run a dummy decode off the event loop.
+        
+        Returns:
+            True once the pipeline is ready to serve requests
+        """
+        loop = asyncio.get_running_loop()
+        processor = self.transcription_processor
+        start = time.time()
+        warmed = await loop.run_in_executor(None, processor.warm_up)
+        if warmed and processor is self.transcription_processor:
+            self.model_registry.register(processor)
+            self.ready = True
+            logger.info(f"Pipeline ready after {time.time() - start:.2f}s warm-up")
+        elif not warmed:
+            logger.error("Pipeline warm-up failed; model is not available")
+        
+        if self.ready and self.config.transcription.two_pass:
+            try:
+                await self._draft_processor()
+            except Exception as e:
+                logger.error(f"Failed to load draft model {self.config.transcription.draft_model_size}: {e}")
+        return self.ready
+    
     async def process_audio_chunk(self, audio_b64: str, chunk_idx: int, 
                                 sample_rate: int) -> Dict[str, Any]:
         """
-        Process a single audio chunk through the pipeline.
+        Process a single base64 encoded audio chunk through the pipeline.
         
         Args:
             audio_b64: Base64 encoded audio data
@@ -64,56 +155,1080 @@ class PipelineOrchestrator:
         """
         start_time = time.time()
         
+        try:
+            with self.metrics.time("decode"):
+                audio_np, _ = self.audio_processor.decode_base64_audio(audio_b64)
+        except Exception as e:
+            return self._error_result(chunk_idx, e, start_time)
+        
+        return await self.process_audio_array(audio_np, chunk_idx, sample_rate, start_time)
+    
+    async def process_audio_array(self, audio_np: np.ndarray, chunk_idx: int, sample_rate: int,
+                                  start_time: Optional[float] = None,
+                                  session_id: Optional[str] = None,
+                                  on_refined: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+                                  window_chunks: int = 0) -> Dict[str, Any]:
+        """
+        Process a single decoded audio chunk through the pipeline.
+        
+        With two_pass enabled and an on_refined callback, the chunk is first decoded
+        by the fast draft model and that result is returned immediately ("pass":
+        "draft"); the session's model then re-decodes it with beam search in the
+        background and on_refined receives a "correction" for the same chunk_idx.
+        
+        With session.coalesce_window_seconds set, a session's chunk is held until
+        later chunks fill a decode window (or its latency deadline passes); the
+        window is decoded once and this chunk's share of it is returned.
+        
+        Args:
+            audio_np: Mono float32 audio data
+            chunk_idx: Index of the chunk
+            sample_rate: Sample rate of the audio
+            start_time: Time the chunk was received (defaults to now)
+            session_id: Session whose model tier should be used (default model if None)
+            on_refined: Coroutine receiving the refined result (enables two-pass)
+            window_chunks: Session chunks coalesced into audio_np by the accumulator (0 = a
+                single chunk); windows of several chunks decode with word timestamps and
+                bypass the batch scheduler so the result can be split back per chunk
+        
+        Returns:
+            Dictionary with processing results
+        """
+        if start_time is None:
+            start_time = time.time()
+        
+        accumulator = None if window_chunks else self._session_accumulator(session_id)
+        if accumulator is not None:
+            try:
+                audio_np = self._prepare_audio(audio_np, sample_rate)
+            except Exception as e:
+                return self._error_result(chunk_idx, e, start_time)
+            return await accumulator.submit(audio_np, chunk_idx, start_time)
+        
         try:
             # Step 1: Audio Processing
             logger.info(f"Processing chunk {chunk_idx + 1}")
             
-            # Decode base64 audio
-            audio_np, _ = self.audio_processor.decode_base64_audio(audio_b64)
+            audio_np = self._prepare_audio(audio_np, sample_rate)
+            chunk_duration = len(audio_np) / WHISPER_SAMPLE_RATE
             
-            # Normalize audio if enabled
-            if self.config.audio.normalize_audio:
-                audio_np = self.audio_processor.normalize_audio(audio_np)
+            # Drop silent chunks before they reach the model
+            voiced_np, offset, vad_result = self._apply_vad(audio_np)
+            if voiced_np is None:
+                self.metrics.increment("chunks_skipped")
+                return self._skipped_result(chunk_idx, chunk_duration, start_time)
             
-            # Convert to WAV format
-            wav_bytes = self.audio_processor.convert_to_wav(audio_np, sample_rate)
+            # Speaker diarization and prosody analysis run alongside transcription on the same buffer
+            diarization = self._start_diarization(audio_np, vad_result, self._session_speakers(session_id))
+            prosody = self._start_prosody(audio_np, vad_result)
+            voiced_np = self._normalize(voiced_np)
             
-            # Step 2: Transcription
-            transcription_result = self.transcription_processor.transcribe_chunk(
-                wav_bytes, chunk_idx, self.config.transcription.language
-            )
+            # Step 2: Transcription (off the event loop)
+            processor = await self._session_processor(session_id)
+            two_pass = self.config.transcription.two_pass and on_refined is not None
+            with self.metrics.time("transcribe"):
+                if two_pass:
+                    transcription_result = await self._transcribe_realtime(
+                        voiced_np, chunk_idx, await self._draft_processor(),
+                        beam_size=self.config.transcription.draft_beam_size, best_of=1
+                    )
+                else:
+                    transcription_result = await self._transcribe_realtime(
+                        voiced_np, chunk_idx, processor,
+                        batchable=window_chunks <= 1, word_timestamps=window_chunks > 1
+                    )
+            segments = self._offset_segments(transcription_result["segments"], offset)
+            speaker_turns = await diarization if diarization is not None else None
+            if speaker_turns is not None:
+                segments = assign_speakers(segments, speaker_turns)
+            prosody_frames = await prosody if prosody is not None else None
+            segments = self._label_emotions(segments, prosody_frames)
+            scene = self._update_scene(self._session_scene(session_id), segments, llm_key=session_id)
             
             # Step 3: Prepare final result
             processing_time = time.time() - start_time
+            self.metrics.observe("total", processing_time)
+            self.metrics.increment("chunks_processed")
             
             result = {
                 "chunk_idx": chunk_idx,
                 "transcript": transcription_result["text"],
-                "segments": transcription_result["segments"],
+                "segments": segments,
                 "language": transcription_result["language"],
                 "processing_time": processing_time,
-                "audio_duration": transcription_result["duration"],
+                "audio_duration": chunk_duration,
+                "real_time_factor": self.metrics.observe_rtf(processing_time, chunk_duration),
                 "status": "success"
             }
+            if speaker_turns is not None:
+                result["speakers"] = speaker_turns
+            if prosody_frames is not None:
+                result["emotion"] = self._dominant_emotion(segments)
+            if scene is not None:
+                result["scene"] = scene
+            if two_pass:
+                result["pass"] = "draft"
+                self._start_refinement(session_id, voiced_np, offset, result, processor, on_refined, start_time,
+                                       prosody_frames)
             
             logger.info(f"Chunk {chunk_idx + 1} processed in {processing_time:.2f}s")
             return result
             
-        except Exception as e:
-            processing_time = time.time() - start_time
-            logger.error(f"Failed to process chunk {chunk_idx + 1}: {e}")
-            
+        except InferenceQueueFull as e:
+            logger.warning(f"Chunk {chunk_idx + 1} rejected: {e}")
+            self.metrics.increment("chunks_rejected")
             return {
                 "chunk_idx": chunk_idx,
-                "transcript": f"[ERROR] {str(e)}",
-                "processing_time": processing_time,
-                "status": "error",
+                "transcript": "",
+                "processing_time": time.time() - start_time,
+                "status": "busy",
                 "error": str(e)
             }
+        except asyncio.TimeoutError:
+            logger.warning(f"Chunk {chunk_idx + 1} timed out after {self.config.transcription.request_timeout}s")
+            self.metrics.increment("chunks_timed_out")
+            return {
+                "chunk_idx": chunk_idx,
+                "transcript": "",
+                "processing_time": time.time() - start_time,
+                "status": "timeout",
+                "error": "Transcription timed out"
+            }
+        except Exception as e:
+            return self._error_result(chunk_idx, e, start_time)
+    
+    def open_session(self, session_id: str, streaming: bool = False,
+                     model_size: Optional[str] = None) -> SessionState:
+        """
+        Register a client session.
+        
+        Args:
+            session_id: Unique session identifier
+            streaming: Use incremental streaming transcription for this session
+            model_size: Model tier for this session (None = pipeline default)
+            
+        Returns:
+            The session state
+            
+        Raises:
+            ValueError: If model_size is not a known Whisper model
+        """
+        if model_size is not None and model_size not in self.transcription_processor.get_available_models():
+            raise ValueError(f"Unknown model size: {model_size}")
+        if model_size == self.config.transcription.model_size:
+            model_size = None
+        
+        session = SessionState(session_id=session_id, streaming=streaming, model_size=model_size)
+        if model_size is not None:
+            self._preload_model(model_size)
+        if streaming:
+            session.streamer = StreamingTranscriber(
+                self._session_transcribe_fn(session),
+                sample_rate=WHISPER_SAMPLE_RATE,
+                language=self.config.transcription.language,
+                max_buffer_seconds=self.config.session.streaming_max_buffer,
+                prompt_chars=self.config.session.streaming_prompt_chars,
+                features=self._new_log_mel(self.transcription_processor)
+            )
+        self.sessions[session_id] = session
+        logger.info(f"Session {session_id} opened (streaming={streaming}, model={model_size or 'default'})")
+        return session
+    
+    def close_session(self, session_id: str) -> List[Dict[str, Any]]:
+        """
+        Close a client session and flush any pending streaming output.
+        
+        Args:
+            session_id: Session identifier
+            
+        Returns:
+            Final streaming events for words that were still tentative
+        """
+        session = self.sessions.pop(session_id, None)
+        if session is None:
+            return []
+        
+        for task in session.refinements:
+            task.cancel()
+        if session.accumulator is not None:
+            session.accumulator.close()
+        if self.scene_llm is not None:
+            self.scene_llm.discard(session_id)
+        self.admission.forget(session_id)
+        
+        events = []
+        if session.stream_decode is not None and not session.stream_decode.done():
+            # A decode that outlived its timeout still owns the streamer; its words are dropped
+            logger.warning(f"Session {session_id} closed while a stream decode was still running")
+        elif session.streamer is not None:
+            event = words_to_event("final", self._label_words(session, session.streamer.finish()),
+                                   session.chunks_received - 1)
+            if event is not None:
+                events.append(event)
+        logger.info(f"Session {session_id} closed after {session.chunks_received} chunks")
+        return events
+    
+    async def process_stream_chunk(self, session_id: str, audio_np: np.ndarray, chunk_idx: int,
+                                   sample_rate: int, start_time: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Feed a chunk into a streaming session and return partial/final transcript events.
+        
+        Args:
+            session_id: Session identifier (opened with streaming=True)
+            audio_np: Mono float32 audio data
+            chunk_idx: Index of the chunk
+            sample_rate: Sample rate of the audio
+            start_time: Time the chunk was received (defaults to now)
+            
+        Returns:
+            List of events: {"type": "final" | "partial", ...}
+        """
+        if start_time is None:
+            start_time = time.time()
+        
+        session = self.sessions[session_id]
+        audio_np = self._prepare_audio(audio_np, sample_rate)
+        # The streamer is not thread-safe: a decode that timed out may still be running on the pool
+        await self._stream_idle(session)
+        chunk_duration = len(audio_np) / WHISPER_SAMPLE_RATE
+        chunk_offset = session.audio_seconds
+        session.chunks_received += 1
+        session.audio_seconds += chunk_duration
+        
+        # Silence ends the utterance: commit the tentative tail without decoding
+        voiced_np, _, vad_result = self._apply_vad(audio_np)
+        if voiced_np is None:
+            event = words_to_event("final", self._label_words(session, session.streamer.finish()), chunk_idx)
+            session.streamer.skip_audio(chunk_duration)
+            return [event] if event is not None else []
+        
+        diarization = self._start_diarization(audio_np, vad_result, self._session_speakers(session_id))
+        session.streamer.insert_audio(self._normalize(audio_np))
+        
+        try:
+            with self.metrics.time("transcribe"):
+                update = await self.inference_pool.run(self._stream_decode_fn(session))
+        except InferenceQueueFull as e:
+            # Audio stays buffered and is decoded with the next chunk
+            self._resolve(session.stream_decode)
+            logger.warning(f"Stream chunk {chunk_idx + 1} deferred: {e}")
+            return [{"type": "busy", "chunk_idx": chunk_idx, "error": str(e)}]
+        except asyncio.TimeoutError:
+            # The decode keeps running; the session's next chunk waits for it (see _stream_idle)
+            return [{"type": "timeout", "chunk_idx": chunk_idx, "error": "Transcription timed out"}]
+        except Exception as e:
+            # process() has returned (or never started), so the streamer is free again
+            self._resolve(session.stream_decode)
+            error = self._error_result(chunk_idx, e, start_time)
+            return [{"type": "error", "chunk_idx": chunk_idx, "error": error["error"]}]
+        finally:
+            if diarization is not None:
+                for turn in await diarization:
+                    session.speaker_turns.append(
+                        {**turn, "start": turn["start"] + chunk_offset, "end": turn["end"] + chunk_offset}
+                    )
+        
+        processing_time = time.time() - start_time
+        self.metrics.observe("total", processing_time)
+        self.metrics.observe_rtf(processing_time, chunk_duration)
+        self.metrics.increment("chunks_processed")
+        events = []
+        for event_type in ("final", "partial"):
+            event = words_to_event(event_type, self._label_words(session, update[event_type]), chunk_idx)
+            if event is not None:
+                event["processing_time"] = processing_time
+                if event_type == "final":
+                    scene = self._update_scene(self._session_scene(session_id), [self._event_segment(event)],
+                                               llm_key=session_id)
+                    if scene is not None:
+                        event["scene"] = scene
+                events.append(event)
+        
+        logger.info(f"Stream chunk {chunk_idx + 1} processed in {processing_time:.2f}s "
+                    f"({len(update['final'])} final, {len(update['partial'])} partial words)")
+        return events
+    
+    def _stream_decode_fn(self, session: SessionState) -> Callable[[], Dict[str, Any]]:
+        """
+        Blocking streamer update for the inference pool, tracked in session.stream_decode.
+        
+        The future resolves when process() returns on its worker thread, even if
+        the caller has already given up waiting for it.
+        """
+        loop = asyncio.get_running_loop()
+        decode = session.stream_decode = loop.create_future()
+        
+        def process() -> Dict[str, Any]:
+            try:
+                return session.streamer.process()
+            finally:
+                try:
+                    loop.call_soon_threadsafe(self._resolve, decode)
+                except RuntimeError:
+                    pass  # Event loop already closed
+        return process
+    
+    @staticmethod
+    def _resolve(future: Optional[asyncio.Future]) -> None:
+        """Mark a completion future done (once)."""
+        if future is not None and not future.done():
+            future.set_result(None)
+    
+    async def _stream_idle(self, session: SessionState) -> None:
+        """Wait until the session's previous streamer decode has finished on its worker thread."""
+        pending = session.stream_decode
+        if pending is not None and not pending.done():
+            logger.info(f"Session {session.session_id} waiting for a stream decode that outlived its timeout")
+            with self.metrics.time("stream_wait"):
+                await asyncio.shield(pending)
+    
+    def _create_batch_scheduler(self) -> Optional[BatchScheduler]:
+        """Create the cross-session batch scheduler (bound to the default model) if batching is enabled."""
+        self.batch_scheduler_processor = self.transcription_processor
+        if not self.config.transcription.enable_batching:
+            return None
+        return BatchScheduler(
+            self.transcription_processor.transcribe_batch,
+            self.inference_pool,
+            max_batch_size=self.config.transcription.batch_max_size,
+            max_wait_ms=self.config.transcription.batch_max_wait_ms
+        )
+    
+    def _replace_batch_scheduler(self) -> None:
+        """Rebuild the batch scheduler, handing it the chunks the old one had not dispatched."""
+        old = self.batch_scheduler
+        self.batch_scheduler = self._create_batch_scheduler()
+        if old is not None:
+            old.shutdown(successor=self.batch_scheduler)
+    
+    async def _transcribe_realtime(self, audio_np: np.ndarray, chunk_idx: int,
+                                   processor: TranscriptionProcessor,
+                                   beam_size: Optional[int] = None,
+                                   best_of: Optional[int] = None,
+                                   batchable: bool = True,
+                                   word_timestamps: bool = False) -> Dict[str, Any]:
+        """
+        Transcribe a real-time chunk, batched with other sessions on the default model when enabled.
+        
+        beam_size/best_of override the processor's configured decode settings (draft pass).
+        batchable=False keeps the chunk out of batches, whose results carry no timestamps.
+        """
+        language = self.config.transcription.language
+        beam_size = beam_size or processor.beam_size
+        best_of = best_of or processor.best_of
+        batched = (batchable and not word_timestamps and self.batch_scheduler is not None and processor is self.batch_scheduler_processor and
+                   beam_size == processor.beam_size)
+        
+        cache_key = self._cache_key(audio_np, processor, beam_size=beam_size, best_of=best_of, batched=batched,
+                                    word_timestamps=word_timestamps)
+        cached = self._cache_lookup(cache_key, chunk_idx)
+        if cached is not None:
+            return cached
+        
+        if batched:
+            result = await asyncio.wait_for(
+                self.batch_scheduler.submit(audio_np, chunk_idx, language),
+                self.config.transcription.request_timeout
+            )
+        else:
+            result = await self.inference_pool.run(
+                processor.transcribe_array_chunk,
+                audio_np, chunk_idx, language, word_timestamps, beam_size, best_of
+            )
+        
+        if cache_key is not None:
+            self.cache.put(cache_key, result)
+        return result
+    
+    async def _draft_processor(self) -> TranscriptionProcessor:
+        """Resolve the two-pass draft model, loading it off the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._get_model, self.config.transcription.draft_model_size)
+    
+    def _start_refinement(self, session_id: Optional[str], audio_np: np.ndarray, offset: float,
+                          draft: Dict[str, Any], processor: TranscriptionProcessor,
+                          on_refined: Callable[[Dict[str, Any]], Awaitable[None]], start_time: float,
+                          prosody: Optional[ProsodyFrames] = None) -> None:
+        """Schedule the background refinement pass of a drafted chunk."""
+        task = asyncio.create_task(
+            self._refine_chunk(audio_np, offset, draft, processor, on_refined, start_time, prosody)
+        )
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        
+        session = self.sessions.get(session_id) if session_id is not None else None
+        if session is not None:
+            session.refinements.add(task)
+            task.add_done_callback(session.refinements.discard)
+    
+    async def _refine_chunk(self, audio_np: np.ndarray, offset: float, draft: Dict[str, Any],
+                            processor: TranscriptionProcessor,
+                            on_refined: Callable[[Dict[str, Any]], Awaitable[None]], start_time: float,
+                            prosody: Optional[ProsodyFrames] = None) -> None:
+        """
+        Re-decode a drafted chunk with the accurate model and hand the correction to on_refined.
+        
+        Refinement yields to real-time work: when the inference queue is full the
+        draft is left as the final transcript.
+        """
+        chunk_idx = draft["chunk_idx"]
+        try:
+            with self.metrics.time("refine"):
+                refined = await self._transcribe_realtime(audio_np, chunk_idx, processor)
+        except (InferenceQueueFull, asyncio.TimeoutError) as e:
+            logger.info(f"Refinement of chunk {chunk_idx + 1} skipped: {e or 'timed out'}")
+            self.metrics.increment("refinements_skipped")
+            return
+        except Exception as e:
+            logger.error(f"Refinement of chunk {chunk_idx + 1} failed: {e}")
+            return
+        
+        self.metrics.increment("refinements")
+        corrected = refined["text"] != draft["transcript"]
+        if corrected:
+            self.metrics.increment("refinements_corrected")
+        correction = {
+            "type": "correction",
+            "pass": "refined",
+            "chunk_idx": chunk_idx,
+            "transcript": refined["text"],
+            "draft_transcript": draft["transcript"],
+            "corrected": corrected,
+            "segments": self._offset_segments(refined["segments"], offset),
+            "language": refined["language"],
+            "processing_time": time.time() - start_time,
+            "status": "success"
+        }
+        # Speakers and prosody do not change between passes; relabel the refined segments
+        if "speakers" in draft:
+            correction["speakers"] = draft["speakers"]
+            correction["segments"] = assign_speakers(correction["segments"], draft["speakers"])
+        if prosody is not None:
+            correction["segments"] = self._label_emotions(correction["segments"], prosody)
+            correction["emotion"] = self._dominant_emotion(correction["segments"])
+        await on_refined(correction)
+    
+    def _load_processor(self, model_size: str, device: str, compute_type: str) -> TranscriptionProcessor:
+        """Model registry factory: load a processor with the configured thread settings."""
+        processor = TranscriptionProcessor(
+            model_size=model_size,
+            device=device,
+            compute_type=compute_type,
+            cpu_threads=self.config.transcription.cpu_threads,
+            num_workers=self.config.transcription.num_workers,
+            beam_size=self.config.transcription.beam_size,
+            best_of=self.config.transcription.best_of
+        )
+        processor.metrics = self.metrics
+        return processor
+    
+    def _get_model(self, model_size: str) -> TranscriptionProcessor:
+        """Blocking registry lookup of a model tier on the configured device."""
+        return self.model_registry.get(
+            model_size,
+            self.config.transcription.device,
+            self.config.transcription.compute_type
+        )
+    
+    def _preload_model(self, model_size: str) -> None:
+        """Start loading a model tier in the background so the session's first chunk does not wait."""
+        if self.model_registry.is_warm(model_size, self.config.transcription.device,
+                                       self.config.transcription.compute_type):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        
+        def report(future: asyncio.Future) -> None:
+            if not future.cancelled() and future.exception() is not None:
+                logger.error(f"Failed to preload Whisper {model_size}: {future.exception()}")
+        
+        loop.run_in_executor(None, self._get_model, model_size).add_done_callback(report)
+    
+    async def _session_processor(self, session_id: Optional[str]) -> TranscriptionProcessor:
+        """Resolve the model a session transcribes with, loading its tier off the event loop."""
+        session = self.sessions.get(session_id) if session_id is not None else None
+        model_size = session.active_model_size if session is not None else None
+        if model_size is None:
+            return self.transcription_processor
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._get_model, model_size)
+    
+    def _new_log_mel(self, processor: TranscriptionProcessor) -> Optional[IncrementalLogMel]:
+        """Incremental log-mel extractor in the processor's feature layout (None if disabled or unsupported)."""
+        if not self.config.transcription.incremental_features or processor.precomputed_features is None:
+            return None
+        return processor.precomputed_features.new_log_mel(WHISPER_SAMPLE_RATE)
+    
+    def _slice_features(self, features: Optional[IncrementalLogMel], start_sample: int,
+                        raw_audio: np.ndarray, audio_np: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Model features of a (normalized) stretch of a file from the file's precomputed frames.
+        
+        Args:
+            features: The file's extractor (None = let the model extract features)
+            start_sample: Position of the stretch in the file
+            raw_audio: The stretch as extracted, before normalization
+            audio_np: The stretch as it will be transcribed
+        
+        Returns:
+            Features for audio_np, or None when they cannot be sliced exactly
+        """
+        if features is None or start_sample % features.hop_length or not len(raw_audio):
+            return None
+        peak = float(np.max(np.abs(raw_audio)))
+        gain = float(np.max(np.abs(audio_np))) / peak if peak > 0 else 1.0
+        with self.metrics.time("features_slice"):
+            return features.window(start_sample, len(audio_np), gain)
+    
+    def _session_transcribe_fn(self, session: SessionState) -> Callable[..., Dict[str, Any]]:
+        """
+        Blocking transcribe function for a session's streamer (runs on the inference pool).
+        
+        The model is resolved per call so a default-model hot-swap or a
+        backpressure downgrade reaches running streams.
+        """
+        def transcribe(*args: Any, **kwargs: Any) -> Dict[str, Any]:
+            model_size = session.active_model_size
+            processor = self.transcription_processor if model_size is None else self._get_model(model_size)
+            return processor.transcribe_array(*args, **kwargs)
+        return transcribe
+    
+    def set_session_downgraded(self, session_id: str, downgraded: bool) -> Optional[str]:
+        """
+        Move a session that is falling behind to the smaller backpressure model, or back.
+        
+        Sessions already on a model no larger than backpressure.downgrade_model_size
+        are left alone.
+        
+        Args:
+            session_id: Session identifier
+            downgraded: Whether the session is currently behind
+            
+        Returns:
+            The downgrade model in use, or None when the session runs its own model
+        """
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        
+        model_size = None
+        if downgraded:
+            models = self.transcription_processor.get_available_models()
+            target = self.config.backpressure.downgrade_model_size
+            current = session.model_size or self.config.transcription.model_size
+            if target in models and current in models and models.index(target) < models.index(current):
+                model_size = target
+        
+        if model_size != session.downgrade_model:
+            session.downgrade_model = model_size
+            if model_size is not None:
+                self._preload_model(model_size)
+                self.metrics.increment("session_downgrades")
+                logger.info(f"Session {session_id} behind, downgraded to Whisper {model_size}")
+            else:
+                logger.info(f"Session {session_id} caught up, back on its own model")
+        return session.downgrade_model
+    
+    def _session_accumulator(self, session_id: Optional[str]) -> Optional[ChunkAccumulator]:
+        """
+        Get the chunk accumulator of a session, creating it on first use.
+        
+        Returns None when the session's chunks are decoded one by one: coalescing
+        is off, the session streams (it already re-decodes a rolling buffer), or
+        two-pass drafts are enabled (drafts must come back immediately).
+        """
+        session = self.sessions.get(session_id) if session_id is not None else None
+        if (session is None or session.streaming or self.config.transcription.two_pass or
+                self.config.session.coalesce_window_seconds <= 0):
+            return None
+        if session.accumulator is None:
+            session.accumulator = ChunkAccumulator(
+                lambda window: self._decode_window(session_id, window),
+                WHISPER_SAMPLE_RATE,
+                window_seconds=self.config.session.coalesce_window_seconds,
+                max_latency_ms=self.config.session.coalesce_max_latency_ms
+            )
+        return session.accumulator
+    
+    async def wait_for_window(self, session_id: str) -> bool:
+        """
+        Wait until a coalescing session can take another chunk into its next window.
+        
+        Returns:
+            True when the session coalesces chunks (submit the next chunk without
+            waiting for the previous result), False when chunks are decoded one by one
+        """
+        accumulator = self._session_accumulator(session_id)
+        if accumulator is None:
+            return False
+        await accumulator.wait_for_room()
+        return True
+    
+    async def _decode_window(self, session_id: str, window: List[PendingChunk]) -> List[Dict[str, Any]]:
+        """Decode a window of a session's chunks as one buffer and split the result per chunk."""
+        dispatched_at = time.time()
+        for chunk in window:
+            self.metrics.observe("coalesce_wait", dispatched_at - chunk.start_time)
+        audio_np = np.concatenate([chunk.audio_np for chunk in window]) if len(window) > 1 else window[0].audio_np
+        if len(window) > 1:
+            self.metrics.increment("chunks_coalesced", len(window))
+            logger.info(f"Decoding chunks {window[0].chunk_idx + 1}-{window[-1].chunk_idx + 1} as one window")
+        
+        # Timed from dispatch, so processing_time and RTF describe the decode alone
+        result = await self.process_audio_array(audio_np, window[0].chunk_idx, WHISPER_SAMPLE_RATE,
+                                                dispatched_at, session_id, window_chunks=len(window))
+        return self._split_window_result(result, window)
+    
+    def _split_window_result(self, result: Dict[str, Any], window: List[PendingChunk]) -> List[Dict[str, Any]]:
+        """
+        Split the result of a coalesced window back into one result per chunk.
+        
+        Each chunk owns its stretch of the window timeline. Words (or, without word
+        timestamps, whole segments) go to the chunk containing their midpoint, with
+        timestamps made relative to that chunk. Speaker turns are clipped to each
+        chunk. Skipped, busy, timeout and error results apply to every chunk.
+        """
+        now = time.time()
+        split = []
+        offset = 0.0
+        for i, chunk in enumerate(window):
+            end = offset + chunk.duration
+            chunk_result = {**result, "chunk_idx": chunk.chunk_idx, "processing_time": now - chunk.start_time}
+            if "audio_duration" in result:
+                chunk_result["audio_duration"] = chunk.duration
+            if len(window) > 1:
+                chunk_result["window_chunks"] = [pending.chunk_idx for pending in window]
+            
+            if result["status"] == "success" and not result.get("skipped"):
+                # The first and last chunks also own anything timestamped outside the window
+                owned_start = offset if i > 0 else float("-inf")
+                owned_end = end if i < len(window) - 1 else float("inf")
+                segments = self._offset_segments(self._owned_segments(result["segments"], owned_start, owned_end),
+                                                 -offset)
+                chunk_result["segments"] = segments
+                chunk_result["transcript"] = " ".join(segment["text"] for segment in segments if segment["text"])
+                if "speakers" in result:
+                    chunk_result["speakers"] = [
+                        {**turn, "start": max(turn["start"], offset) - offset, "end": min(turn["end"], end) - offset}
+                        for turn in result["speakers"] if turn["start"] < end and turn["end"] > offset
+                    ]
+                if "emotion" in result:
+                    chunk_result["emotion"] = self._dominant_emotion(segments)
+            split.append(chunk_result)
+            offset = end
+        return split
+    
+    @staticmethod
+    def _owned_segments(segments: List[Dict[str, Any]], start: float, end: float) -> List[Dict[str, Any]]:
+        """Segments (split at word level when words are known) whose midpoint lies in [start, end)."""
+        owned = []
+        for segment in segments:
+            words = segment.get("words") or []
+            if not words:
+                if start <= (segment["start"] + segment["end"]) / 2.0 < end:
+                    owned.append(segment)
+                continue
+            
+            kept = [word for word in words if start <= (word["start"] + word["end"]) / 2.0 < end]
+            if len(kept) == len(words):
+                owned.append(segment)
+            elif kept:
+                owned.append({
+                    **segment,
+                    "start": kept[0]["start"],
+                    "end": kept[-1]["end"],
+                    "text": "".join(word["word"] for word in kept).strip(),
+                    "words": kept
+                })
+        return owned
+    
+    def _swap_default_model(self) -> None:
+        """
+        Switch the default model to the configured one without stalling requests.
+        
+        The new model is loaded on a background thread while the old one keeps
+        serving; requests already running hold their own reference and finish on it.
+        Without a running event loop the load happens synchronously.
+        """
+        transcription = self.config.transcription
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._install_default_model(self._get_model(transcription.model_size))
+            return
+        
+        if self._model_swap is not None and not self._model_swap.done():
+            self._model_swap.cancel()
+        target = (transcription.model_size, transcription.device, transcription.compute_type)
+        swap = loop.run_in_executor(None, self._get_model, transcription.model_size)
+        
+        def install(future: asyncio.Future) -> None:
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                logger.error(f"Failed to load Whisper {target[0]}, keeping "
+                             f"{self.transcription_processor.model_size}: {future.exception()}")
+                return
+            current = self.config.transcription
+            if (current.model_size, current.device, current.compute_type) == target:
+                self._install_default_model(future.result())
+        
+        swap.add_done_callback(install)
+        self._model_swap = swap
+        logger.info(f"Loading Whisper {target[0]} in the background")
+    
+    def _install_default_model(self, processor: TranscriptionProcessor) -> None:
+        """Make a loaded processor the default model and rebind the batch scheduler to it."""
+        self.transcription_processor = processor
+        self.ready = True
+        self.model_registry.pin(processor.model_size, processor.device, processor.compute_type)
+        self._replace_batch_scheduler()
+        logger.info(f"Default model switched to Whisper {processor.model_size}")
+    
+    def _create_cache(self) -> Optional[TranscriptionCache]:
+        """Create the transcription result cache if enabled."""
+        if not self.config.cache.enabled:
+            return None
+        return TranscriptionCache(
+            max_memory_bytes=int(self.config.cache.max_memory_mb * 1024 * 1024),
+            disk_path=self.config.cache.disk_path,
+            max_disk_bytes=int(self.config.cache.max_disk_mb * 1024 * 1024)
+        )
+    
+    def _cache_key(self, audio_np: np.ndarray, processor: TranscriptionProcessor,
+                   **options: Any) -> Optional[str]:
+        """Cache key for audio plus every setting that changes the transcription."""
+        if self.cache is None:
+            return None
+        return TranscriptionCache.make_key(
+            audio_np,
+            model_size=processor.model_size,
+            compute_type=processor.compute_type,
+            language=self.config.transcription.language,
+            **{"beam_size": processor.beam_size, "best_of": processor.best_of, **options}
+        )
+    
+    def _cache_lookup(self, cache_key: Optional[str], chunk_idx: int) -> Optional[Dict[str, Any]]:
+        """Return a cached transcription result re-labelled for this chunk, if any."""
+        if cache_key is None:
+            return None
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Chunk {chunk_idx + 1} served from cache")
+            cached["chunk_idx"] = chunk_idx
+        return cached
+    
+    def _prepare_audio(self, audio_np: np.ndarray, sample_rate: int) -> np.ndarray:
+        """
+        Bring decoded audio into the form the model consumes: mono, WHISPER_SAMPLE_RATE,
+        contiguous float32. Normalization happens after VAD so silence is not amplified.
+        """
+        with self.metrics.time("prepare"):
+            if audio_np.ndim > 1:
+                audio_np = audio_np.mean(axis=1)
+            
+            if sample_rate != WHISPER_SAMPLE_RATE:
+                audio_np = self.audio_processor.resample_audio(audio_np, sample_rate, WHISPER_SAMPLE_RATE)
+            
+            return np.ascontiguousarray(audio_np, dtype=np.float32)
+    
+    def _normalize(self, audio_np: np.ndarray) -> np.ndarray:
+        """Normalize audio if enabled."""
+        if self.config.audio.normalize_audio:
+            with self.metrics.time("normalize"):
+                return self.audio_processor.normalize_audio(audio_np)
+        return audio_np
+    
+    def _create_vad(self) -> Optional[VoiceActivityDetector]:
+        """Create the voice activity detector if VAD is enabled."""
+        if not self.config.audio.enable_vad:
+            return None
+        return VoiceActivityDetector(
+            sample_rate=WHISPER_SAMPLE_RATE,
+            aggressiveness=self.config.audio.vad_aggressiveness,
+            frame_ms=self.config.audio.vad_frame_ms,
+            energy_threshold_db=self.config.audio.vad_energy_threshold_db,
+            min_speech_ratio=self.config.audio.vad_min_speech_ratio,
+            padding_ms=self.config.audio.vad_padding_ms
+        )
+    
+    def _apply_vad(self, audio_np: np.ndarray) -> Tuple[Optional[np.ndarray], float, Optional[VadResult]]:
+        """
+        Gate a chunk on voice activity and trim surrounding silence.
+        
+        Args:
+            audio_np: Audio at WHISPER_SAMPLE_RATE
+            
+        Returns:
+            Tuple of (trimmed audio or None if silent, trim offset in seconds,
+            VAD analysis for later stages to reuse or None if VAD is disabled)
+        """
+        if self.vad is None:
+            return audio_np, 0.0, None
+        
+        with self.metrics.time("vad"):
+            vad_result = self.vad.analyze(audio_np)
+        self.vad_stats["chunks_analyzed"] += 1
+        if not vad_result.is_speech:
+            self.vad_stats["chunks_skipped"] += 1
+            self.vad_stats["seconds_skipped"] += len(audio_np) / WHISPER_SAMPLE_RATE
+            return None, 0.0, vad_result
+        
+        trimmed = self.vad.trim(audio_np, vad_result)
+        self.vad_stats["seconds_trimmed"] += (len(audio_np) - len(trimmed)) / WHISPER_SAMPLE_RATE
+        return trimmed, vad_result.start / WHISPER_SAMPLE_RATE, vad_result
+    
+    def _create_diarizer(self) -> Optional[SpeakerDiarizer]:
+        """Create the speaker diarizer if diarization is enabled."""
+        if not self.config.enable_speaker_diarization:
+            return None
+        return SpeakerDiarizer(
+            sample_rate=WHISPER_SAMPLE_RATE,
+            backend=self.config.diarization.backend,
+            similarity_threshold=self.config.diarization.similarity_threshold,
+            max_speakers=self.config.diarization.max_speakers,
+            min_segment_seconds=self.config.diarization.min_segment_seconds,
+            window_seconds=self.config.diarization.window_seconds,
+            frame_ms=self.config.audio.vad_frame_ms,
+            energy_threshold_db=self.config.audio.vad_energy_threshold_db
+        )
+    
+    def _session_speakers(self, session_id: Optional[str]) -> Optional[OnlineSpeakerClusterer]:
+        """Speaker clusterer of a session (a throwaway one for session-less chunks)."""
+        if self.diarizer is None:
+            return None
+        session = self.sessions.get(session_id) if session_id is not None else None
+        if session is None:
+            return self.diarizer.new_clusterer()
+        if session.speakers is None:
+            session.speakers = self.diarizer.new_clusterer()
+        return session.speakers
+    
+    def _start_diarization(self, audio_np: np.ndarray, vad_result: Optional[VadResult],
+                           speakers: Optional[OnlineSpeakerClusterer]) -> Optional[asyncio.Future]:
+        """
+        Start diarizing a chunk on the default executor so it overlaps transcription.
+        
+        Returns:
+            Future resolving to the chunk's speaker turns (empty on failure), or None if disabled
+        """
+        if self.diarizer is None or speakers is None:
+            return None
+        diarizer = self.diarizer
+        
+        def diarize() -> List[Dict[str, Any]]:
+            try:
+                with self.metrics.time("diarize"):
+                    return diarizer.diarize(audio_np, speakers, vad_result)
+            except Exception as e:
+                logger.error(f"Speaker diarization failed: {e}")
+                return []
+        
+        return asyncio.get_running_loop().run_in_executor(None, diarize)
+    
+    def _start_speaker_embedding(self, audio_np: np.ndarray,
+                                 vad_result: Optional[VadResult]) -> Optional[asyncio.Future]:
+        """
+        Start embedding a file chunk's voiced windows on the default executor.
+        
+        Returns:
+            Future resolving to SpeakerWindows (None on failure), or None if diarization is disabled
+        """
+        if self.diarizer is None:
+            return None
+        diarizer = self.diarizer
+        
+        def embed() -> Optional[SpeakerWindows]:
+            try:
+                with self.metrics.time("diarize"):
+                    return diarizer.embed_windows(audio_np, vad_result)
+            except Exception as e:
+                logger.error(f"Speaker diarization failed: {e}")
+                return None
+        
+        return asyncio.get_running_loop().run_in_executor(None, embed)
+    
+    def _create_emotion_detector(self) -> Optional[EmotionDetector]:
+        """Create the emotion detector if emotion detection is enabled."""
+        if not self.config.enable_emotion_detection:
+            return None
+        return EmotionDetector(
+            sample_rate=WHISPER_SAMPLE_RATE,
+            model_path=self.config.emotion.model_path,
+            pitch_floor_hz=self.config.emotion.pitch_floor_hz,
+            pitch_ceiling_hz=self.config.emotion.pitch_ceiling_hz,
+            voicing_threshold=self.config.emotion.voicing_threshold,
+            frame_ms=self.config.audio.vad_frame_ms,
+            energy_threshold_db=self.config.audio.vad_energy_threshold_db
+        )
+    
+    def _start_prosody(self, audio_np: np.ndarray,
+                       vad_result: Optional[VadResult]) -> Optional[asyncio.Future]:
+        """
+        Start frame-level prosody analysis on the default executor so it overlaps transcription.
+        
+        Returns:
+            Future resolving to ProsodyFrames (None on failure), or None if emotion detection is disabled
+        """
+        if self.emotion_detector is None:
+            return None
+        detector = self.emotion_detector
+        
+        def analyze() -> Optional[ProsodyFrames]:
+            try:
+                with self.metrics.time("prosody"):
+                    return detector.analyze(audio_np, vad_result)
+            except Exception as e:
+                logger.error(f"Prosody analysis failed: {e}")
+                return None
+        
+        return asyncio.get_running_loop().run_in_executor(None, analyze)
+    
+    def _label_emotions(self, segments: List[Dict[str, Any]],
+                        prosody: Optional[ProsodyFrames]) -> List[Dict[str, Any]]:
+        """Classify the emotion of every segment from the chunk's prosody (one batch per chunk)."""
+        if prosody is None or self.emotion_detector is None:
+            return segments
+        with self.metrics.time("emotion"):
+            return self.emotion_detector.label_segments(prosody, segments)
+    
+    @staticmethod
+    def _dominant_emotion(segments: List[Dict[str, Any]]) -> Optional[str]:
+        """Emotion covering the most segment time in a chunk."""
+        durations: Dict[str, float] = {}
+        for segment in segments:
+            if "emotion" in segment:
+                durations[segment["emotion"]] = (durations.get(segment["emotion"], 0.0) +
+                                                 segment["end"] - segment["start"])
+        return max(durations, key=durations.get) if durations else None
+    
+    def _create_scene_llm(self) -> Optional[SceneLLMScheduler]:
+        """Create the background LLM scene labeller if scene classification uses the ollama backend."""
+        if not self.config.enable_scene_classification or self.config.scene.backend != "ollama":
+            return None
+        try:
+            backend = OllamaSceneBackend(self.config.scene.ollama_host, self.config.scene.ollama_model)
+        except RuntimeError as e:
+            logger.warning(f"Scene LLM backend unavailable, using rule-based beats: {e}")
+            return None
+        return SceneLLMScheduler(
+            backend,
+            max_batch=self.config.scene.llm_batch_size,
+            min_interval=self.config.scene.llm_min_interval,
+            timeout=self.config.scene.llm_timeout
+        )
+    
+    def _new_scene(self) -> Optional[SceneClassifier]:
+        """Create a scene-beat window if scene classification is enabled."""
+        if not self.config.enable_scene_classification:
+            return None
+        return SceneClassifier(self.config.scene.window_seconds, self.config.scene.window_segments)
+    
+    def _session_scene(self, session_id: Optional[str]) -> Optional[SceneClassifier]:
+        """Scene window of a session (a throwaway one for session-less chunks)."""
+        if not self.config.enable_scene_classification:
+            return None
+        session = self.sessions.get(session_id) if session_id is not None else None
+        if session is None:
+            return self._new_scene()
+        if session.scene is None:
+            session.scene = self._new_scene()
+        return session.scene
+    
+    def _update_scene(self, scene: Optional[SceneClassifier], segments: List[Dict[str, Any]],
+                      llm_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Advance a scene window by a chunk's segments.
+        
+        Args:
+            scene: Scene window (None when scene classification is disabled)
+            segments: New segments in order, with speakers/emotions when available
+            llm_key: Session to queue for background LLM relabelling (None = rules only)
+        
+        Returns:
+            Scene state after the last segment, or None if there was nothing to classify
+        """
+        if scene is None or not segments:
+            return None
+        with self.metrics.time("scene"):
+            for segment in segments:
+                state = scene.update(segment)
+        if self.scene_llm is not None and llm_key is not None:
+            self.scene_llm.submit(llm_key, scene)
+        return state
+    
+    @staticmethod
+    def _event_segment(event: Dict[str, Any]) -> Dict[str, Any]:
+        """Segment view of a streaming "final" event for the scene window."""
+        speakers = [word["speaker"] for word in event["words"] if "speaker" in word]
+        return {
+            "start": event["start"],
+            "end": event["end"],
+            "text": event["text"],
+            "speaker": max(set(speakers), key=speakers.count) if speakers else None
+        }
+    
+    @staticmethod
+    def _label_words(session: SessionState, words: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Attach speakers from the session's recent turns to streaming words."""
+        if not session.speaker_turns:
+            return words
+        return assign_word_speakers(words, list(session.speaker_turns))
+    
+    @staticmethod
+    def _offset_segments(segments: List[Dict[str, Any]], offset: float) -> List[Dict[str, Any]]:
+        """Shift segment and word timestamps by offset seconds."""
+        if not offset:
+            return segments
+        return [
+            {
+                **segment,
+                "start": segment["start"] + offset,
+                "end": segment["end"] + offset,
+                "words": [
+                    {**word, "start": word["start"] + offset, "end": word["end"] + offset}
+                    for word in segment.get("words") or []
+                ]
+            }
+            for segment in segments
+        ]
+    
+    def _skipped_result(self, chunk_idx: int, duration: float, start_time: float) -> Dict[str, Any]:
+        """Build the immediate empty result for a chunk without speech."""
+        logger.info(f"Chunk {chunk_idx + 1} skipped: no speech detected")
+        return {
+            "chunk_idx": chunk_idx,
+            "transcript": "",
+            "segments": [],
+            "language": None,
+            "processing_time": time.time() - start_time,
+            "audio_duration": duration,
+            "skipped": True,
+            "status": "success"
+        }
+    
+    def _error_result(self, chunk_idx: int, error: Exception, start_time: float) -> Dict[str, Any]:
+        """Build the result dictionary for a chunk that failed to process."""
+        processing_time = time.time() - start_time
+        logger.error(f"Failed to process chunk {chunk_idx + 1}: {error}")
+        
+        return {
+            "chunk_idx": chunk_idx,
+            "transcript": f"[ERROR] {str(error)}",
+            "processing_time": processing_time,
+            "status": "error",
+            "error": str(error)
+        }
     
     async def process_audio_file(self, audio_b64: str, sample_rate: int) -> List[Dict[str, Any]]:
         """
-        Process a complete audio file by chunking and processing each chunk.
+        Process a complete audio file by chunking and processing the chunks in parallel.
+        
+        Chunks are cut at silence boundaries (or as overlapping windows when
+        split_on_silence is off) and transcribed concurrently on the inference pool,
+        up to file_parallelism at a time. Results keep chunk order.
         
         Args:
             audio_b64: Base64 encoded audio data
@@ -125,50 +1240,253 @@ class PipelineOrchestrator:
         try:
             # Decode and chunk the audio
             audio_np, _ = self.audio_processor.decode_base64_audio(audio_b64)
+            audio_np = self._prepare_audio(audio_np, sample_rate)
+            
+            if self.config.audio.split_on_silence:
+                chunks = self.audio_processor.chunk_audio_on_silence(
+                    audio_np,
+                    WHISPER_SAMPLE_RATE,
+                    self.config.audio.chunk_duration,
+                    self.config.audio.silence_search_duration
+                )
+                overlapping = False
+            else:
+                chunks = self.audio_processor.chunk_audio(
+                    audio_np, 
+                    WHISPER_SAMPLE_RATE,
+                    self.config.audio.chunk_duration,
+                    self.config.audio.overlap_duration
+                )
+                overlapping = self.config.audio.overlap_duration > 0
             
-            if self.config.audio.normalize_audio:
-                audio_np = self.audio_processor.normalize_audio(audio_np)
+            parallelism = self.config.transcription.file_parallelism or self.inference_pool.max_workers
+            logger.info(f"Processing {len(chunks)} chunks, {parallelism} at a time")
             
-            chunks = self.audio_processor.chunk_audio(
-                audio_np, 
-                sample_rate,
-                self.config.audio.chunk_duration,
-                self.config.audio.overlap_duration
-            )
+            # Overlapping chunks share audio, so its log-mel frames are computed once for the file
+            features = self._new_log_mel(self.transcription_processor) if overlapping else None
+            if features is not None:
+                await asyncio.get_running_loop().run_in_executor(None, features.append, audio_np)
             
-            logger.info(f"Processing {len(chunks)} chunks")
+            limiter = asyncio.Semaphore(parallelism)
+            outcomes = await asyncio.gather(*[
+                self._process_file_chunk(chunk_audio, chunk_idx, start_time, overlapping, limiter, features)
+                for chunk_idx, (chunk_audio, start_time) in enumerate(chunks)
+            ])
             
-            # Process each chunk
+            # Speaker clustering and scene beats depend on order, so they follow the parallel chunk work
+            speakers = self._session_speakers(None)
+            scene = self._new_scene()
             results = []
-            for chunk_idx, (chunk_audio, start_time) in enumerate(chunks):
-                # Convert chunk to WAV
-                wav_bytes = self.audio_processor.convert_to_wav(chunk_audio, sample_rate)
-                
-                # Transcribe chunk
-                transcription_result = self.transcription_processor.transcribe_chunk(
-                    wav_bytes, chunk_idx, self.config.transcription.language
-                )
-                
-                result = {
-                    "chunk_idx": chunk_idx,
-                    "transcript": transcription_result["text"],
-                    "segments": transcription_result["segments"],
-                    "start_time": start_time,
-                    "duration": transcription_result["duration"],
-                    "status": "success"
-                }
-                
+            for result, speaker_windows in outcomes:
+                self._attach_speakers(speakers, result, speaker_windows)
+                self._attach_scene(scene, result)
                 results.append(result)
-            
             return results
             
         except Exception as e:
             logger.error(f"Failed to process audio file: {e}")
             raise
     
+    def _attach_speakers(self, speakers: Optional[OnlineSpeakerClusterer], result: Dict[str, Any],
+                         speaker_windows: Optional[SpeakerWindows]) -> None:
+        """Label a file chunk's speakers with the file's clusterer (in chunk order, so labels are stable)."""
+        if speakers is None or result.get("skipped"):
+            return
+        turns = []
+        if speaker_windows is not None:
+            try:
+                turns = self.diarizer.label_windows(speaker_windows, speakers)
+            except Exception as e:
+                logger.error(f"Speaker diarization failed: {e}")
+        result["speakers"] = turns
+        result["segments"] = assign_speakers(result["segments"], turns)
+    
+    def _attach_scene(self, scene: Optional[SceneClassifier], result: Dict[str, Any]) -> None:
+        """Advance a file's scene window by one chunk result (in chunk order)."""
+        state = self._update_scene(scene, result.get("segments") or [])
+        if state is not None:
+            result["scene"] = state
+    
+    async def _process_file_chunk(self, chunk_audio: np.ndarray, chunk_idx: int, start_time: float,
+                                  word_timestamps: bool, limiter: asyncio.Semaphore,
+                                  features: Optional[IncrementalLogMel] = None
+                                  ) -> Tuple[Dict[str, Any], Optional[SpeakerWindows]]:
+        """
+        Transcribe one chunk of a file (VAD, normalize, model) under the file's concurrency limit.
+        
+        All of the chunk's work, including VAD and the diarization and prosody
+        jobs, waits for the limiter. Speakers are only embedded here: the caller
+        labels them with _attach_speakers() in chunk order. features holds the
+        file's precomputed log-mel frames, if any.
+        
+        Returns:
+            Tuple of (chunk result, speaker embeddings or None)
+        """
+        async with limiter:
+            duration = len(chunk_audio) / WHISPER_SAMPLE_RATE
+            voiced_audio, offset, vad_result = self._apply_vad(chunk_audio)
+            if voiced_audio is None:
+                return {
+                    "chunk_idx": chunk_idx,
+                    "transcript": "",
+                    "segments": [],
+                    "start_time": start_time,
+                    "duration": duration,
+                    "skipped": True,
+                    "status": "success"
+                }, None
+            
+            embedding = self._start_speaker_embedding(chunk_audio, vad_result)
+            prosody = self._start_prosody(chunk_audio, vad_result)
+            raw_voiced = voiced_audio
+            voiced_audio = self._normalize(voiced_audio)
+            processor = self.transcription_processor
+            cache_key = self._cache_key(voiced_audio, processor, word_timestamps=word_timestamps)
+            transcription_result = self._cache_lookup(cache_key, chunk_idx)
+            
+            # Transcribe chunk (word timings let overlaps be merged precisely)
+            if transcription_result is None:
+                start_sample = int(round((start_time + offset) * WHISPER_SAMPLE_RATE))
+                chunk_features = self._slice_features(features, start_sample, raw_voiced, voiced_audio)
+                with self.metrics.time("transcribe"):
+                    transcription_result = await self.inference_pool.run(
+                        processor.transcribe_array_chunk,
+                        voiced_audio, chunk_idx, self.config.transcription.language,
+                        word_timestamps, None, None, chunk_features,
+                        wait_for_slot=True
+                    )
+                if cache_key is not None:
+                    self.cache.put(cache_key, transcription_result)
+            
+            result = {
+                "chunk_idx": chunk_idx,
+                "transcript": transcription_result["text"],
+                "segments": self._offset_segments(transcription_result["segments"], offset),
+                "start_time": start_time,
+                "duration": duration,
+                "status": "success"
+            }
+            if prosody is not None:
+                result["segments"] = self._label_emotions(result["segments"], await prosody)
+                result["emotion"] = self._dominant_emotion(result["segments"])
+            speaker_windows = await embedding if embedding is not None else None
+            return result, speaker_windows
+    
+    async def stream_audio_file(self, filepath: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Transcribe an audio file from disk, reading and yielding chunks lazily.
+        
+        At most file_parallelism chunks are transcribing and at most twice that
+        many are held in memory, so peak memory does not grow with file length.
+        Overlapping chunks share their log-mel frames, and their transcripts are
+        de-duplicated as in transcribe_file(): a chunk is yielded, in chunk order,
+        once the next chunk has fixed the end of the time range it owns.
+        
+        Args:
+            filepath: Path to any file soundfile or ffmpeg can decode
+            
+        Yields:
+            Processing result for each chunk, whose "segments" (absolute timestamps)
+            and "transcript" hold only the words the chunk owns
+        """
+        loop = asyncio.get_running_loop()
+        parallelism = self.config.transcription.file_parallelism or self.inference_pool.max_workers
+        limiter = asyncio.Semaphore(parallelism)
+        overlapping = self.config.audio.overlap_duration > 0
+        speakers = self._session_speakers(None)
+        scene = self._new_scene()
+        merger = ChunkMerger()
+        features = self._new_log_mel(self.transcription_processor) if overlapping else None
+        
+        chunks = self.audio_processor.iter_file_chunks(
+            filepath,
+            self.config.audio.chunk_duration,
+            self.config.audio.overlap_duration,
+            WHISPER_SAMPLE_RATE
+        )
+        
+        in_flight: Deque[Tuple[int, asyncio.Task]] = deque()  # (start sample, task) in chunk order
+        previous: Optional[Dict[str, Any]] = None
+        
+        async def settle_oldest() -> Optional[Dict[str, Any]]:
+            """Finish the oldest chunk and return the merged result of the chunk before it."""
+            nonlocal previous
+            _, task = in_flight.popleft()
+            result, speaker_windows = await task
+            self._attach_speakers(speakers, result, speaker_windows)
+            segments = merger.add(result)
+            ready, previous = previous, result
+            if features is not None and in_flight:
+                features.trim(in_flight[0][0])
+            return self._merged_file_result(scene, ready, segments) if ready is not None else None
+        
+        try:
+            chunk_idx = 0
+            while True:
+                # File reads and decoding are blocking; keep them off the event loop
+                item = await loop.run_in_executor(None, next, chunks, None)
+                if item is None:
+                    break
+                chunk_audio, start_time = item
+                start_sample = int(round(start_time * WHISPER_SAMPLE_RATE))
+                if features is not None:
+                    # Only the audio past the overlap is new; appended on the loop, where chunks slice it
+                    features.append(chunk_audio[features.total_samples - start_sample:])
+                in_flight.append((start_sample, asyncio.create_task(
+                    self._process_file_chunk(chunk_audio, chunk_idx, start_time, overlapping, limiter, features)
+                )))
+                chunk_idx += 1
+                
+                if len(in_flight) >= 2 * parallelism:
+                    output = await settle_oldest()
+                    if output is not None:
+                        yield output
+            
+            while in_flight:
+                output = await settle_oldest()
+                if output is not None:
+                    yield output
+            if previous is not None:
+                yield self._merged_file_result(scene, previous, merger.finish())
+        finally:
+            for _, task in in_flight:
+                task.cancel()
+            chunks.close()
+    
+    def _merged_file_result(self, scene: Optional[SceneClassifier], result: Dict[str, Any],
+                            segments: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """A streamed file chunk's result carrying its de-duplicated segments (see ChunkMerger)."""
+        merged = {
+            **result,
+            "segments": segments,
+            "transcript": " ".join(segment["text"] for segment in segments if segment["text"])
+        }
+        self._attach_scene(scene, merged)
+        return merged
+    
+    async def transcribe_file(self, audio_b64: str, sample_rate: int) -> Dict[str, Any]:
+        """
+        Transcribe a complete audio file into one continuous timeline.
+        
+        Overlapping chunk regions are de-duplicated (see merge_chunk_results), so
+        each word appears once with an absolute timestamp.
+        
+        Args:
+            audio_b64: Base64 encoded audio data
+            sample_rate: Sample rate of the audio
+            
+        Returns:
+            Dictionary with "text", absolute "segments", "duration" and per-chunk "chunks"
+        """
+        results = await self.process_audio_file(audio_b64, sample_rate)
+        merged = merge_chunk_results(results)
+        merged["chunks"] = results
+        return merged
+    
     def get_pipeline_status(self) -> Dict[str, Any]:
         """Get the current status of all pipeline components."""
         return {
+            "ready": self.ready,
             "audio_processor": {
                 "available": True,
                 "dependencies": {
@@ -182,15 +1500,68 @@ class PipelineOrchestrator:
                 "device": self.transcription_processor.device,
                 "compute_type": self.transcription_processor.compute_type
             },
+            "models": self.model_registry.get_stats(),
+            "vad": {
+                "enabled": self.vad is not None,
+                "backend": self.vad.backend if self.vad is not None else None,
+                **self.vad_stats
+            },
+            "diarization": {
+                "enabled": self.diarizer is not None,
+                "backend": self.diarizer.backend if self.diarizer is not None else None
+            },
+            "scene": {
+                "enabled": self.config.enable_scene_classification,
+                "backend": ("ollama" if self.scene_llm is not None else "rules")
+                           if self.config.enable_scene_classification else None,
+                "llm": self.scene_llm.get_stats() if self.scene_llm is not None else None
+            },
+            "emotion": {
+                "enabled": self.emotion_detector is not None,
+                "labels": self.emotion_detector.classifier.labels if self.emotion_detector is not None else None
+            },
+            "cache": self.cache.get_stats() if self.cache is not None else None,
+            "latency": self.metrics.get_stats(),
+            "inference_pool": self.inference_pool.get_stats(),
+            "sessions": {
+                "active": len(self.sessions),
+                "streaming": sum(1 for session in self.sessions.values() if session.streaming),
+                "downgraded": sum(1 for session in self.sessions.values() if session.downgrade_model is not None),
+                "coalescing": sum(1 for session in self.sessions.values() if session.accumulator is not None)
+            },
+            "admission": self.admission.get_stats(),
+            "batching": self.batch_scheduler.get_stats() if self.batch_scheduler is not None else None,
             "configuration": {
                 "chunk_duration": self.config.audio.chunk_duration,
                 "overlap_duration": self.config.audio.overlap_duration,
+                "coalesce_window_seconds": self.config.session.coalesce_window_seconds,
+                "incremental_features": self.config.transcription.incremental_features
+                                        and self.transcription_processor.precomputed_features is not None,
                 "enable_speaker_diarization": self.config.enable_speaker_diarization,
                 "enable_emotion_detection": self.config.enable_emotion_detection,
                 "enable_scene_classification": self.config.enable_scene_classification
             }
         }
     
+    def render_metrics(self) -> str:
+        """Render latency histograms and current load in Prometheus text format."""
+        models = self.model_registry.get_stats()
+        gauges = {
+            "ready": float(self.ready),
+            "inference_queue_depth": self.inference_pool.pending,
+            "inference_queue_capacity": self.inference_pool.max_pending,
+            "active_sessions": len(self.sessions),
+            "streaming_sessions": sum(1 for session in self.sessions.values() if session.streaming),
+            "admission_load": self.admission.load(),
+            "warm_models": len(models["models"]),
+            "model_memory_estimated_bytes": models["estimated_mb"] * 1024 * 1024
+        }
+        if self.cache is not None:
+            cache_stats = self.cache.get_stats()
+            gauges["cache_hit_rate"] = cache_stats["hit_rate"]
+            gauges["cache_memory_bytes"] = cache_stats["memory_bytes"]
+        return self.metrics.render_prometheus(gauges)
+    
     def update_config(self, new_config: PipelineConfig) -> bool:
         """
         Update pipeline configuration.
@@ -202,25 +1573,106 @@ class PipelineOrchestrator:
             True if update successful, False otherwise
         """
         try:
+            cache_changed = new_config.cache != self.config.cache
+            diarization_changed = (
+                new_config.enable_speaker_diarization != self.config.enable_speaker_diarization or
+                new_config.diarization != self.config.diarization
+            )
+            emotion_changed = (
+                new_config.enable_emotion_detection != self.config.enable_emotion_detection or
+                new_config.emotion != self.config.emotion
+            )
+            scene_changed = (
+                new_config.enable_scene_classification != self.config.enable_scene_classification or
+                new_config.scene != self.config.scene
+            )
             self.config = new_config
             
             # Update audio processor
             self.audio_processor.default_sample_rate = new_config.audio.default_sample_rate
+            self.vad = self._create_vad()
+            if diarization_changed:
+                # Open sessions keep their speakers; new settings apply to new sessions
+                self.diarizer = self._create_diarizer()
+            if emotion_changed:
+                self.emotion_detector = self._create_emotion_detector()
+            if scene_changed:
+                # Open sessions keep their windows; new settings apply to new sessions
+                if self.scene_llm is not None:
+                    self.scene_llm.shutdown()
+                self.scene_llm = self._create_scene_llm()
+            if cache_changed:
+                if self.cache is not None:
+                    self.cache.close()
+                self.cache = self._create_cache()
+            
+            # Decode settings apply to every warm model immediately
+            for processor in self.model_registry.processors() + [self.transcription_processor]:
+                processor.beam_size = new_config.transcription.beam_size
+                processor.best_of = new_config.transcription.best_of
+            
+            self.model_registry.max_warm = max(1, new_config.transcription.max_warm_models)
+            self.model_registry.memory_budget_mb = new_config.transcription.model_memory_budget_mb
             
-            # Update transcription processor if needed
-            if (new_config.transcription.model_size != self.transcription_processor.model_size or
+            # Swap the default model if needed (loaded in the background, see _swap_default_model)
+            threads_changed = (
+                new_config.transcription.cpu_threads != self.transcription_processor.cpu_threads or
+                new_config.transcription.num_workers != self.transcription_processor.num_workers
+            )
+            if threads_changed:
+                self.model_registry.clear()
+            if (threads_changed or
+                new_config.transcription.model_size != self.transcription_processor.model_size or
                 new_config.transcription.device != self.transcription_processor.device or
                 new_config.transcription.compute_type != self.transcription_processor.compute_type):
                 
-                self.transcription_processor.reload_model(
-                    new_config.transcription.model_size,
-                    new_config.transcription.device,
-                    new_config.transcription.compute_type
+                self._swap_default_model()
+            
+            # Resize the inference pool; in-flight requests finish on the old one
+            if (new_config.transcription.inference_workers != self.inference_pool.max_workers or
+                new_config.transcription.max_pending_requests != self.inference_pool.max_pending):
+                old_pool = self.inference_pool
+                self.inference_pool = InferencePool(
+                    max_workers=new_config.transcription.inference_workers,
+                    max_pending=new_config.transcription.max_pending_requests,
+                    default_timeout=new_config.transcription.request_timeout,
+                    metrics=self.metrics
                 )
+                old_pool.shutdown()
+            self.inference_pool.default_timeout = new_config.transcription.request_timeout
+            self.admission.capacity = max(new_config.transcription.inference_workers, 1e-6)
+            self.admission.max_load = new_config.backpressure.max_load
+            self.admission.window_seconds = new_config.backpressure.load_window_seconds
+            for session in self.sessions.values():
+                if session.accumulator is not None:
+                    session.accumulator.window_seconds = new_config.session.coalesce_window_seconds
+                    session.accumulator.max_latency = new_config.session.coalesce_max_latency_ms / 1000.0
+            
+            # Rebuild the batch scheduler only if its pool or settings changed
+            scheduler = self.batch_scheduler
+            if (new_config.transcription.enable_batching != (scheduler is not None) or
+                (scheduler is not None and (
+                    scheduler.inference_pool is not self.inference_pool or
+                    scheduler.max_batch_size != max(1, new_config.transcription.batch_max_size) or
+                    scheduler.max_wait != new_config.transcription.batch_max_wait_ms / 1000.0))):
+                self._replace_batch_scheduler()
             
             logger.info("Pipeline configuration updated successfully")
             return True
             
         except Exception as e:
             logger.error(f"Failed to update configuration: {e}")
-            return False 
\ No newline at end of file
+            return False
+    
+    def shutdown(self) -> None:
+        """Release pipeline resources (worker threads)."""
+        for task in list(self._background_tasks):
+            task.cancel()
+        if self.scene_llm is not None:
+            self.scene_llm.shutdown()
+        if self.batch_scheduler is not None:
+            self.batch_scheduler.shutdown()
+        if self.cache is not None:
+            self.cache.close()
+        self.inference_pool.shutdown()
+        logger.info("Pipeline orchestrator shut down")
\ No newline at end of file
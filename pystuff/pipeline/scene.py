@@ -0,0 +1,408 @@
+"""
+Scene Classification Module
+Maps the running stream of (speaker, emotion, text) segments to narrative scene beats.
+"""
+
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+import json
+import logging
+import re
+import time
+
+# Optional local LLM backend
+try:
+    from ollama import AsyncClient as OllamaClient
+except ImportError:
+    logging.warning("ollama not installed - scene beats use the rule-based classifier only.")
+    OllamaClient = None
+
+logger = logging.getLogger(__name__)
+
+BEATS = ("calm", "tension", "conflict", "resolution")
+
+# Text cues counted once per segment (cost depends on the segment, not the window)
+CONFLICT_WORDS = frozenset((
+    "no", "never", "stop", "hate", "liar", "lie", "lied", "shut", "wrong", "can't", "won't",
+    "dare", "enough", "fault", "blame", "seriously", "unbelievable"
+))
+CONCILIATORY_WORDS = frozenset((
+    "sorry", "okay", "thanks", "thank", "understand", "agree", "forgive",
+    "let's", "together", "calm", "apologize"
+))
+HOSTILE_EMOTIONS = ("angry",)
+NEGATIVE_EMOTIONS = ("angry", "sad")
+
+# Intensity thresholds of the rule-based beats
+CONFLICT_INTENSITY = 0.5
+TENSION_INTENSITY = 0.25
+RESOLVED_INTENSITY = 0.15
+TREND_EPSILON = 0.05  # Intensity change per update reported as rising/falling
+RESOLUTION_HOLD = 3  # Calm segments a resolution beat persists before returning to calm
+CALM_TURNS_PER_MINUTE = 12.0  # Speaker changes per minute of ordinary conversation (not counted as intensity)
+RECENT_SEGMENTS = 3  # Segments in the short window that lets a scene turn quickly
+RECENT_WEIGHT = 0.6  # Share of the recent window in the blended intensity
+
+
+class _WindowStats:
+    """Running sums over a sliding window of segment entries (O(1) amortized per entry)."""
+    
+    def __init__(self, max_seconds: float, max_segments: int):
+        """
+        Initialize the window.
+        
+        Args:
+            max_seconds: Speech duration covered by the window
+            max_segments: Maximum entries in the window
+        """
+        self.max_seconds = max_seconds
+        self.max_segments = max(1, max_segments)
+        self.entries: Deque[Dict[str, Any]] = deque()
+        self.duration = 0.0
+        self.emotion_seconds: Dict[str, float] = {}
+        self.speaker_changes = 0
+        self.exclamations = 0
+        self.conflict_cues = 0
+        self.conciliatory_cues = 0
+    
+    def push(self, entry: Dict[str, Any]) -> None:
+        """Append an entry and evict from the front until the window fits."""
+        if self.entries and _is_speaker_change(self.entries[-1], entry):
+            self.speaker_changes += 1
+        self.entries.append(entry)
+        self._add(entry, 1)
+        
+        # Every entry is evicted at most once
+        while len(self.entries) > 1 and (len(self.entries) > self.max_segments or
+                                         self.duration > self.max_seconds):
+            oldest = self.entries.popleft()
+            self._add(oldest, -1)
+            if _is_speaker_change(oldest, self.entries[0]):
+                self.speaker_changes -= 1
+    
+    def _add(self, entry: Dict[str, Any], sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) an entry from the running sums."""
+        self.duration += sign * entry["duration"]
+        if entry["emotion"] is not None:
+            self.emotion_seconds[entry["emotion"]] = (self.emotion_seconds.get(entry["emotion"], 0.0) +
+                                                      sign * entry["duration"])
+        self.exclamations += sign * entry["exclamation"]
+        self.conflict_cues += sign * entry["conflict"]
+        self.conciliatory_cues += sign * entry["conciliatory"]
+    
+    def intensity(self) -> float:
+        """Conflict intensity in [0, 1] from emotions, turn-taking and text cues."""
+        if not self.entries:
+            return 0.0
+        segments = len(self.entries)
+        duration = max(self.duration, 1e-6)
+        hostile = sum(self.emotion_seconds.get(emotion, 0.0) for emotion in HOSTILE_EMOTIONS) / duration
+        negative = sum(self.emotion_seconds.get(emotion, 0.0) for emotion in NEGATIVE_EMOTIONS) / duration
+        turns_per_minute = 60.0 * self.speaker_changes / duration
+        return min(1.0, (
+            0.5 * hostile +
+            0.25 * negative +
+            0.15 * min(max(turns_per_minute - CALM_TURNS_PER_MINUTE, 0.0) / 20.0, 1.0) +
+            0.3 * self.exclamations / segments +
+            0.3 * min(self.conflict_cues / segments, 1.0)
+        ))
+
+
+def _is_speaker_change(previous: Dict[str, Any], current: Dict[str, Any]) -> bool:
+    """True when two adjacent entries have different known speakers."""
+    return (previous["speaker"] is not None and current["speaker"] is not None and
+            previous["speaker"] != current["speaker"])
+
+
+class SceneClassifier:
+    """
+    Rule-based scene beats over a sliding window of recent segments.
+    
+    Two windows keep running sums (duration per emotion, speaker changes,
+    exclamations, conflict and conciliatory cues) that are adjusted as segments
+    enter and leave: a long context window and a short recent one, so a scene
+    can turn without waiting for the context to drain. Each new segment costs
+    O(1) amortized regardless of window length. One classifier lives per
+    session or file.
+    """
+    
+    def __init__(self, window_seconds: float = 60.0, window_segments: int = 50):
+        """
+        Initialize the classifier.
+        
+        Args:
+            window_seconds: Speech duration covered by the context window
+            window_segments: Maximum segments in the context window
+        """
+        self._context = _WindowStats(window_seconds, window_segments)
+        self._recent = _WindowStats(window_seconds, RECENT_SEGMENTS)
+        
+        self.version = 0  # Segments seen
+        self.beat = "calm"
+        self.intensity = 0.0
+        self.trend = "steady"
+        self.changed = False
+        self._resolution_left = 0
+        self.llm_beat: Optional[str] = None
+        self.llm_reason: Optional[str] = None
+        self.llm_version = 0  # Version of the window the LLM beat describes
+    
+    def update(self, segment: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Add a segment to the windows and re-evaluate the beat.
+        
+        Args:
+            segment: Segment with start/end and optional "text", "speaker", "emotion"
+        
+        Returns:
+            Current scene state (see state())
+        """
+        text = segment.get("text") or ""
+        words = re.findall(r"[\w']+", text.lower())
+        entry = {
+            "duration": max(0.0, segment["end"] - segment["start"]),
+            "speaker": segment.get("speaker"),
+            "emotion": segment.get("emotion"),
+            "text": text.strip(),
+            "exclamation": "!" in text,
+            "conflict": sum(word in CONFLICT_WORDS for word in words),
+            "conciliatory": sum(word in CONCILIATORY_WORDS for word in words)
+        }
+        self._context.push(entry)
+        self._recent.push(entry)
+        self.version += 1
+        self._evaluate()
+        return self.state()
+    
+    def _evaluate(self) -> None:
+        """Derive intensity, trend and beat from the window sums."""
+        recent = self._recent.intensity()
+        intensity = (1.0 - RECENT_WEIGHT) * self._context.intensity() + RECENT_WEIGHT * recent
+        
+        if intensity > self.intensity + TREND_EPSILON:
+            self.trend = "rising"
+        elif intensity < self.intensity - TREND_EPSILON:
+            self.trend = "falling"
+        else:
+            self.trend = "steady"
+        
+        # Resolution follows the recent window; the context would keep a cooled scene hot
+        previous = self.beat
+        settling = recent < TENSION_INTENSITY
+        if previous in ("conflict", "tension") and settling and (self._recent.conciliatory_cues or
+                                                                 recent < RESOLVED_INTENSITY):
+            beat = "resolution"
+            self._resolution_left = RESOLUTION_HOLD
+        elif previous == "resolution" and settling and self._resolution_left > 0:
+            beat = "resolution"
+            self._resolution_left -= 1
+        elif intensity >= CONFLICT_INTENSITY:
+            beat = "conflict"
+        elif intensity >= TENSION_INTENSITY and recent >= RESOLVED_INTENSITY:
+            beat = "tension"
+        else:
+            beat = "calm"
+        
+        self.beat = beat
+        self.intensity = intensity
+        self.changed = beat != previous
+    
+    def state(self) -> Dict[str, Any]:
+        """
+        Current scene state.
+        
+        Returns:
+            {"beat", "intensity", "trend", "changed", "source"} where "beat" is the
+            LLM label when one is available and "rule_beat" the rule-based label
+        """
+        state = {
+            "beat": self.beat,
+            "intensity": round(float(self.intensity), 3),
+            "trend": self.trend,
+            "changed": self.changed,
+            "source": "rules"
+        }
+        if self.llm_beat is not None:
+            state.update({
+                "beat": self.llm_beat,
+                "rule_beat": self.beat,
+                "reason": self.llm_reason,
+                "source": "llm",
+                "lag_segments": self.version - self.llm_version
+            })
+        return state
+    
+    def window_text(self) -> str:
+        """Transcript of the window, one "[speaker] (emotion) text" line per segment."""
+        lines = []
+        for entry in self._context.entries:
+            if not entry["text"]:
+                continue
+            speaker = entry["speaker"] or "SPEAKER"
+            emotion = f" ({entry['emotion']})" if entry["emotion"] else ""
+            lines.append(f"[{speaker}]{emotion} {entry['text']}")
+        return "\n".join(lines)
+    
+    def apply_llm(self, beat: Optional[str], reason: Optional[str], version: int) -> None:
+        """Record an LLM beat for the window as it was at version (older answers are ignored)."""
+        if beat not in BEATS or version < self.llm_version:
+            return
+        self.llm_beat = beat
+        self.llm_reason = reason
+        self.llm_version = version
+
+
+class OllamaSceneBackend:
+    """Classifies a batch of transcript windows with one local Ollama chat call."""
+    
+    def __init__(self, host: str = "http://localhost:11434", model: str = "llama3.2"):
+        """
+        Initialize the backend.
+        
+        Args:
+            host: Ollama server URL
+            model: Model name served by Ollama
+        
+        Raises:
+            RuntimeError: If the ollama package is not installed
+        """
+        if OllamaClient is None:
+            raise RuntimeError("ollama package not installed")
+        self.model = model
+        self._client = OllamaClient(host=host)
+    
+    async def classify(self, windows: Sequence[str]) -> List[Dict[str, Any]]:
+        """
+        Classify each window as one of BEATS.
+        
+        Args:
+            windows: Transcript windows (see SceneClassifier.window_text)
+        
+        Returns:
+            One {"beat", "reason"} per window (beat is None when the reply omits it)
+        """
+        numbered = "\n\n".join(f"### Window {i + 1}\n{text or '(silence)'}" for i, text in enumerate(windows))
+        prompt = (
+            f"Each window below is the recent dialogue of a separate scene. Classify the narrative "
+            f"beat of every window as one of: {', '.join(BEATS)}. Reply with JSON only, in the form "
+            f'{{"beats": [{{"window": 1, "beat": "...", "reason": "<at most 12 words>"}}]}}.\n\n{numbered}'
+        )
+        response = await self._client.chat(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            format="json",
+            options={"temperature": 0}
+        )
+        answers = json.loads(response["message"]["content"]).get("beats", [])
+        
+        results = [{"beat": None, "reason": None} for _ in windows]
+        for answer in answers:
+            index = answer.get("window")
+            if isinstance(index, int) and 1 <= index <= len(windows):
+                beat = str(answer.get("beat", "")).strip().lower()
+                results[index - 1] = {"beat": beat if beat in BEATS else None, "reason": answer.get("reason")}
+        return results
+
+
+class SceneLLMScheduler:
+    """
+    Feeds scene windows to an LLM backend off the transcription path.
+    
+    submit() only records the latest classifier state per key and never waits.
+    A single background task sends up to max_batch windows per backend call,
+    at most one call every min_interval seconds; windows submitted meanwhile
+    are coalesced, so a slow model lowers label freshness instead of adding load.
+    """
+    
+    def __init__(self, backend: Any, max_batch: int = 8, min_interval: float = 2.0,
+                 timeout: float = 15.0, max_pending: int = 256):
+        """
+        Initialize the scheduler.
+        
+        Args:
+            backend: Object with ``async classify(windows) -> [{"beat", "reason"}]``
+            max_batch: Windows per backend call
+            min_interval: Minimum seconds between backend calls
+            timeout: Seconds before a backend call is abandoned
+            max_pending: Distinct keys waiting before new ones are dropped
+        """
+        self.backend = backend
+        self.max_batch = max(1, max_batch)
+        self.min_interval = min_interval
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self._pending: Dict[Any, SceneClassifier] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_call = float("-inf")
+        self.stats = {"calls": 0, "windows": 0, "coalesced": 0, "dropped": 0, "failures": 0}
+    
+    def submit(self, key: Any, classifier: SceneClassifier) -> None:
+        """Queue a classifier's current window for LLM labelling (non-blocking)."""
+        if key in self._pending:
+            self.stats["coalesced"] += 1
+        elif len(self._pending) >= self.max_pending:
+            self.stats["dropped"] += 1
+            return
+        self._pending[key] = classifier
+        
+        if self._task is None or self._task.done():
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+        self._wakeup.set()
+    
+    def discard(self, key: Any) -> None:
+        """Forget a key's pending window (session closed)."""
+        self._pending.pop(key, None)
+    
+    async def _run(self) -> None:
+        """Batch, rate-limit and dispatch pending windows until cancelled."""
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            
+            delay = self._last_call + self.min_interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if not self._pending:
+                continue
+            
+            keys = list(self._pending)[:self.max_batch]
+            batch: List[Tuple[SceneClassifier, int, str]] = []
+            for key in keys:
+                classifier = self._pending.pop(key)
+                batch.append((classifier, classifier.version, classifier.window_text()))
+            if self._pending:
+                self._wakeup.set()
+            
+            self._last_call = time.monotonic()
+            self.stats["calls"] += 1
+            self.stats["windows"] += len(batch)
+            try:
+                results = await asyncio.wait_for(
+                    self.backend.classify([text for _, _, text in batch]),
+                    self.timeout
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["failures"] += 1
+                logger.warning(f"Scene LLM call failed for {len(batch)} windows: {e or 'timed out'}")
+                continue
+            
+            for (classifier, version, _), result in zip(batch, results):
+                classifier.apply_llm(result.get("beat"), result.get("reason"), version)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Backend call statistics."""
+        return {**self.stats, "pending": len(self._pending)}
+    
+    def shutdown(self) -> None:
+        """Stop the background task."""
+        if self._task is not None:
+            self._task.cancel() 
\ No newline at end of file
@@ -0,0 +1,44 @@
+"""
+Session Module
+Per-connection state kept by the pipeline orchestrator.
+"""
+
+from dataclasses import dataclass, field
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Set
+import asyncio
+import time
+
+from .streaming import StreamingTranscriber
+from .diarization import OnlineSpeakerClusterer
+from .scene import SceneClassifier
+from .accumulator import ChunkAccumulator
+
+# Streaming speaker turns kept to label re-decoded words (the streaming buffer is 15 s by default)
+MAX_SPEAKER_TURNS = 256
+
+
+@dataclass
+class SessionState:
+    """State for a single client session (one WebSocket connection)."""
+    session_id: str
+    streaming: bool = False
+    model_size: Optional[str] = None  # Model tier requested by the client (None = pipeline default)
+    downgrade_model: Optional[str] = None  # Smaller tier used while the session is behind (backpressure)
+    streamer: Optional[StreamingTranscriber] = None
+    stream_decode: Optional[asyncio.Future] = None  # Resolves when the streamer's last decode has really finished
+    created_at: float = field(default_factory=time.time)
+    chunks_received: int = 0
+    audio_seconds: float = 0.0
+    refinements: Set[asyncio.Task] = field(default_factory=set)  # Two-pass refinements in flight
+    speakers: Optional[OnlineSpeakerClusterer] = None  # Speaker centroids (diarization enabled)
+    speaker_turns: Deque[Dict[str, Any]] = field(
+        default_factory=lambda: deque(maxlen=MAX_SPEAKER_TURNS)
+    )  # Recent streaming turns on the session timeline
+    scene: Optional[SceneClassifier] = None  # Scene-beat window (scene classification enabled)
+    accumulator: Optional[ChunkAccumulator] = None  # Chunks held for a shared decode window (coalescing enabled)
+    
+    @property
+    def active_model_size(self) -> Optional[str]:
+        """Model tier the session transcribes with right now (None = pipeline default)."""
+        return self.downgrade_model or self.model_size 
\ No newline at end of file
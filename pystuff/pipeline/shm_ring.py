@@ -0,0 +1,202 @@
+"""
+Shared Memory Ring Module
+Fixed-slot ring buffer of float32 PCM in shared memory, used to hand decoded
+audio from the WebSocket front process to inference workers without pickling
+or copying samples through a pipe.
+"""
+
+import struct
+import time
+import weakref
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional, Tuple
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+RING_MAGIC = b"TRNG"
+# Magic, slot count, samples per slot; padded to RING_HEADER_BYTES
+RING_HEADER = struct.Struct("<4sII")
+RING_HEADER_BYTES = 64
+# Per-slot metadata, written by the producer before the slot is published
+SLOT_HEADER_DTYPE = np.dtype([
+    ("state", "<u4"),
+    ("chunk_idx", "<u4"),
+    ("sequence", "<u8"),
+    ("sample_rate", "<u4"),
+    ("num_samples", "<u4"),
+    ("written_at", "<f8")
+])
+# Slot lifecycle: the producer fills a FREE slot and publishes it READY; the
+# consumer owns it until the last view of its samples is gone, then frees it
+SLOT_FREE, SLOT_WRITING, SLOT_READY = 0, 1, 2
+# Sample data starts on a cache-line boundary
+DATA_ALIGNMENT = 64
+
+
+def _align(offset: int) -> int:
+    """Round offset up to DATA_ALIGNMENT."""
+    return -(-offset // DATA_ALIGNMENT) * DATA_ALIGNMENT
+
+
+class SharedAudioRing:
+    """
+    Single-producer, single-consumer ring of float32 PCM slots in shared memory.
+    
+    The producer copies decoded audio into a free slot once and passes only
+    (slot, sequence) to the consumer, which maps the samples zero-copy. A read
+    leases the slot for as long as any view of its samples is alive, so
+    background work (e.g. two-pass refinement) can keep using the audio; the
+    slot is recycled when the last view is garbage-collected. When every slot
+    is leased the write is refused and the caller applies its overflow policy.
+    """
+    
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool = False):
+        """
+        Wrap an initialized segment (use create() or attach()).
+        
+        Args:
+            shm: Shared memory segment holding the ring
+            owner: Whether this handle created the segment and must unlink it
+        """
+        magic, num_slots, slot_samples = RING_HEADER.unpack_from(shm.buf)
+        if magic != RING_MAGIC:
+            raise ValueError(f"Shared memory {shm.name} is not an audio ring")
+        self._shm = shm
+        self.owner = owner
+        self.name = shm.name
+        self.num_slots = num_slots
+        self.slot_samples = slot_samples
+        self._slots = np.ndarray((num_slots,), dtype=SLOT_HEADER_DTYPE, buffer=shm.buf, offset=RING_HEADER_BYTES)
+        self._data_offset = _align(RING_HEADER_BYTES + num_slots * SLOT_HEADER_DTYPE.itemsize)
+        self._data = np.ndarray((num_slots, slot_samples), dtype=np.float32, buffer=shm.buf,
+                                offset=self._data_offset)
+        self._cursor = 0
+        self._sequence = 0
+        self.writes = 0
+        self.overflows = 0
+    
+    @classmethod
+    def create(cls, num_slots: int = 16, slot_samples: int = 288000) -> "SharedAudioRing":
+        """
+        Allocate a new ring (producer side).
+        
+        Args:
+            num_slots: Number of chunks that can be in flight at once
+            slot_samples: Capacity of one slot in samples (longer chunks do not fit)
+        """
+        size = _align(RING_HEADER_BYTES + num_slots * SLOT_HEADER_DTYPE.itemsize) + num_slots * slot_samples * 4
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        RING_HEADER.pack_into(shm.buf, 0, RING_MAGIC, num_slots, slot_samples)
+        logger.info(f"Created audio ring {shm.name}: {num_slots} slots x {slot_samples} samples ({size / 1e6:.1f} MB)")
+        return cls(shm, owner=True)
+    
+    @classmethod
+    def attach(cls, name: str) -> "SharedAudioRing":
+        """Map an existing ring by name (consumer side)."""
+        return cls(shared_memory.SharedMemory(name=name))
+    
+    def reset(self) -> None:
+        """Mark every slot free (the consumer holding leases is gone)."""
+        self._slots["state"][:] = SLOT_FREE
+    
+    @property
+    def slots_in_use(self) -> int:
+        """Slots written and not yet released by the consumer."""
+        return int(np.count_nonzero(self._slots["state"] != SLOT_FREE))
+    
+    def try_write(self, audio_np: np.ndarray, chunk_idx: int, sample_rate: int) -> Optional[Tuple[int, int]]:
+        """
+        Copy one chunk into the next free slot and publish it.
+        
+        Args:
+            audio_np: Mono float32 audio (at most slot_samples long)
+            chunk_idx: Chunk index carried in the slot header
+            sample_rate: Sample rate carried in the slot header
+        
+        Returns:
+            (slot, sequence) to hand to the consumer, or None when every slot is leased
+        
+        Raises:
+            ValueError: The chunk is longer than a slot
+        """
+        num_samples = len(audio_np)
+        if num_samples > self.slot_samples:
+            raise ValueError(f"Chunk of {num_samples} samples exceeds ring slot of {self.slot_samples}")
+        
+        states = self._slots["state"]
+        free = np.flatnonzero(np.roll(states, -self._cursor) == SLOT_FREE)
+        if not len(free):
+            self.overflows += 1
+            return None
+        slot = (self._cursor + int(free[0])) % self.num_slots
+        
+        states[slot] = SLOT_WRITING
+        self._data[slot, :num_samples] = audio_np
+        self._sequence += 1
+        header = self._slots[slot:slot + 1]
+        header["chunk_idx"] = chunk_idx
+        header["sequence"] = self._sequence
+        header["sample_rate"] = sample_rate
+        header["num_samples"] = num_samples
+        header["written_at"] = time.time()
+        states[slot] = SLOT_READY
+        
+        self._cursor = (slot + 1) % self.num_slots
+        self.writes += 1
+        return slot, self._sequence
+    
+    def read(self, slot: int, sequence: int) -> Tuple[np.ndarray, int, int]:
+        """
+        Map a published slot without copying.
+        
+        Args:
+            slot: Slot index from try_write
+            sequence: Sequence number from try_write (guards against stale slots)
+        
+        Returns:
+            Tuple of (read-only float32 view, chunk_idx, sample_rate). The slot is
+            released once this view and every array derived from it are gone.
+        
+        Raises:
+            ValueError: The slot is not published under this sequence
+        """
+        header = self._slots[slot]
+        if header["state"] != SLOT_READY or header["sequence"] != sequence:
+            raise ValueError(f"Ring slot {slot} does not hold sequence {sequence}")
+        
+        start = self._data_offset + slot * self.slot_samples * 4
+        audio_np = np.frombuffer(self._shm.buf[start:start + int(header["num_samples"]) * 4], dtype=np.float32)
+        audio_np.flags.writeable = False
+        # Views derived from audio_np keep its base alive, so this fires after the last one
+        weakref.finalize(audio_np.base, self.release, slot, sequence)
+        return audio_np, int(header["chunk_idx"]), int(header["sample_rate"])
+    
+    def release(self, slot: int, sequence: int) -> None:
+        """Return a slot to the producer (normally called by the read lease)."""
+        if self._slots is not None and self._slots["sequence"][slot] == sequence:
+            self._slots["state"][slot] = SLOT_FREE
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Ring geometry and producer-side counters."""
+        return {
+            "name": self.name,
+            "slots": self.num_slots,
+            "slot_samples": self.slot_samples,
+            "in_use": self.slots_in_use,
+            "writes": self.writes,
+            "overflows": self.overflows
+        }
+    
+    def close(self) -> None:
+        """Unmap the ring (and unlink it when this handle created it)."""
+        self._slots = self._data = None
+        try:
+            self._shm.close()
+        except BufferError:
+            # Leased views are still alive; the mapping goes away with them
+            logger.warning(f"Audio ring {self.name} closed with slots still leased")
+        if self.owner:
+            self._shm.unlink() 
\ No newline at end of file
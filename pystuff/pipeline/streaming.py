@@ -0,0 +1,189 @@
+"""
+Streaming Transcription Module
+Incremental per-session transcription with a rolling buffer and stable-prefix commit.
+"""
+
+import re
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+import numpy as np
+
+from .features import IncrementalLogMel
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_word(word: str) -> str:
+    """Normalize a word for agreement checks (case and punctuation insensitive)."""
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+class StreamingTranscriber:
+    """
+    LocalAgreement-2 streaming transcriber for a single session.
+    
+    Audio is appended to a rolling buffer that starts at the end of the last
+    committed word, so every update only re-decodes the unconfirmed tail. The
+    committed text is passed to the model as ``initial_prompt``. Words on which
+    two consecutive hypotheses agree are committed as final; the rest of the
+    latest hypothesis is reported as partial.
+    
+    With a ``features`` extractor, log-mel frames are computed once as audio
+    arrives and every re-decode of the tail is handed its slice of them.
+    """
+    
+    def __init__(self, transcribe_fn: Callable[..., Dict[str, Any]], sample_rate: int = 16000,
+                 language: Optional[str] = None, max_buffer_seconds: float = 15.0,
+                 prompt_chars: int = 200, features: Optional[IncrementalLogMel] = None):
+        """
+        Initialize the streaming transcriber.
+        
+        Args:
+            transcribe_fn: Blocking function like TranscriptionProcessor.transcribe_array
+            sample_rate: Sample rate of the audio fed to insert_audio
+            language: Language code (optional)
+            max_buffer_seconds: Force-commit the hypothesis once the tail grows this long
+            prompt_chars: Characters of committed text passed as initial_prompt
+            features: Incremental log-mel extractor for the buffer (None = the model extracts its own)
+        """
+        self.transcribe_fn = transcribe_fn
+        self.sample_rate = sample_rate
+        self.language = language
+        self.max_buffer_seconds = max_buffer_seconds
+        self.prompt_chars = prompt_chars
+        self.features = features
+        
+        self.buffer = np.zeros(0, dtype=np.float32)
+        self.buffer_offset = 0.0  # Absolute time (s) of buffer[0]
+        self.buffer_sample = 0  # Feature timeline sample of buffer[0]
+        self.committed: List[Dict[str, Any]] = []
+        self.hypothesis: List[Dict[str, Any]] = []
+    
+    @property
+    def committed_text(self) -> str:
+        """Full committed transcript so far."""
+        return "".join(word["word"] for word in self.committed).strip()
+    
+    @property
+    def buffer_duration(self) -> float:
+        """Duration of the unconfirmed audio tail in seconds."""
+        return len(self.buffer) / self.sample_rate
+    
+    def insert_audio(self, audio_np: np.ndarray) -> None:
+        """Append new audio to the rolling buffer."""
+        audio_np = audio_np.astype(np.float32, copy=False)
+        self.buffer = np.concatenate([self.buffer, audio_np])
+        if self.features is not None:
+            self.features.append(audio_np)
+    
+    def process(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Re-decode the unconfirmed tail and commit the stable prefix.
+        
+        Returns:
+            Dictionary with newly committed ("final") and tentative ("partial") words,
+            each word carrying absolute start/end times
+        """
+        if len(self.buffer) == 0:
+            return {"final": [], "partial": []}
+        
+        prompt = self.committed_text[-self.prompt_chars:] or None
+        kwargs = {}
+        if self.features is not None:
+            kwargs["features"] = self.features.window(self.buffer_sample, len(self.buffer))
+        result = self.transcribe_fn(
+            self.buffer, self.language, initial_prompt=prompt, word_timestamps=True, **kwargs
+        )
+        
+        words = []
+        for segment in result["segments"]:
+            for word in segment.get("words") or []:
+                words.append({
+                    "start": self.buffer_offset + word["start"],
+                    "end": self.buffer_offset + word["end"],
+                    "word": word["word"]
+                })
+        
+        # LocalAgreement: commit the longest prefix shared with the previous hypothesis
+        agreed = 0
+        for new, old in zip(words, self.hypothesis):
+            if _normalize_word(new["word"]) != _normalize_word(old["word"]):
+                break
+            agreed += 1
+        
+        final = words[:agreed]
+        self.hypothesis = words[agreed:]
+        
+        # A tail that never stabilises would grow without bound
+        if not final and self.buffer_duration > self.max_buffer_seconds and self.hypothesis:
+            logger.info(f"Streaming buffer exceeded {self.max_buffer_seconds}s, force-committing hypothesis")
+            final, self.hypothesis = self.hypothesis, []
+        
+        if final:
+            self.committed.extend(final)
+            self._trim_buffer(final[-1]["end"])
+        
+        return {"final": final, "partial": list(self.hypothesis)}
+    
+    def finish(self) -> List[Dict[str, Any]]:
+        """Commit whatever is left of the hypothesis and reset the buffer."""
+        final, self.hypothesis = self.hypothesis, []
+        self.committed.extend(final)
+        self.buffer_offset += self.buffer_duration
+        self.buffer = np.zeros(0, dtype=np.float32)
+        self._reset_features()
+        return final
+    
+    def skip_audio(self, duration: float) -> None:
+        """Advance the timeline over audio that is not transcribed (e.g. silence)."""
+        if len(self.buffer) == 0:
+            self.buffer_offset += duration
+            self._reset_features()
+        else:
+            self.insert_audio(np.zeros(int(round(duration * self.sample_rate)), dtype=np.float32))
+    
+    def _trim_buffer(self, until: float) -> None:
+        """Drop committed audio so only the unconfirmed tail is re-decoded."""
+        cut = int(round((until - self.buffer_offset) * self.sample_rate))
+        cut = min(max(cut, 0), len(self.buffer))
+        if self.features is not None:
+            # Feature slices must start on a frame boundary
+            cut -= cut % self.features.hop_length
+        self.buffer = self.buffer[cut:]
+        self.buffer_offset += cut / self.sample_rate
+        self.buffer_sample += cut
+        if self.features is not None:
+            self.features.trim(self.buffer_sample)
+        # Hypothesis words lying entirely in the dropped audio can no longer be confirmed
+        self.hypothesis = [word for word in self.hypothesis if word["end"] > self.buffer_offset]
+    
+    def _reset_features(self) -> None:
+        """Restart the feature timeline (the buffer is empty and its audio is not contiguous with what follows)."""
+        self.buffer_sample = 0
+        if self.features is not None:
+            self.features.reset()
+
+
+def words_to_event(event_type: str, words: List[Dict[str, Any]], chunk_idx: int) -> Optional[Dict[str, Any]]:
+    """
+    Build a WebSocket event from a list of streaming words.
+    
+    Args:
+        event_type: "final" or "partial"
+        words: Words with absolute start/end times
+        chunk_idx: Index of the chunk that triggered the update
+    
+    Returns:
+        Event dictionary, or None for an empty final update
+    """
+    if not words and event_type == "final":
+        return None
+    return {
+        "type": event_type,
+        "chunk_idx": chunk_idx,
+        "text": "".join(word["word"] for word in words).strip(),
+        "start": words[0]["start"] if words else None,
+        "end": words[-1]["end"] if words else None,
+        "words": words
+    } 
\ No newline at end of file
@@ -4,23 +4,50 @@ Handles speech-to-text processing using Whisper models.
 """
 
 import io
-from typing import Optional, List, Dict, Any
+import time
+from contextlib import nullcontext
+from typing import Optional, List, Dict, Any, BinaryIO, Union, ContextManager
 import logging
 
+import numpy as np
+
+from .metrics import PipelineMetrics
+from .features import PrecomputedFeatureExtractor
+
 # SPEECH-TO-TEXT DEPENDENCIES
-try:
-    from faster_whisper import WhisperModel
-except ImportError:
-    logging.error("faster-whisper not installed.")
-    WhisperModel = None
+# faster-whisper pulls in CTranslate2 and tokenizers, which take seconds to import,
+# so it is imported together with the first model (see _import_faster_whisper)
+WhisperModel = None
+pad_or_trim = None
+Tokenizer = None
 
 logger = logging.getLogger(__name__)
 
 
+def _import_faster_whisper() -> bool:
+    """Import faster-whisper on first use; returns False if it is not installed."""
+    global WhisperModel, pad_or_trim, Tokenizer
+    if WhisperModel is None:
+        try:
+            from faster_whisper import WhisperModel
+            from faster_whisper.audio import pad_or_trim
+            from faster_whisper.tokenizer import Tokenizer
+        except ImportError:
+            logging.error("faster-whisper not installed.")
+            return False
+    return True
+
+# Whisper models consume 16 kHz mono audio in 30 second windows
+WHISPER_SAMPLE_RATE = 16000
+WHISPER_WINDOW_SECONDS = 30
+
+
 class TranscriptionProcessor:
     """Handles speech-to-text transcription using Whisper models."""
     
-    def __init__(self, model_size: str = "tiny", device: str = "cpu", compute_type: str = "int8"):
+    def __init__(self, model_size: str = "tiny", device: str = "cpu", compute_type: str = "int8",
+                 cpu_threads: int = 0, num_workers: int = 1, load_model: bool = True,
+                 beam_size: int = 5, best_of: int = 5):
         """
         Initialize transcription processor.
         
@@ -28,16 +55,29 @@ class TranscriptionProcessor:
             model_size: Whisper model size ("tiny", "base", "small", "medium", "large")
             device: Device to run on ("cpu", "cuda")
             compute_type: Compute type for quantization ("int8", "float16", "float32")
+            cpu_threads: CTranslate2 intra-op threads (0 = library default)
+            num_workers: CTranslate2 workers, allows concurrent transcribe calls
+            load_model: Load the model now (False defers it to warm_up)
+            beam_size: Default beam width (1 = greedy)
+            best_of: Default candidates sampled at non-zero temperature fallbacks
         """
         self.model_size = model_size
         self.device = device
         self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self.num_workers = num_workers
+        self.beam_size = beam_size
+        self.best_of = best_of
         self.model = None
-        self._load_model()
+        # Wrapped feature extractor accepting precomputed log-mel features (None = not supported)
+        self.precomputed_features: Optional[PrecomputedFeatureExtractor] = None
+        self.metrics: Optional[PipelineMetrics] = None  # Set by the orchestrator to record model stages
+        if load_model:
+            self._load_model()
     
     def _load_model(self) -> None:
         """Load the Whisper model."""
-        if WhisperModel is None:
+        if not _import_faster_whisper():
             logger.error("faster-whisper not available")
             return
         
@@ -45,12 +85,28 @@ class TranscriptionProcessor:
             self.model = WhisperModel(
                 self.model_size, 
                 device=self.device, 
-                compute_type=self.compute_type
+                compute_type=self.compute_type,
+                cpu_threads=self.cpu_threads,
+                num_workers=self.num_workers
             )
+            self.precomputed_features = PrecomputedFeatureExtractor.wrap(self.model.feature_extractor)
+            if self.precomputed_features is not None:
+                self.model.feature_extractor = self.precomputed_features
             logger.info(f"Whisper {self.model_size} model loaded successfully on {self.device}")
         except Exception as e:
             logger.error(f"Failed to load Whisper model: {e}")
             self.model = None
+            self.precomputed_features = None
+    
+    def _timed(self, stage: str) -> ContextManager[None]:
+        """Time a model stage if metrics are attached."""
+        return self.metrics.time(stage) if self.metrics is not None else nullcontext()
+    
+    def _precomputed(self, audio_np: np.ndarray, features: Optional[np.ndarray]) -> ContextManager[None]:
+        """Hand precomputed features to the model's next extraction of audio_np, if supported."""
+        if features is None or self.precomputed_features is None:
+            return nullcontext()
+        return self.precomputed_features.use(audio_np, features)
     
     def transcribe_audio(self, audio_bytes: bytes, language: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -63,36 +119,82 @@ class TranscriptionProcessor:
         Returns:
             Dictionary with transcription results
         """
+        # Create BytesIO object for Whisper
+        result = self._transcribe(io.BytesIO(audio_bytes), language)
+        logger.info(f"Transcribed {len(audio_bytes)} bytes to {len(result['text'])} characters")
+        return result
+    
+    def transcribe_array(self, audio_np: np.ndarray, language: Optional[str] = None,
+                         initial_prompt: Optional[str] = None,
+                         word_timestamps: bool = False,
+                         beam_size: Optional[int] = None,
+                         best_of: Optional[int] = None,
+                         features: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """
+        Transcribe a 16 kHz mono float32 array without any container round trip.
+        
+        Args:
+            audio_np: Audio samples at WHISPER_SAMPLE_RATE
+            language: Language code (optional, auto-detect if None)
+            initial_prompt: Text conditioning the decoder (e.g. previously committed transcript)
+            word_timestamps: Whether to compute per-word timings
+            beam_size: Beam width for this call (defaults to self.beam_size)
+            best_of: Sampling candidates for this call (defaults to self.best_of)
+            features: Log-mel features of audio_np already computed by an
+                IncrementalLogMel in the model's layout (None = extract them)
+            
+        Returns:
+            Dictionary with transcription results
+        """
+        audio_np = np.ascontiguousarray(audio_np, dtype=np.float32)
+        with self._precomputed(audio_np, features):
+            result = self._transcribe(audio_np, language, initial_prompt, word_timestamps, beam_size, best_of)
+        logger.info(f"Transcribed {len(audio_np)} samples to {len(result['text'])} characters")
+        return result
+    
+    def _transcribe(self, audio_input: Union[BinaryIO, np.ndarray], 
+                    language: Optional[str] = None,
+                    initial_prompt: Optional[str] = None,
+                    word_timestamps: bool = False,
+                    beam_size: Optional[int] = None,
+                    best_of: Optional[int] = None) -> Dict[str, Any]:
+        """Run Whisper on a file-like object or waveform and collect the results."""
         if self.model is None:
             raise RuntimeError("Whisper model not loaded")
         
         try:
-            # Create BytesIO object for Whisper
-            audio_io = io.BytesIO(audio_bytes)
-            
-            # Transcribe with Whisper
-            segments, info = self.model.transcribe(
-                audio_io,
-                language=language,
-                beam_size=5,
-                best_of=5
-            )
+            # Feature extraction (and language detection) happen up front; segments
+            # are encoded and beam-searched lazily while iterating
+            with self._timed("features"):
+                segments, info = self.model.transcribe(
+                    audio_input,
+                    language=language,
+                    beam_size=beam_size or self.beam_size,
+                    best_of=best_of or self.best_of,
+                    initial_prompt=initial_prompt,
+                    word_timestamps=word_timestamps
+                )
             
             # Extract text and timing information
             text_segments = []
             full_text = ""
             
+            with self._timed("beam_search"):
+                segments = list(segments)
             for segment in segments:
                 segment_data = {
                     "start": segment.start,
                     "end": segment.end,
                     "text": segment.text.strip(),
-                    "words": getattr(segment, 'words', [])
+                    "words": [
+                        {"start": word.start, "end": word.end, "word": word.word, "probability": word.probability}
+                        for word in (getattr(segment, 'words', None) or [])
+                    ]
                 }
                 text_segments.append(segment_data)
                 full_text += segment.text.strip() + " "
             
-            result = {
+            return {
                 "text": full_text.strip(),
                 "segments": text_segments,
                 "language": info.language,
@@ -100,9 +202,6 @@ class TranscriptionProcessor:
                 "duration": info.duration
             }
             
-            logger.info(f"Transcribed {len(audio_bytes)} bytes to {len(full_text)} characters")
-            return result
-            
         except Exception as e:
             logger.error(f"Transcription failed: {e}")
             raise
@@ -124,6 +223,130 @@ class TranscriptionProcessor:
         result["chunk_idx"] = chunk_idx
         return result
     
+    def transcribe_array_chunk(self, audio_np: np.ndarray, chunk_idx: int,
+                               language: Optional[str] = None,
+                               word_timestamps: bool = False,
+                               beam_size: Optional[int] = None,
+                               best_of: Optional[int] = None,
+                               features: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """
+        Transcribe a single 16 kHz float32 audio chunk.
+        
+        Args:
+            audio_np: Audio samples at WHISPER_SAMPLE_RATE
+            chunk_idx: Index of the chunk
+            language: Language code (optional)
+            word_timestamps: Whether to compute per-word timings
+            beam_size: Beam width for this call (defaults to self.beam_size)
+            best_of: Sampling candidates for this call (defaults to self.best_of)
+            features: Precomputed log-mel features of audio_np (see transcribe_array)
+            
+        Returns:
+            Dictionary with chunk transcription results
+        """
+        result = self.transcribe_array(audio_np, language, word_timestamps=word_timestamps,
+                                       beam_size=beam_size, best_of=best_of, features=features)
+        result["chunk_idx"] = chunk_idx
+        return result
+    
+    def transcribe_batch(self, audio_arrays: List[np.ndarray],
+                         language: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Transcribe several short 16 kHz arrays in one batched encoder/decoder pass.
+        
+        Each array must fit in a single Whisper window. Results are segment-level
+        (one segment per array, no word timestamps). Falls back to sequential
+        transcription when batching is not possible.
+        
+        Args:
+            audio_arrays: Audio samples at WHISPER_SAMPLE_RATE, one per request
+            language: Language code (optional, detected per item if None)
+            
+        Returns:
+            List of transcription results in the same order as audio_arrays
+        """
+        if self.model is None:
+            raise RuntimeError("Whisper model not loaded")
+        
+        max_samples = WHISPER_SAMPLE_RATE * WHISPER_WINDOW_SECONDS
+        if len(audio_arrays) == 1 or any(len(audio) > max_samples for audio in audio_arrays):
+            return [self.transcribe_array(audio, language) for audio in audio_arrays]
+        
+        try:
+            with self._timed("features"):
+                features = np.stack([
+                    pad_or_trim(self.model.feature_extractor(np.ascontiguousarray(audio, dtype=np.float32)))
+                    for audio in audio_arrays
+                ])
+            durations = [len(audio) / WHISPER_SAMPLE_RATE for audio in audio_arrays]
+            results = self._decode_features(features, durations, language)
+        except Exception as e:
+            logger.error(f"Batched transcription failed: {e}")
+            raise
+        
+        logger.info(f"Transcribed batch of {len(audio_arrays)} chunks")
+        return results
+    
+    def _decode_features(self, features: np.ndarray, durations: List[float],
+                         language: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Encode a batch of log-mel windows and greedy/beam decode them without timestamps.
+        
+        Args:
+            features: Log-mel features of shape (batch, n_mels, frames)
+            durations: Audio duration in seconds for each window
+            language: Language code (optional, detected per item if None)
+            
+        Returns:
+            List of transcription results, one per window
+        """
+        with self._timed("encode"):
+            encoder_output = self.model.encode(features)
+        
+        if language is None and self.model.model.is_multilingual:
+            with self._timed("language_detection"):
+                detected = self.model.model.detect_language(encoder_output)
+            languages = [(probs[0][0][2:-2], probs[0][1]) for probs in detected]
+        else:
+            languages = [(language or "en", 1.0)] * len(durations)
+        
+        tokenizers = {}
+        prompts = []
+        for lang, _ in languages:
+            if lang not in tokenizers:
+                tokenizers[lang] = Tokenizer(
+                    self.model.hf_tokenizer,
+                    self.model.model.is_multilingual,
+                    task="transcribe",
+                    language=lang
+                )
+            tokenizer = tokenizers[lang]
+            prompts.append(list(tokenizer.sot_sequence) + [tokenizer.no_timestamps])
+        
+        with self._timed("generate"):
+            outputs = self.model.model.generate(
+                encoder_output,
+                prompts,
+                beam_size=self.beam_size,
+                max_length=self.model.max_length,
+                suppress_blank=True,
+                suppress_tokens=[-1]
+            )
+        
+        results = []
+        for output, duration, (lang, lang_prob) in zip(outputs, durations, languages):
+            tokenizer = tokenizers[lang]
+            tokens = [token for token in output.sequences_ids[0] if token < tokenizer.eot]
+            text = tokenizer.decode(tokens).strip()
+            results.append({
+                "text": text,
+                "segments": [{"start": 0.0, "end": duration, "text": text, "words": []}] if text else [],
+                "language": lang,
+                "language_probability": lang_prob,
+                "duration": duration
+            })
+        return results
+    
     def get_available_models(self) -> List[str]:
         """Get list of available Whisper model sizes."""
         return ["tiny", "base", "small", "medium", "large"]
@@ -132,9 +355,37 @@ class TranscriptionProcessor:
         """Check if the Whisper model is loaded."""
         return self.model is not None
     
+    def warm_up(self) -> bool:
+        """
+        Load the model if needed and run one dummy decode.
+        
+        The first decode pays for lazy weight initialisation and allocator growth;
+        doing it here keeps that cost out of the first real request.
+        
+        Returns:
+            True if the model is loaded and decoding works, False otherwise
+        """
+        if self.model is None:
+            self._load_model()
+        if self.model is None:
+            return False
+        
+        start = time.time()
+        # One second of faint noise runs feature extraction, encoder and decoder
+        audio_np = np.random.default_rng(0).normal(0.0, 1e-3, WHISPER_SAMPLE_RATE).astype(np.float32)
+        try:
+            self._transcribe(audio_np, language="en")
+        except Exception as e:
+            logger.error(f"Warm-up decode failed: {e}")
+            return False
+        logger.info(f"Whisper {self.model_size} warmed up in {time.time() - start:.2f}s")
+        return True
+    
     def reload_model(self, model_size: Optional[str] = None, 
                     device: Optional[str] = None, 
-                    compute_type: Optional[str] = None) -> bool:
+                    compute_type: Optional[str] = None,
+                    cpu_threads: Optional[int] = None,
+                    num_workers: Optional[int] = None) -> bool:
         """
         Reload the Whisper model with new parameters.
         
@@ -142,6 +393,8 @@ class TranscriptionProcessor:
             model_size: New model size (optional)
             device: New device (optional)
             compute_type: New compute type (optional)
+            cpu_threads: New CTranslate2 thread count (optional)
+            num_workers: New CTranslate2 worker count (optional)
             
         Returns:
             True if reload successful, False otherwise
@@ -152,6 +405,10 @@ class TranscriptionProcessor:
             self.device = device
         if compute_type:
             self.compute_type = compute_type
+        if cpu_threads is not None:
+            self.cpu_threads = cpu_threads
+        if num_workers is not None:
+            self.num_workers = num_workers
         
         try:
             self._load_model()
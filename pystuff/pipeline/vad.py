@@ -0,0 +1,132 @@
+"""
+Voice Activity Detection Module
+Gates silent audio before it reaches the transcription model.
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Tuple
+import logging
+
+import numpy as np
+
+from .dsp import frame_signal, frame_energy_db
+
+# VAD DEPENDENCIES
+try:
+    import webrtcvad
+except ImportError:
+    logging.warning("webrtcvad not installed - using energy-based VAD.")
+    webrtcvad = None
+
+logger = logging.getLogger(__name__)
+
+WEBRTC_SAMPLE_RATES = (8000, 16000, 32000, 48000)
+WEBRTC_FRAME_MS = (10, 20, 30)
+
+
+@dataclass
+class VadResult:
+    """Voice activity analysis of one chunk."""
+    is_speech: bool
+    speech_ratio: float
+    start: int  # First voiced sample (padded)
+    end: int  # Last voiced sample, exclusive (padded)
+    segments: List[Tuple[int, int]] = field(default_factory=list)  # Voiced sample ranges
+    frames: np.ndarray = None  # Framed audio (n_frames, frame_length), view over the input
+    frame_energy: np.ndarray = None  # Per-frame energy in dBFS
+    frame_flags: np.ndarray = None  # Per-frame raw speech decisions
+    frame_length: int = 0
+    sample_rate: int = 16000
+
+
+class VoiceActivityDetector:
+    """Detects speech using webrtcvad when available, falling back to an energy gate."""
+    
+    def __init__(self, sample_rate: int = 16000, aggressiveness: int = 2, frame_ms: int = 30,
+                 energy_threshold_db: float = -45.0, min_speech_ratio: float = 0.05,
+                 padding_ms: int = 200):
+        """
+        Initialize the voice activity detector.
+        
+        Args:
+            sample_rate: Sample rate of the analysed audio
+            aggressiveness: webrtcvad mode (0 = least, 3 = most aggressive filtering)
+            frame_ms: Analysis frame length in milliseconds (10, 20 or 30 for webrtcvad)
+            energy_threshold_db: Frames quieter than this are never speech
+            min_speech_ratio: Fraction of voiced frames needed to treat a chunk as speech
+            padding_ms: Audio kept around voiced regions when trimming
+        """
+        self.sample_rate = sample_rate
+        self.aggressiveness = aggressiveness
+        self.frame_ms = frame_ms
+        self.energy_threshold_db = energy_threshold_db
+        self.min_speech_ratio = min_speech_ratio
+        self.padding_ms = padding_ms
+        self.frame_length = int(sample_rate * frame_ms / 1000)
+        
+        self._vad = None
+        if webrtcvad is not None and sample_rate in WEBRTC_SAMPLE_RATES and frame_ms in WEBRTC_FRAME_MS:
+            self._vad = webrtcvad.Vad(aggressiveness)
+        self.backend = "webrtcvad" if self._vad is not None else "energy"
+        logger.info(f"Voice activity detector using {self.backend} backend")
+    
+    def analyze(self, audio_np: np.ndarray) -> VadResult:
+        """
+        Classify frames of a chunk as speech or silence.
+        
+        Args:
+            audio_np: Mono float32 audio at self.sample_rate
+        
+        Returns:
+            VadResult with voiced regions and the frame arrays used for the decision
+        """
+        frames = frame_signal(audio_np, self.frame_length)
+        energy = frame_energy_db(frames)
+        flags = energy > self.energy_threshold_db
+        
+        if self._vad is not None and flags.any():
+            pcm = (np.clip(frames, -1.0, 1.0) * 32767).astype("<i2")
+            for i in np.flatnonzero(flags):
+                flags[i] = self._vad.is_speech(pcm[i].tobytes(), self.sample_rate)
+        
+        speech_ratio = float(flags.mean()) if len(flags) else 0.0
+        is_speech = bool(flags.any()) and speech_ratio >= self.min_speech_ratio
+        
+        # Pad voiced frames so word onsets/offsets are not clipped
+        pad_frames = int(np.ceil(self.padding_ms / self.frame_ms))
+        if pad_frames and len(flags):
+            padded = np.convolve(flags.astype(np.int32), np.ones(2 * pad_frames + 1, dtype=np.int32), mode="same") > 0
+        else:
+            padded = flags
+        
+        segments = []
+        if padded.any():
+            edges = np.diff(np.concatenate([[0], padded.astype(np.int8), [0]]))
+            starts = np.flatnonzero(edges == 1)
+            ends = np.flatnonzero(edges == -1)
+            segments = [
+                (int(s * self.frame_length), int(min(e * self.frame_length, len(audio_np))))
+                for s, e in zip(starts, ends)
+            ]
+            # The final voiced frame extends over any trailing partial frame
+            if ends[-1] == len(padded):
+                segments[-1] = (segments[-1][0], len(audio_np))
+        
+        return VadResult(
+            is_speech=is_speech,
+            speech_ratio=speech_ratio,
+            start=segments[0][0] if segments else 0,
+            end=segments[-1][1] if segments else 0,
+            segments=segments,
+            frames=frames,
+            frame_energy=energy,
+            frame_flags=flags,
+            frame_length=self.frame_length,
+            sample_rate=self.sample_rate
+        )
+    
+    def trim(self, audio_np: np.ndarray, result: VadResult) -> np.ndarray:
+        """Trim leading and trailing silence (view, no copy)."""
+        if not result.segments:
+            return audio_np[:0]
+        return audio_np[result.start:result.end] 
\ No newline at end of file
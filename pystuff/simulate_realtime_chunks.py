@@ -1,62 +1,328 @@
-import soundfile as sf
+"""
+Real-time Load Simulator
+Replays audio files as many concurrent real-time WebSocket clients against
+ws_main's /ws/audio endpoint and reports end-to-end latency percentiles,
+late, unanswered and server-refused chunks and server-reported processing times.
+
+Usage:
+    python ws_main.py &
+    python simulate_realtime_chunks.py input.mp3 --clients 20 --chunk-seconds 1.0
+    python simulate_realtime_chunks.py a.wav b.wav --clients 50 --speed 2 --jitter-ms 80 \\
+        --churn-chunks 30 --ramp-up 10 --output report.json
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import random
+import sys
 import time
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional, Tuple
+
 import numpy as np
-import os
-import subprocess
-
-CHUNK_SEC = 1  # 1 second per chunk
-AUDIO_FILE = "/Users/aakarshika/Dev/audio_ai_tone/pystuff/input_lori_jo.mp3"  # Change as needed
-WAV_FILE = AUDIO_FILE.replace('.mp3', '.wav')
-
-# Convert MP3 to WAV using ffmpeg if needed
-def convert_mp3_to_wav(mp3_path, wav_path):
-    if not os.path.exists(mp3_path):
-        raise FileNotFoundError(f"[SIM] MP3 file not found: {mp3_path}")
-    print(f"[SIM] Converting {mp3_path} to {wav_path} using ffmpeg...")
-    result = subprocess.run([
-        "ffmpeg", "-y", "-i", mp3_path, wav_path
-    ], capture_output=True)
-    if result.returncode != 0:
-        print(result.stderr.decode())
-        raise RuntimeError(f"[SIM] ffmpeg conversion failed!")
-    print(f"[SIM] Conversion complete.")
-
-# Placeholder for backend processing (replace with real API call)
-def process_chunk(chunk_data, sample_rate, chunk_idx):
-    print(f"[SIM] Processing chunk {chunk_idx+1}, samples={len(chunk_data)}")
-    # Simulate backend processing delay
-    time.sleep(0.2)
-    # Simulate transcript result
-    return f"Transcript for chunk {chunk_idx+1} ({len(chunk_data)/sample_rate:.1f}s)"
-
-def split_audio_chunks(data, sample_rate, chunk_sec=CHUNK_SEC):
-    chunk_samples = int(chunk_sec * sample_rate)
-    total_samples = len(data)
-    chunks = []
-    for start in range(0, total_samples, chunk_samples):
-        end = min(start + chunk_samples, total_samples)
-        chunk = data[start:end]
-        chunks.append(chunk)
+
+from pipeline.audio_processor import AudioProcessor
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+# Reply statuses for chunks the server refused (queue overflow, no capacity) rather than transcribed
+REFUSED_STATUSES = ("dropped", "busy")
+
+
+@dataclass
+class ChunkRecord:
+    """Timing of one chunk from send to first reply."""
+    client: int
+    connection: int
+    chunk_idx: int
+    audio_seconds: float
+    scheduled_at: float  # When a live microphone would have produced the chunk
+    sent_at: float
+    received_at: Optional[float] = None
+    status: Optional[str] = None  # Server status / event type, None if never answered
+    server_time: Optional[float] = None  # Server-reported processing_time
+    
+    @property
+    def latency(self) -> Optional[float]:
+        """Send to first reply, in seconds."""
+        return None if self.received_at is None else self.received_at - self.sent_at
+
+
+@dataclass
+class SimulationStats:
+    """Everything recorded during a run."""
+    records: List[ChunkRecord]
+    connections: int = 0
+    connection_errors: int = 0
+    started_at: float = 0.0
+    finished_at: float = 0.0
+
+
+def load_chunks(filepath: str, chunk_seconds: float, sample_rate: int) -> List[np.ndarray]:
+    """
+    Decode an audio file (anything soundfile or ffmpeg reads) into fixed-size chunks.
+    
+    Args:
+        filepath: Audio file to replay
+        chunk_seconds: Audio per chunk
+        sample_rate: Rate the simulated client sends at
+    
+    Returns:
+        List of mono float32 chunks
+    """
+    processor = AudioProcessor(sample_rate)
+    chunks = [chunk for chunk, _ in processor.iter_file_chunks(filepath, chunk_seconds, 0.0, sample_rate)]
+    if not chunks:
+        raise ValueError(f"No audio decoded from {filepath}")
+    print(f"[SIM] Loaded {filepath}: {len(chunks)} chunks of {chunk_seconds}s at {sample_rate} Hz")
     return chunks
 
-def main():
-    # Convert MP3 to WAV if needed
-    if AUDIO_FILE.endswith('.mp3'):
-        if not os.path.exists(WAV_FILE):
-            convert_mp3_to_wav(AUDIO_FILE, WAV_FILE)
-        audio_path = WAV_FILE
-    else:
-        audio_path = AUDIO_FILE
-    print(f"[SIM] Loading audio file: {audio_path}")
-    data, sample_rate = sf.read(audio_path)
-    if data.ndim > 1:
-        data = data[:, 0]  # Use first channel if stereo
-    chunks = split_audio_chunks(data, sample_rate)
-    print(f"[SIM] Split into {len(chunks)} chunks of {CHUNK_SEC}s each.")
-    for idx, chunk in enumerate(chunks):
-        result = process_chunk(chunk, sample_rate, idx)
-        print(f"[SIM] Result: {result}")
-        time.sleep(0.5)  # Simulate real-time delay between chunks
+
+def encode_message(processor: AudioProcessor, audio_np: np.ndarray, sample_rate: int,
+                   chunk_idx: int, audio_format: str) -> Any:
+    """Encode a chunk as a binary frame or a JSON/base64 message."""
+    if audio_format == "binary":
+        return processor.encode_binary_frame(audio_np, sample_rate, chunk_idx)
+    return json.dumps({
+        "chunk_idx": chunk_idx,
+        "sample_rate": sample_rate,
+        "audio": base64.b64encode(audio_np.astype(np.float32).tobytes()).decode("ascii")
+    })
+
+
+async def run_client(client_idx: int, chunks: List[np.ndarray], args: argparse.Namespace,
+                     stats: SimulationStats) -> None:
+    """
+    One simulated microphone client.
+    
+    Chunks are sent on a real-time schedule (scaled by --speed, perturbed by
+    --jitter-ms). With --churn-chunks the client reconnects after that many
+    chunks, continuing from where it left off on a fresh session.
+    """
+    rng = random.Random(args.seed + client_idx)
+    processor = AudioProcessor(args.sample_rate)
+    
+    # Rotate the start and add a faint per-client noise floor so clients replaying
+    # the same file do not hit the server's content-addressed result cache
+    start = (client_idx * 7) % len(chunks)
+    schedule = (chunks[start:] + chunks[:start]) * args.loops
+    noise = np.random.default_rng(args.seed + client_idx)
+    
+    await asyncio.sleep(rng.uniform(0.0, args.ramp_up))
+    chunk_seconds = args.chunk_seconds
+    stream_start = time.perf_counter()
+    position = 0
+    connection = 0
+    
+    while position < len(schedule):
+        connection += 1
+        pending: Dict[int, ChunkRecord] = {}
+        try:
+            async with websockets.connect(args.url, max_size=None, open_timeout=args.timeout) as ws:
+                stats.connections += 1
+                await ws.send(json.dumps({"type": "hello", "format": args.format, "mode": args.mode}))
+                hello = json.loads(await asyncio.wait_for(ws.recv(), args.timeout))
+                if "error" in hello:
+                    raise RuntimeError(hello["error"])
+                
+                async def receive() -> None:
+                    async for message in ws:
+                        reply = json.loads(message)
+                        # A coalesced reply answers every chunk merged into its decode
+                        for idx in reply.get("coalesced") or [reply.get("chunk_idx")]:
+                            record = pending.pop(idx, None)
+                            if record is None:
+                                continue
+                            record.received_at = time.perf_counter()
+                            record.status = reply.get("status") or reply.get("type")
+                            record.server_time = reply.get("processing_time")
+                
+                receiver = asyncio.create_task(receive())
+                chunk_idx = 0
+                while position < len(schedule) and (not args.churn_chunks or chunk_idx < args.churn_chunks):
+                    audio_np = schedule[position]
+                    if not args.allow_cache_hits:
+                        audio_np = audio_np + noise.normal(0.0, 1e-4, len(audio_np)).astype(np.float32)
+                    
+                    # A live microphone hands over chunk N once N + 1 chunks of audio exist
+                    if args.speed:
+                        scheduled_at = stream_start + (position + 1) * chunk_seconds / args.speed
+                    else:
+                        scheduled_at = time.perf_counter()
+                    jitter = rng.uniform(-args.jitter_ms, args.jitter_ms) / 1000.0
+                    await asyncio.sleep(max(0.0, scheduled_at + jitter - time.perf_counter()))
+                    
+                    record = ChunkRecord(
+                        client=client_idx,
+                        connection=connection,
+                        chunk_idx=chunk_idx,
+                        audio_seconds=len(audio_np) / args.sample_rate,
+                        scheduled_at=scheduled_at,
+                        sent_at=time.perf_counter()
+                    )
+                    pending[chunk_idx] = record
+                    stats.records.append(record)
+                    await ws.send(encode_message(processor, audio_np, args.sample_rate, chunk_idx, args.format))
+                    chunk_idx += 1
+                    position += 1
+                
+                # Give outstanding chunks until the reply timeout, then hang up
+                deadline = time.perf_counter() + args.timeout
+                while pending and time.perf_counter() < deadline and not receiver.done():
+                    await asyncio.sleep(0.05)
+                receiver.cancel()
+                if args.mode == "streaming":
+                    await ws.send(json.dumps({"type": "end"}))
+        except Exception as e:
+            stats.connection_errors += 1
+            print(f"[SIM] Client {client_idx} connection {connection} failed: {e}")
+            # Chunks that were never sent are skipped rather than retried; the stream keeps its pace
+            position += 1
+            await asyncio.sleep(1.0)
+
+
+def percentiles(values: List[float]) -> Optional[Dict[str, float]]:
+    """p50/p90/p95/p99/max in milliseconds."""
+    if not values:
+        return None
+    array = np.asarray(values) * 1000.0
+    return {
+        "p50_ms": float(np.percentile(array, 50)),
+        "p90_ms": float(np.percentile(array, 90)),
+        "p95_ms": float(np.percentile(array, 95)),
+        "p99_ms": float(np.percentile(array, 99)),
+        "max_ms": float(array.max()),
+        "count": len(values)
+    }
+
+
+def build_report(stats: SimulationStats, args: argparse.Namespace) -> Dict[str, Any]:
+    """Summarise latencies, late, unanswered and refused chunks."""
+    deadline = args.deadline_ms / 1000.0 if args.deadline_ms else args.chunk_seconds
+    replied = [record for record in stats.records if record.received_at is not None]
+    answered = [record for record in replied if record.status not in REFUSED_STATUSES]
+    dropped = [record for record in replied if record.status == "dropped"]
+    busy = [record for record in replied if record.status == "busy"]
+    unanswered = [record for record in stats.records if record.received_at is None]
+    late = [record for record in answered if record.latency > deadline]
+    statuses: Dict[str, int] = {}
+    for record in replied:
+        statuses[record.status] = statuses.get(record.status, 0) + 1
+    
+    wall = stats.finished_at - stats.started_at
+    audio_seconds = sum(record.audio_seconds for record in answered)
+    return {
+        "config": {
+            "url": args.url,
+            "clients": args.clients,
+            "chunk_seconds": args.chunk_seconds,
+            "speed": args.speed,
+            "jitter_ms": args.jitter_ms,
+            "churn_chunks": args.churn_chunks,
+            "format": args.format,
+            "mode": args.mode,
+            "deadline_ms": deadline * 1000.0
+        },
+        "chunks_sent": len(stats.records),
+        "chunks_answered": len(answered),
+        "chunks_dropped": len(dropped),
+        "chunks_busy": len(busy),
+        "chunks_unanswered": len(unanswered),
+        "chunks_late": len(late),
+        "drop_rate": len(dropped) / len(stats.records) if stats.records else 0.0,
+        "busy_rate": len(busy) / len(stats.records) if stats.records else 0.0,
+        "unanswered_rate": len(unanswered) / len(stats.records) if stats.records else 0.0,
+        "late_rate": len(late) / len(answered) if answered else 0.0,
+        "statuses": statuses,
+        "connections": stats.connections,
+        "connection_errors": stats.connection_errors,
+        "wall_seconds": wall,
+        "audio_seconds_per_second": audio_seconds / wall if wall > 0 else 0.0,
+        "latency": percentiles([record.latency for record in answered]),
+        "success_latency": percentiles([record.latency for record in answered if record.status == "success"]),
+        "server_processing_time": percentiles([record.server_time for record in answered if record.server_time is not None]),
+        "send_lag": percentiles([max(0.0, record.sent_at - record.scheduled_at) for record in stats.records])
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """Human-readable summary of a report."""
+    print("\n[SIM] ===== Load test report =====")
+    print(f"[SIM] {report['config']['clients']} clients, {report['chunks_sent']} chunks sent, "
+          f"{report['connections']} connections ({report['connection_errors']} errors)")
+    print(f"[SIM] Answered {report['chunks_answered']}, late {report['chunks_late']} ({report['late_rate']:.1%}) "
+          f"beyond {report['config']['deadline_ms']:.0f}ms")
+    print(f"[SIM] Refused by the server: dropped {report['chunks_dropped']} ({report['drop_rate']:.1%}), "
+          f"busy {report['chunks_busy']} ({report['busy_rate']:.1%}); "
+          f"unanswered {report['chunks_unanswered']} ({report['unanswered_rate']:.1%})")
+    print(f"[SIM] Statuses: {report['statuses']}")
+    print(f"[SIM] Throughput: {report['audio_seconds_per_second']:.1f} audio s/s")
+    for key in ("latency", "success_latency", "server_processing_time", "send_lag"):
+        stats = report[key]
+        if stats:
+            print(f"[SIM] {key:24s} p50 {stats['p50_ms']:8.1f}ms  p90 {stats['p90_ms']:8.1f}ms  "
+                  f"p95 {stats['p95_ms']:8.1f}ms  p99 {stats['p99_ms']:8.1f}ms  max {stats['max_ms']:8.1f}ms")
+
+
+async def simulate(args: argparse.Namespace) -> Tuple[SimulationStats, Dict[str, Any]]:
+    """Run all clients and build the report."""
+    files = [load_chunks(path, args.chunk_seconds, args.sample_rate) for path in args.files]
+    stats = SimulationStats(records=[])
+    stats.started_at = time.perf_counter()
+    await asyncio.gather(*[
+        run_client(idx, files[idx % len(files)], args, stats)
+        for idx in range(args.clients)
+    ])
+    stats.finished_at = time.perf_counter()
+    return stats, build_report(stats, args)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay audio files as concurrent real-time WebSocket clients")
+    parser.add_argument("files", nargs="+", help="Audio files to replay (round-robin across clients)")
+    parser.add_argument("--url", default="ws://127.0.0.1:8000/ws/audio", help="WebSocket endpoint")
+    parser.add_argument("--clients", type=int, default=1, help="Concurrent clients")
+    parser.add_argument("--chunk-seconds", type=float, default=1.0, help="Audio per chunk")
+    parser.add_argument("--sample-rate", type=int, default=16000, help="Sample rate clients send at")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="Pacing relative to real time (2 = twice as fast, 0 = no pacing)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform +/- jitter on each send")
+    parser.add_argument("--churn-chunks", type=int, default=0,
+                        help="Reconnect after this many chunks (0 = keep one connection)")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="Spread client start times over this many seconds")
+    parser.add_argument("--loops", type=int, default=1, help="Times each client replays its file")
+    parser.add_argument("--format", choices=("binary", "json"), default="binary", help="Audio wire format")
+    parser.add_argument("--mode", choices=("chunk", "streaming"), default="chunk", help="Server session mode")
+    parser.add_argument("--deadline-ms", type=float, default=0.0,
+                        help="Replies slower than this are late (default: chunk duration)")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Seconds to wait for replies before hanging up")
+    parser.add_argument("--allow-cache-hits", action="store_true",
+                        help="Send identical audio from every client (no per-client noise)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for jitter and noise")
+    parser.add_argument("--output", help="Write the JSON report (and per-chunk records) to this file")
+    return parser.parse_args(argv)
+
+
+def main() -> int:
+    args = parse_args()
+    if websockets is None:
+        print("[SIM] The websockets package is required: pip install websockets")
+        return 1
+    
+    stats, report = asyncio.run(simulate(args))
+    print_report(report)
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"report": report, "records": [asdict(record) for record in stats.records]}, f, indent=2)
+        print(f"[SIM] Report written to {args.output}")
+    return 0
+
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main()) 
\ No newline at end of file
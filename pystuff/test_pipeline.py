@@ -5,9 +5,36 @@ Validates the new pipeline architecture and components.
 
 import asyncio
 import base64
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
+import soundfile as sf
 import logging
 from pipeline import PipelineOrchestrator, PipelineConfig, AudioProcessor, TranscriptionProcessor
+from pipeline.vad import VoiceActivityDetector
+from pipeline.merge import merge_chunk_results
+from pipeline.cache import TranscriptionCache
+from pipeline.model_registry import ModelRegistry
+from pipeline.metrics import PipelineMetrics
+from pipeline.diarization import SpeakerDiarizer, assign_speakers
+from pipeline.emotion import EmotionDetector
+from pipeline.scene import SceneClassifier
+from pipeline.ipc import MESSAGE_PREFIX, encode_message
+from pipeline.shm_ring import SharedAudioRing
+from pipeline.backpressure import AdmissionController, QueuedChunk, SessionQueue
+from pipeline.accumulator import PendingChunk
+from pipeline.features import IncrementalLogMel, PrecomputedFeatureExtractor
+from pipeline.dsp import resample, slaney_mel_filterbank
+from pipeline.streaming import StreamingTranscriber
+from pipeline.batching import BatchScheduler, BatchSchedulerClosed
+from pipeline.inference_pool import InferencePool, InferenceQueueFull
+import pipeline.transcription as transcription_module
+import pipeline.audio_processor as audio_processor_module
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -30,6 +57,36 @@ def create_test_audio(duration_seconds: float = 3.0, sample_rate: int = 16000) -
         return wav_io.read()
 
 
+def create_speech_like_audio(duration_seconds: float = 1.0, sample_rate: int = 16000) -> np.ndarray:
+    """Create a harmonic signal with a syllable-rate amplitude envelope."""
+    t = np.arange(int(sample_rate * duration_seconds)) / sample_rate
+    pitch = 140 + 20 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+    voice = sum(np.sin(k * phase) / k for k in range(1, 8))
+    envelope = 0.5 * (1 + np.sin(2 * np.pi * 4 * t))
+    return (0.2 * voice * envelope).astype(np.float32)
+
+
+def create_voice(pitch_hz: float, formants, duration: float, seed: int) -> np.ndarray:
+    """Create a syllabic voice with a given pitch and formant frequencies (a synthetic speaker)."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(16000 * duration)) / 16000
+    phase = 2 * np.pi * np.cumsum(pitch_hz * (1 + 0.05 * np.sin(2 * np.pi * 0.5 * t))) / 16000
+    harmonics = sum(
+        np.sin(k * phase) * sum(np.exp(-(k * pitch_hz - f) ** 2 / 45000.0) for f in formants)
+        for k in range(1, 40)
+    )
+    envelope = np.maximum(0.0, np.sin(2 * np.pi * 3 * t)) ** 2
+    audio = 0.3 * harmonics * envelope / np.abs(harmonics).max()
+    return (audio + 0.002 * rng.standard_normal(len(t))).astype(np.float32)
+
+
+def run_async(coro_fn):
+    """Run a coroutine function on its own event loop (also from inside main()'s loop)."""
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro_fn()).result()
+
+
 def test_audio_processor():
     """Test the audio processor module."""
     logger.info("Testing AudioProcessor...")
@@ -52,6 +109,345 @@ def test_audio_processor():
     return True
 
 
+def test_binary_frames():
+    """Test binary WebSocket frame encoding/decoding."""
+    logger.info("Testing binary audio frames...")
+    
+    processor = AudioProcessor()
+    audio_np = (np.sin(np.linspace(0, 100, 16000)) * 0.1).astype(np.float32)
+    
+    frame = processor.encode_binary_frame(audio_np, 16000, 7)
+    decoded, sample_rate, chunk_idx = processor.decode_binary_frame(frame)
+    
+    assert chunk_idx == 7 and sample_rate == 16000
+    assert np.array_equal(decoded, audio_np)
+    logger.info(f"Binary frame round trip successful: {len(frame)} bytes")
+    
+    return True
+
+
+def test_resample_audio():
+    """Test in-process resampling of browser sample rates to 16 kHz."""
+    logger.info("Testing resample_audio...")
+    
+    processor = AudioProcessor()
+    for original_rate in (44100, 48000, 8000):
+        t = np.arange(original_rate) / original_rate
+        tone = np.sin(2 * np.pi * 440 * t).astype(np.float32)
+        
+        resampled = processor.resample_audio(tone, original_rate, 16000)
+        expected = np.sin(2 * np.pi * 440 * np.arange(16000) / 16000)
+        
+        assert len(resampled) == 16000 and resampled.dtype == np.float32
+        # Ignore filter edge effects at both ends
+        error = np.max(np.abs(resampled[1000:-1000] - expected[1000:-1000]))
+        logger.info(f"Resampled {original_rate} Hz -> 16000 Hz, max error {error:.4f}")
+        assert error < 0.01
+    
+    return True
+
+
+def test_voice_activity_detector():
+    """Test the VAD gate on silence and on a loud burst."""
+    logger.info("Testing VoiceActivityDetector...")
+    
+    vad = VoiceActivityDetector(sample_rate=16000)
+    
+    silence = np.zeros(16000 * 2, dtype=np.float32)
+    assert not vad.analyze(silence).is_speech
+    
+    burst = silence.copy()
+    burst[16000:24000] = create_speech_like_audio(0.5)
+    result = vad.analyze(burst)
+    logger.info(f"VAD ({vad.backend}): speech={result.is_speech}, ratio={result.speech_ratio:.2f}, "
+                f"voiced={result.start}-{result.end}")
+    if vad.backend == "energy":
+        assert result.is_speech and result.start <= 16000 and result.end >= 24000
+    
+    return True
+
+
+def test_merge_chunk_results():
+    """Test de-duplication of words transcribed twice in an overlap."""
+    logger.info("Testing merge_chunk_results...")
+    
+    def word(text, start, end):
+        return {"word": text, "start": start, "end": end}
+    
+    # Chunks 0-5s and 4.5-9.5s; "world" (4.6-4.9s absolute) falls in the overlap
+    results = [
+        {"chunk_idx": 0, "start_time": 0.0, "duration": 5.0, "status": "success", "segments": [
+            {"start": 0.0, "end": 4.9, "text": "hello world", "speaker": "SPEAKER_00", "emotion": "happy",
+             "words": [word(" hello", 0.5, 1.0), word(" world", 4.6, 4.9)]}
+        ]},
+        {"chunk_idx": 1, "start_time": 4.5, "duration": 5.0, "status": "success", "segments": [
+            {"start": 0.1, "end": 2.0, "text": "world again", "speaker": "SPEAKER_01", "emotion": "angry",
+             "words": [word(" world", 0.1, 0.4), word(" again", 1.5, 2.0)]}
+        ]}
+    ]
+    merged = merge_chunk_results(results)
+    logger.info(f"Merged transcript: {merged['text']}")
+    
+    assert merged["text"] == "hello world again"
+    assert merged["segments"][-1]["end"] == 6.5
+    # Labels survive the re-split at word level
+    assert [(segment["speaker"], segment["emotion"]) for segment in merged["segments"]] == [
+        ("SPEAKER_00", "happy"), ("SPEAKER_01", "angry")
+    ]
+    
+    return True
+
+
+def test_transcription_cache():
+    """Test content-addressed caching and LRU eviction."""
+    logger.info("Testing TranscriptionCache...")
+    
+    cache = TranscriptionCache(max_memory_bytes=200)
+    audio_np = create_speech_like_audio(0.5)
+    
+    key = TranscriptionCache.make_key(audio_np, model_size="tiny", language=None)
+    assert key != TranscriptionCache.make_key(audio_np, model_size="small", language=None)
+    assert cache.get(key) is None
+    
+    cache.put(key, {"text": "hello", "segments": []})
+    assert cache.get(key)["text"] == "hello"
+    
+    # A second large entry pushes the first out of the 200 byte budget
+    cache.put("other", {"text": "x" * 150, "segments": []})
+    assert cache.get(key) is None
+    
+    stats = cache.get_stats()
+    logger.info(f"Cache stats: {stats}")
+    assert stats["hits"] == 1 and stats["misses"] == 2
+    
+    return True
+
+
+def test_model_registry():
+    """Test lazy loading, load sharing and LRU eviction of warm models."""
+    logger.info("Testing ModelRegistry...")
+    
+    class FakeProcessor:
+        def __init__(self, model_size, device, compute_type):
+            self.model_size, self.device, self.compute_type = model_size, device, compute_type
+        
+        def is_model_loaded(self):
+            return True
+    
+    loads = []
+    def factory(model_size, device, compute_type):
+        loads.append(model_size)
+        return FakeProcessor(model_size, device, compute_type)
+    
+    registry = ModelRegistry(factory, max_warm=2)
+    registry.pin("base", "cpu", "int8")
+    base = registry.get("base", "cpu", "int8")
+    assert registry.get("base", "cpu", "int8") is base and loads == ["base"]
+    
+    registry.get("tiny", "cpu", "int8")
+    registry.get("small", "cpu", "int8")
+    # tiny is the least recently used unpinned model; the pinned default survives
+    assert not registry.is_warm("tiny", "cpu", "int8")
+    assert registry.is_warm("base", "cpu", "int8") and registry.is_warm("small", "cpu", "int8")
+    
+    stats = registry.get_stats()
+    logger.info(f"Registry stats: {stats}")
+    assert stats["loads"] == 3 and stats["evictions"] == 1
+    
+    return True
+
+
+def test_pipeline_metrics():
+    """Test stage histograms, real-time factor and Prometheus rendering."""
+    logger.info("Testing PipelineMetrics...")
+    
+    metrics = PipelineMetrics()
+    for seconds in (0.002, 0.004, 0.2):
+        metrics.observe("prepare", seconds)
+    with metrics.time("normalize"):
+        create_speech_like_audio(1.0)
+    assert metrics.observe_rtf(0.5, 2.0) == 0.25
+    metrics.increment("chunks_processed")
+    
+    stats = metrics.get_stats()
+    logger.info(f"Metrics stats: {stats}")
+    assert stats["stages"]["prepare"]["count"] == 3
+    assert 0.0025 <= stats["stages"]["prepare"]["p50"] <= 0.005
+    
+    text = metrics.render_prometheus({"active_sessions": 2})
+    assert 'tone_stage_duration_seconds_bucket{stage="prepare",le="+Inf"} 3' in text
+    assert "tone_real_time_factor_count 1" in text
+    assert "tone_active_sessions 2" in text
+    
+    return True
+
+
+def test_speaker_diarization():
+    """Test that two synthetic voices get distinct speaker labels that persist across chunks."""
+    logger.info("Testing SpeakerDiarizer...")
+    
+    voice = create_voice
+    diarizer = SpeakerDiarizer(backend="mfcc")
+    vad = VoiceActivityDetector()
+    speakers = diarizer.new_clusterer()
+    pause = np.zeros(8000, dtype=np.float32)
+    
+    for seed in range(3):
+        audio = np.concatenate([voice(110, (700, 1200), 2.0, seed), pause, voice(210, (400, 2000), 2.0, seed + 10)])
+        turns = diarizer.diarize(audio, speakers, vad.analyze(audio))
+        logger.info(f"Speaker turns: {turns}")
+        assert [turn["speaker"] for turn in turns] == ["SPEAKER_00", "SPEAKER_01"]
+    assert speakers.num_speakers == 2
+    
+    segments = [{"start": 0.2, "end": 1.8, "text": "a", "words": [{"word": " a", "start": 0.2, "end": 0.6}]},
+                {"start": 2.6, "end": 4.0, "text": "b"}]
+    labelled = assign_speakers(segments, turns)
+    assert labelled[0]["speaker"] == labelled[0]["words"][0]["speaker"] == "SPEAKER_00"
+    assert labelled[1]["speaker"] == "SPEAKER_01"
+    
+    return True
+
+
+def test_emotion_detection():
+    """Test pitch tracking and batched per-segment emotion labels on contrasting prosody."""
+    logger.info("Testing EmotionDetector...")
+    
+    def voice(pitch_hz, swing_semitones, syllables_per_second, level, tilt, duration=3.0):
+        t = np.arange(int(16000 * duration)) / 16000
+        pitch = pitch_hz * 2 ** (swing_semitones / 12 * np.sin(2 * np.pi * 0.7 * t))
+        phase = 2 * np.pi * np.cumsum(pitch) / 16000
+        harmonics = sum(np.sin(k * phase) * k ** -tilt for k in range(1, 30))
+        envelope = np.maximum(0.0, np.sin(np.pi * syllables_per_second * t)) ** 2
+        return (level * harmonics * envelope / np.abs(harmonics).max()).astype(np.float32)
+    
+    # Flat, low, slow and dark followed by high, lively and bright
+    audio = np.concatenate([voice(110, 0.5, 2.5, 0.1, 2.0), voice(220, 5.0, 5.0, 0.4, 1.0)])
+    vad = VoiceActivityDetector()
+    detector = EmotionDetector()
+    prosody = detector.analyze(audio, vad.analyze(audio))
+    
+    first_half = prosody.pitch[:len(prosody.pitch) // 2]
+    assert abs(np.median(first_half[first_half > 0]) - 110) < 5
+    
+    segments = [{"start": 0.0, "end": 3.0, "text": "a"}, {"start": 3.0, "end": 6.0, "text": "b"},
+                {"start": 6.5, "end": 7.0, "text": ""}]
+    labelled = detector.label_segments(prosody, segments)
+    logger.info(f"Emotion labels: {[(s.get('emotion'), s.get('emotion_confidence')) for s in labelled]}")
+    assert labelled[0]["emotion"] == "sad" and labelled[1]["emotion"] == "happy"
+    assert "emotion" not in labelled[2]
+    
+    return True
+
+
+def test_scene_classifier():
+    """Test that scene beats follow an argument from calm through conflict to resolution."""
+    logger.info("Testing SceneClassifier...")
+    
+    dialogue = [
+        ("A", "neutral", "Hi, how was your day?"),
+        ("B", "neutral", "Fine, thanks."),
+        ("A", "neutral", "Did you call the bank?"),
+        ("B", "angry", "No! I never said I would!"),
+        ("A", "angry", "You always do this, it's your fault!"),
+        ("B", "angry", "Stop blaming me!"),
+        ("A", "sad", "I'm sorry. I didn't mean it."),
+        ("B", "neutral", "Okay. Let's talk about this together."),
+        ("A", "neutral", "Thanks, I understand."),
+        ("B", "neutral", "Sure."),
+        ("A", "neutral", "Great."),
+        ("B", "neutral", "See you at seven."),
+        ("A", "neutral", "Bye.")
+    ]
+    scene = SceneClassifier(window_seconds=20.0)
+    beats = []
+    for i, (speaker, emotion, text) in enumerate(dialogue):
+        state = scene.update({"start": 2.0 * i, "end": 2.0 * i + 2.0, "speaker": speaker,
+                              "emotion": emotion, "text": text})
+        beats.append(state["beat"])
+    logger.info(f"Scene beats: {beats}")
+    
+    assert beats[:3] == ["calm"] * 3
+    assert beats[3] == "conflict"
+    assert "resolution" in beats[6:]
+    assert beats[-1] == "calm"
+    
+    return True
+
+
+def test_worker_routing():
+    """Test IPC framing and session placement across inference workers."""
+    logger.info("Testing worker routing...")
+    import json
+    import tempfile
+    from ws_cluster import WorkerPool
+    
+    payload = np.arange(4, dtype=np.float32).tobytes()
+    message = encode_message({"op": "message", "session": "abc"}, payload)
+    header_length, payload_length = MESSAGE_PREFIX.unpack_from(message)
+    header = json.loads(message[MESSAGE_PREFIX.size:MESSAGE_PREFIX.size + header_length])
+    assert header == {"op": "message", "session": "abc"}
+    assert message[MESSAGE_PREFIX.size + header_length:] == payload and payload_length == len(payload)
+    
+    pool = WorkerPool(3, tempfile.mkdtemp(prefix="tone-test-"))
+    assert pool.assign("s0") is None  # nothing spawned yet
+    for worker in pool.workers:
+        worker.healthy = True
+        worker.health = {"ready": True, "inference_pending": 0, "inference_capacity": 8}
+    pool.workers[0].health["ready"] = False  # still warming up
+    pool.workers[1].sessions["busy"] = None
+    pool.workers[2].healthy = False
+    assert pool.assign("s1") is pool.workers[1]  # only healthy, warm worker
+    pool.workers[2].healthy = True
+    assert pool.assign("s2") is pool.workers[2]  # least loaded
+    pool.workers[2].sessions["s2"] = None
+    assert pool.route("s2") is pool.workers[2]
+    assert 'tone_worker_sessions{worker="2"} 1' in pool.render_metrics()
+    
+    return True
+
+
+def test_shared_audio_ring():
+    """Test zero-copy reads, slot leases and overflow of the shared-memory audio ring."""
+    logger.info("Testing SharedAudioRing...")
+    
+    producer = SharedAudioRing.create(num_slots=2, slot_samples=1600)
+    consumer = SharedAudioRing.attach(producer.name)
+    try:
+        chunk = create_speech_like_audio(0.1)
+        first = producer.try_write(chunk, chunk_idx=7, sample_rate=16000)
+        second = producer.try_write(chunk[:800], chunk_idx=8, sample_rate=16000)
+        assert first is not None and second is not None
+        assert producer.try_write(chunk, 9, 16000) is None  # both slots leased
+        assert producer.overflows == 1
+        
+        audio_np, chunk_idx, sample_rate = consumer.read(*first)
+        assert (chunk_idx, sample_rate) == (7, 16000)
+        assert np.array_equal(audio_np, chunk) and not audio_np.flags.writeable
+        tail = audio_np[800:]
+        del audio_np
+        assert producer.try_write(chunk, 9, 16000) is None  # a derived view still holds the lease
+        del tail
+        third = producer.try_write(chunk, 9, 16000)
+        assert third is not None and third[0] == first[0]  # slot recycled
+        
+        try:
+            consumer.read(*first)  # stale sequence
+            assert False, "stale slot was readable"
+        except ValueError:
+            pass
+        try:
+            producer.try_write(np.zeros(1601, dtype=np.float32), 10, 16000)
+            assert False, "oversized chunk was accepted"
+        except ValueError:
+            pass
+        logger.info(f"Ring stats: {producer.get_stats()}")
+    finally:
+        consumer.close()
+        producer.close()
+    
+    return True
+
+
 def test_transcription_processor():
     """Test the transcription processor module."""
     logger.info("Testing TranscriptionProcessor...")
@@ -75,6 +471,554 @@ def test_transcription_processor():
         return False
 
 
+def test_inference_pool_waiters():
+    """Test that callers waiting for an inference slot are served in order and cancellation frees nothing twice."""
+    logger.info("Testing inference pool slot waiting...")
+    
+    pool = InferencePool(max_workers=1, max_pending=1)
+    release = threading.Event()
+    ran = []
+    
+    def work(name):
+        if name == "first":
+            release.wait(5.0)
+        ran.append(name)
+        return name
+    
+    async def scenario():
+        first = asyncio.create_task(pool.run(work, "first"))
+        await asyncio.sleep(0.05)
+        waiters = {}
+        for name in ("a", "b", "c"):
+            waiters[name] = asyncio.create_task(pool.run(work, name, wait_for_slot=True))
+            await asyncio.sleep(0.01)
+        assert pool.get_stats()["waiting"] == 3
+        
+        # Callers that do not wait are still refused while others wait in line
+        try:
+            await pool.run(work, "impatient")
+            assert False, "a full pool accepted a request"
+        except InferenceQueueFull:
+            pass
+        
+        waiters["b"].cancel()
+        release.set()
+        results = await asyncio.gather(first, waiters["a"], waiters["c"])
+        assert results == ["first", "a", "c"]
+        assert waiters["b"].cancelled()
+    
+    try:
+        run_async(scenario)
+    finally:
+        release.set()
+        pool.shutdown()
+    
+    assert ran == ["first", "a", "c"]
+    stats = pool.get_stats()
+    assert stats["pending"] == 0 and stats["waiting"] == 0
+    
+    logger.info(f"Waiters served in order: {ran}")
+    return True
+
+
+def test_batch_scheduler():
+    """Test grouping of concurrent chunks into batches and fan-out of their results."""
+    logger.info("Testing batch scheduler...")
+    
+    calls = []
+    
+    def batch_fn(audio_arrays, language):
+        calls.append(([int(audio[0]) for audio in audio_arrays], language))
+        if language == "xx":
+            raise RuntimeError("decoder failed")
+        return [{"text": f"chunk {int(audio[0])}", "language": language} for audio in audio_arrays]
+    
+    def audio(idx):
+        return np.full(1600, idx, dtype=np.float32)
+    
+    async def scenario():
+        pool = InferencePool(max_workers=2, max_pending=8)
+        scheduler = BatchScheduler(batch_fn, pool, max_batch_size=3, max_wait_ms=100)
+        try:
+            # Five concurrent chunks close one full batch of three, then one of two on the deadline
+            results = await asyncio.gather(*[scheduler.submit(audio(idx), idx) for idx in range(5)])
+            assert [r["chunk_idx"] for r in results] == list(range(5))
+            assert [r["text"] for r in results] == [f"chunk {idx}" for idx in range(5)]
+            assert sorted(len(ids) for ids, _ in calls) == [2, 3]
+            
+            # A chunk arriving after the deadline gets a batch of its own
+            calls.clear()
+            first = asyncio.ensure_future(scheduler.submit(audio(10), 10))
+            await asyncio.sleep(0.3)
+            second = await scheduler.submit(audio(11), 11)
+            assert (await first)["chunk_idx"] == 10 and second["chunk_idx"] == 11
+            assert [ids for ids, _ in calls] == [[10], [11]]
+            
+            # Different forced languages are decoded in separate groups
+            calls.clear()
+            results = await asyncio.gather(
+                scheduler.submit(audio(20), 20, "en"), scheduler.submit(audio(21), 21, "fr"),
+                scheduler.submit(audio(22), 22, "en")
+            )
+            assert [(r["chunk_idx"], r["language"]) for r in results] == [(20, "en"), (21, "fr"), (22, "en")]
+            assert sorted(calls, key=lambda call: call[1]) == [([20, 22], "en"), ([21], "fr")]
+            
+            # A failing batch fails every chunk in it
+            outcomes = await asyncio.gather(
+                scheduler.submit(audio(30), 30, "xx"), scheduler.submit(audio(31), 31, "xx"),
+                return_exceptions=True
+            )
+            assert all(isinstance(outcome, RuntimeError) and "decoder failed" in str(outcome) for outcome in outcomes)
+            
+            # Chunks not yet dispatched move to a successor, or fail promptly without one
+            slow = BatchScheduler(batch_fn, pool, max_batch_size=8, max_wait_ms=5000)
+            waiting = [asyncio.ensure_future(slow.submit(audio(idx), idx)) for idx in (40, 41)]
+            await asyncio.sleep(0.05)
+            slow.shutdown(successor=scheduler)
+            assert [r["chunk_idx"] for r in await asyncio.gather(*waiting)] == [40, 41]
+            
+            orphan = BatchScheduler(batch_fn, pool, max_batch_size=8, max_wait_ms=5000)
+            waiting = asyncio.ensure_future(orphan.submit(audio(50), 50))
+            await asyncio.sleep(0.05)
+            orphan.shutdown()
+            try:
+                await asyncio.wait_for(waiting, 1.0)
+                assert False, "Chunk of a closed scheduler must not succeed"
+            except BatchSchedulerClosed:
+                pass
+        finally:
+            scheduler.shutdown()
+            pool.shutdown()
+    
+    run_async(scenario)
+    
+    # Config updates keep the scheduler unless batching settings or the pool change
+    config = PipelineConfig()
+    config.transcription.enable_batching = True
+    orchestrator = PipelineOrchestrator(config, load_model=False)
+    scheduler = orchestrator.batch_scheduler
+    assert orchestrator.update_config(PipelineConfig.from_dict(config.to_dict()))
+    assert orchestrator.batch_scheduler is scheduler
+    changed = PipelineConfig.from_dict(config.to_dict())
+    changed.transcription.batch_max_size = 4
+    assert orchestrator.update_config(changed)
+    assert orchestrator.batch_scheduler is not scheduler and orchestrator.batch_scheduler.max_batch_size == 4
+    orchestrator.shutdown()
+    return True
+
+
+def test_transcribe_batch():
+    """Test that transcribe_batch stacks fixed-size windows and falls back to sequential decodes."""
+    logger.info("Testing batched transcription...")
+    
+    class Model:
+        def feature_extractor(self, audio):
+            return np.full((80, len(audio) // 160 + 1), len(audio), dtype=np.float32)
+    
+    processor = TranscriptionProcessor(load_model=False)
+    processor.model = Model()
+    decoded = []
+    sequential = []
+    
+    def decode_features(features, durations, language=None):
+        decoded.append((features.shape, durations, language))
+        return [{"text": f"{duration:.1f}s"} for duration in durations]
+    
+    def transcribe_array(audio, language=None):
+        sequential.append(len(audio))
+        return {"text": "single"}
+    
+    processor._decode_features = decode_features
+    processor.transcribe_array = transcribe_array
+    pad_or_trim = transcription_module.pad_or_trim
+    transcription_module.pad_or_trim = lambda features: np.pad(features, ((0, 0), (0, 3000 - features.shape[1])))
+    try:
+        results = processor.transcribe_batch([np.zeros(16000, np.float32), np.zeros(32000, np.float32)], "en")
+        assert [r["text"] for r in results] == ["1.0s", "2.0s"]
+        assert decoded == [((2, 80, 3000), [1.0, 2.0], "en")] and not sequential
+        
+        # A single chunk, or one longer than a Whisper window, is decoded on its own
+        assert [r["text"] for r in processor.transcribe_batch([np.zeros(16000, np.float32)])] == ["single"]
+        long_batch = [np.zeros(16000, np.float32), np.zeros(16000 * 31, np.float32)]
+        assert [r["text"] for r in processor.transcribe_batch(long_batch)] == ["single", "single"]
+        assert sequential == [16000, 16000, 16000 * 31] and len(decoded) == 1
+    finally:
+        transcription_module.pad_or_trim = pad_or_trim
+    
+    return True
+
+
+def test_stream_decode_timeout():
+    """Test that a streaming decode outliving its timeout keeps exclusive use of the streamer."""
+    logger.info("Testing streaming decode timeout...")
+    
+    config = PipelineConfig()
+    config.audio.enable_vad = False
+    config.transcription.request_timeout = 0.2
+    orchestrator = PipelineOrchestrator(config, load_model=False)
+    calls = []
+    
+    def transcribe(buffer, language, initial_prompt=None, word_timestamps=False, **kwargs):
+        streamer = orchestrator.sessions["s"].streamer
+        state = (streamer.buffer, streamer.buffer_offset, list(streamer.hypothesis))
+        if not calls:
+            time.sleep(0.6)  # Outlives request_timeout
+        calls.append(state == (streamer.buffer, streamer.buffer_offset, list(streamer.hypothesis)) and
+                     streamer.buffer is state[0])
+        end = len(buffer) / 16000
+        return {"segments": [{"words": [{"start": 0.0, "end": end / 2, "word": " one"},
+                                        {"start": end / 2, "end": end, "word": " two"}]}]}
+    
+    async def scenario():
+        session = orchestrator.open_session("s", streaming=True)
+        session.streamer.transcribe_fn = transcribe
+        audio = create_speech_like_audio(1.0)
+        
+        first = await orchestrator.process_stream_chunk("s", audio, 0, 16000)
+        assert [event["type"] for event in first] == ["timeout"]
+        assert not session.stream_decode.done()
+        
+        # The next chunk waits for the first decode instead of mutating the buffer under it
+        second = await orchestrator.process_stream_chunk("s", audio, 1, 16000)
+        assert "timeout" not in [event["type"] for event in second]
+        assert calls == [True, True]
+        assert len(session.streamer.buffer) + round(session.streamer.buffer_offset * 16000) == 32000
+        
+        # Closing while a decode is still running leaves the streamer alone
+        orchestrator.sessions["s"].streamer.transcribe_fn = transcribe
+        calls.clear()
+        third = await orchestrator.process_stream_chunk("s", audio, 2, 16000)
+        assert [event["type"] for event in third] == ["timeout"]
+        assert orchestrator.close_session("s") == []
+        await asyncio.shield(session.stream_decode)
+        assert calls == [True]
+    
+    try:
+        run_async(scenario)
+    finally:
+        orchestrator.shutdown()
+    return True
+
+
+def test_two_pass_refinement():
+    """Test that a two-pass draft goes out first, is corrected in the background, and stops with its session."""
+    logger.info("Testing two-pass draft and refinement...")
+    
+    config = PipelineConfig()
+    config.audio.enable_vad = False
+    config.transcription.two_pass = True
+    config.transcription.inference_workers = 2
+    orchestrator = PipelineOrchestrator(config, load_model=False)
+    
+    def stub_result(text, chunk):
+        duration = len(chunk) / 16000
+        return {"text": text, "language": "en",
+                "segments": [{"start": 0.0, "end": duration, "text": text, "words": []}]}
+    
+    # Draft: the fast model answers immediately with a greedy decode
+    draft_processor = TranscriptionProcessor(model_size="tiny", load_model=False)
+    draft_calls = []
+    
+    def draft(chunk, chunk_idx, language, word_timestamps, beam_size, best_of, *args):
+        draft_calls.append((chunk_idx, beam_size, best_of))
+        return stub_result("hello word", chunk)
+    
+    draft_processor.transcribe_array_chunk = draft
+    orchestrator._get_model = lambda model_size: draft_processor
+    
+    # Refine: the session's model waits until the test lets it finish
+    release = threading.Event()
+    refine_calls = []
+    
+    def refine(chunk, chunk_idx, *args):
+        refine_calls.append(chunk_idx)
+        release.wait(5.0)
+        return stub_result("hello world", chunk)
+    
+    orchestrator.transcription_processor.transcribe_array_chunk = refine
+    
+    async def scenario():
+        sent = []
+        
+        async def on_refined(correction):
+            sent.append(correction)
+        
+        session = orchestrator.open_session("s")
+        audio = create_speech_like_audio(1.0)
+        
+        result = await orchestrator.process_audio_array(audio, 0, 16000, session_id="s", on_refined=on_refined)
+        # The refinement is still blocked, so the draft reply is the first message out
+        assert not sent
+        sent.append(result)
+        assert result["pass"] == "draft" and result["transcript"] == "hello word"
+        assert draft_calls == [(0, config.transcription.draft_beam_size, 1)]
+        assert len(session.refinements) == 1
+        
+        release.set()
+        await asyncio.gather(*session.refinements)
+        correction = sent[1]
+        assert correction["type"] == "correction" and correction["pass"] == "refined"
+        assert correction["chunk_idx"] == result["chunk_idx"]
+        assert correction["transcript"] == "hello world" and correction["draft_transcript"] == "hello word"
+        assert correction["corrected"]
+        
+        # Closing the session cancels refinements still in progress; no correction follows
+        release.clear()
+        # Fresh audio, so the refinement is not answered from the result cache
+        await orchestrator.process_audio_array(create_speech_like_audio(1.5), 1, 16000,
+                                               session_id="s", on_refined=on_refined)
+        pending = list(session.refinements)
+        assert pending
+        for _ in range(500):
+            if len(refine_calls) == 2:
+                break
+            await asyncio.sleep(0.01)
+        assert refine_calls == [0, 1]
+        orchestrator.close_session("s")
+        await asyncio.gather(*pending, return_exceptions=True)
+        assert all(task.cancelled() for task in pending)
+        release.set()
+        await asyncio.sleep(0.1)
+        return sent
+    
+    try:
+        sent = run_async(scenario)
+    finally:
+        release.set()
+        orchestrator.shutdown()
+    
+    assert [message.get("pass") for message in sent] == ["draft", "refined"]
+    logger.info(f"Draft '{sent[0]['transcript']}' corrected to '{sent[1]['transcript']}'")
+    return True
+
+
+def test_parallel_file_chunks():
+    """Test pause-aligned file chunking and in-order merging of chunks transcribed in parallel."""
+    logger.info("Testing parallel file chunks...")
+    
+    processor = AudioProcessor()
+    # Speech with pauses at 3.2-3.6 s and 7.0-7.4 s
+    audio = create_speech_like_audio(11.0)
+    pauses = [(3.2, 3.6), (7.0, 7.4)]
+    for start, end in pauses:
+        audio[int(start * 16000):int(end * 16000)] = 0.0
+    
+    chunks = processor.chunk_audio_on_silence(audio, 16000, chunk_duration=4.0, search_duration=1.0)
+    cuts = [start for _, start in chunks[1:]]
+    assert len(chunks) == 3
+    assert all(start < cut < end for cut, (start, end) in zip(cuts, pauses))
+    assert all(len(chunk) <= 4 * 16000 for chunk, _ in chunks)
+    # Chunks tile the audio: every sample exactly once, in order
+    assert np.array_equal(np.concatenate([chunk for chunk, _ in chunks]), audio)
+    assert [start for _, start in chunks] == [0.0] + [
+        sum(len(chunk) for chunk, _ in chunks[:i]) / 16000 for i in range(1, len(chunks))
+    ]
+    
+    # Without pauses the cut still falls in the search window before the limit
+    noise = (0.1 * np.random.default_rng(5).standard_normal(16000 * 6)).astype(np.float32)
+    (first, _), (second, second_start) = processor.chunk_audio_on_silence(noise, 16000, 4.0, 1.0)
+    assert 3.0 <= second_start <= 4.0 and len(first) + len(second) == len(noise)
+    
+    config = PipelineConfig()
+    config.audio.enable_vad = False
+    config.audio.chunk_duration = 4.0
+    config.audio.silence_search_duration = 1.0
+    config.transcription.inference_workers = 3
+    orchestrator = PipelineOrchestrator(config, load_model=False)
+    finished = []
+    
+    def transcribe(chunk, chunk_idx, *args, **kwargs):
+        # Later chunks finish first
+        time.sleep(0.05 * (3 - chunk_idx))
+        finished.append(chunk_idx)
+        duration = len(chunk) / 16000
+        return {"text": f"chunk {chunk_idx}",
+                "segments": [{"start": 0.0, "end": duration, "text": f"chunk {chunk_idx}", "words": []}]}
+    
+    orchestrator.transcription_processor.transcribe_array_chunk = transcribe
+    audio_b64 = base64.b64encode(audio.tobytes()).decode()
+    
+    try:
+        merged = run_async(lambda: orchestrator.transcribe_file(audio_b64, 16000))
+    finally:
+        orchestrator.shutdown()
+    
+    assert finished == [2, 1, 0]
+    results = merged["chunks"]
+    assert [result["chunk_idx"] for result in results] == [0, 1, 2]
+    assert [result["start_time"] for result in results] == [start for _, start in chunks]
+    assert merged["text"] == "chunk 0 chunk 1 chunk 2"
+    assert [segment["start"] for segment in merged["segments"]] == [start for _, start in chunks]
+    
+    # With diarization on: chunk work stays within file_parallelism, and speakers are
+    # clustered in chunk order, so labels do not depend on which chunk finishes first
+    pause = np.zeros(int(16000 * 0.6), dtype=np.float32)
+    talk = np.concatenate([create_voice(110, (700, 1200), 3.2, 0), pause,
+                           create_voice(210, (400, 2000), 3.2, 1), pause,
+                           create_voice(210, (400, 2000), 3.2, 2)])
+    talk_b64 = base64.b64encode(talk.tobytes()).decode()
+    config.enable_speaker_diarization = True
+    config.diarization.backend = "mfcc"
+    config.transcription.file_parallelism = 2
+    
+    def diarized_run(delays):
+        orchestrator = PipelineOrchestrator(config, load_model=False)
+        started, finished, calls, embedded = [], [], [], []
+        apply_vad = orchestrator._apply_vad
+        embed = orchestrator.diarizer._embed
+        
+        def counting_vad(chunk):
+            started.append(len(started) - len(finished))
+            return apply_vad(chunk)
+        
+        def slow_embed(*args):
+            # Chunks are embedded in the order they start; delays[i] holds back the i-th
+            index = len(calls)
+            calls.append(index)
+            time.sleep(delays[index])
+            embedded.append(index)
+            return embed(*args)
+        
+        def transcribe(chunk, chunk_idx, *args, **kwargs):
+            finished.append(chunk_idx)
+            duration = len(chunk) / 16000
+            return {"text": "", "segments": [{"start": 0.0, "end": duration, "text": "", "words": []}]}
+        
+        orchestrator._apply_vad = counting_vad
+        orchestrator.diarizer._embed = slow_embed
+        orchestrator.transcription_processor.transcribe_array_chunk = transcribe
+        try:
+            results = run_async(lambda: orchestrator.process_audio_file(talk_b64, 16000))
+        finally:
+            orchestrator.shutdown()
+        # Chunks that had started VAD but not finished transcribing, whenever another one started
+        assert max(started) < config.transcription.file_parallelism, started
+        return embedded, [[turn["speaker"] for turn in result["speakers"]] for result in results]
+    
+    first_order, first_speakers = diarized_run([0.15, 0.0, 0.0])
+    second_order, second_speakers = diarized_run([0.0, 0.0, 0.0])
+    assert first_order[-1] == 0  # Chunk 0 finished embedding last
+    assert first_speakers == second_speakers == [["SPEAKER_00"], ["SPEAKER_01"], ["SPEAKER_01"]]
+    
+    logger.info(f"Cut at {', '.join(f'{cut:.2f}s' for cut in cuts)}; merged: {merged['text']}")
+    return True
+
+
+def test_file_streaming():
+    """Test lazy file chunking (soundfile and ffmpeg readers) and in-order streamed file results."""
+    logger.info("Testing streamed file transcription...")
+    
+    processor = AudioProcessor()
+    rng = np.random.default_rng(3)
+    chunk_duration, overlap_duration = 2.0, 0.5
+    
+    # A 44.1 kHz stereo WAV spanning many of the reader's one-second blocks
+    stereo = (0.3 * rng.standard_normal((int(44100 * 7.3), 2))).astype(np.float32)
+    path = os.path.join(tempfile.mkdtemp(), "multi_block.wav")
+    sf.write(path, stereo, 44100, subtype="FLOAT")
+    whole = resample(stereo.mean(axis=1), 44100, 16000)
+    expected = processor.chunk_audio(whole, 16000, chunk_duration, overlap_duration)
+    
+    chunks = list(processor.iter_file_chunks(path, chunk_duration, overlap_duration, 16000))
+    assert [start for _, start in chunks] == [start for _, start in expected]
+    for (chunk, _), (reference, _) in zip(chunks, expected):
+        # Resampled as one stream: no filter transients at block or chunk boundaries
+        assert len(chunk) == len(reference) and np.max(np.abs(chunk - reference)) < 1e-5
+    overlap = int(overlap_duration * 16000)
+    for (chunk, _), (following, _) in zip(chunks, chunks[1:]):
+        assert np.array_equal(chunk[-overlap:], following[:overlap])
+    
+    # Formats soundfile cannot open are piped through ffmpeg as raw float32 PCM
+    decoded = (0.3 * rng.standard_normal(int(16000 * 5.2))).astype(np.float32)
+    commands = []
+    
+    class FakeFfmpeg:
+        def __init__(self, command, stdout=None):
+            commands.append(command)
+            self.stdout = io.BytesIO(decoded.astype("<f4").tobytes())
+        
+        def wait(self):
+            return 0
+        
+        def kill(self):
+            pass
+    
+    popen = audio_processor_module.subprocess.Popen
+    audio_processor_module.subprocess.Popen = FakeFfmpeg
+    try:
+        piped = list(processor.iter_file_chunks("talk.mp3", chunk_duration, overlap_duration, 16000))
+    finally:
+        audio_processor_module.subprocess.Popen = popen
+    assert commands and commands[0][commands[0].index("-ar") + 1] == "16000"
+    expected = processor.chunk_audio(decoded, 16000, chunk_duration, overlap_duration)
+    assert [start for _, start in piped] == [start for _, start in expected]
+    assert all(np.array_equal(chunk, reference) for (chunk, _), (reference, _) in zip(piped, expected))
+    
+    # Results stream in chunk order even when later chunks finish first, with overlaps de-duplicated
+    config = PipelineConfig()
+    config.audio.enable_vad = False
+    config.audio.chunk_duration = chunk_duration
+    config.audio.overlap_duration = overlap_duration
+    config.transcription.inference_workers = 3
+    orchestrator = PipelineOrchestrator(config, load_model=False)
+    finished, sliced, log_mels = [], [], []
+    step = chunk_duration - overlap_duration
+    
+    def transcribe(audio, chunk_idx, language, word_timestamps, beam_size, best_of, features=None):
+        time.sleep(0.05 * (3 - chunk_idx % 3))
+        finished.append(chunk_idx)
+        sliced.append(features is not None and features.shape[1] == len(audio) // 160 + 1)
+        # A word every 0.25 s, named after its absolute position in the file
+        first = int(round(chunk_idx * step * 4))
+        words = [{"word": f" w{first + k}", "start": k * 0.25, "end": k * 0.25 + 0.2}
+                 for k in range(int(len(audio) / 16000 * 4))]
+        return {"text": "".join(word["word"] for word in words).strip(),
+                "segments": [{"start": 0.0, "end": words[-1]["end"], "text": "", "words": words}]}
+    
+    class FeatureLayout:
+        def new_log_mel(self, sample_rate):
+            log_mels.append(IncrementalLogMel(sample_rate))
+            return log_mels[-1]
+    
+    orchestrator.transcription_processor.transcribe_array_chunk = transcribe
+    orchestrator.transcription_processor.precomputed_features = FeatureLayout()
+    
+    async def scenario():
+        return [result async for result in orchestrator.stream_audio_file(path)]
+    
+    try:
+        results = run_async(scenario)
+        assert finished != sorted(finished)
+        assert [result["chunk_idx"] for result in results] == list(range(len(chunks)))
+        assert [result["start_time"] for result in results] == [start for _, start in chunks]
+        # Every word exactly once, in order, at its absolute time
+        words = " ".join(result["transcript"] for result in results).split()
+        assert words == [f"w{i}" for i in range(len(words))]
+        assert len(words) == int(len(whole) / 16000 * 4)
+        assert all(word["start"] == int(word["word"].strip()[1:]) * 0.25
+                   for result in results for segment in result["segments"] for word in segment["words"])
+        # Overlapping chunks were handed slices of one shared log-mel timeline
+        assert all(sliced) and log_mels[0].frames_computed < 1.1 * len(whole) / 160
+        
+        # The same stream over HTTP, one JSON line per chunk
+        import ws_main
+        from fastapi.testclient import TestClient
+        ws_main.pipeline_orchestrator = orchestrator
+        try:
+            with open(path, "rb") as upload:
+                response = TestClient(ws_main.app).post("/transcribe/file", content=upload.read())
+        finally:
+            ws_main.pipeline_orchestrator = None
+        assert response.status_code == 200
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["chunk_idx"] for line in lines] == list(range(len(chunks)))
+    finally:
+        orchestrator.shutdown()
+    
+    logger.info(f"Streamed {len(chunks)} file chunks in order")
+    return True
+
+
 async def test_pipeline_orchestrator():
     """Test the pipeline orchestrator."""
     logger.info("Testing PipelineOrchestrator...")
@@ -100,22 +1044,234 @@ async def test_pipeline_orchestrator():
         return False
 
 
+def test_window_split():
+    """Test splitting a coalesced window result back to its chunks by timestamp."""
+    logger.info("Testing coalesced window split...")
+    
+    orchestrator = PipelineOrchestrator(load_model=False)
+    window = [
+        PendingChunk(np.zeros(int(16000 * seconds), dtype=np.float32), idx, 0.0, None, seconds)
+        for idx, seconds in ((3, 1.0), (4, 2.0), (5, 1.0))
+    ]
+    result = {
+        "chunk_idx": 3,
+        "transcript": "hello there friend bye",
+        "segments": [
+            {"start": 0.1, "end": 0.5, "text": "hello", "words": []},
+            {"start": 0.6, "end": 2.6, "text": "there friend", "words": [
+                {"start": 0.6, "end": 0.9, "word": " there"},
+                {"start": 2.2, "end": 2.6, "word": " friend"}
+            ]},
+            {"start": 3.2, "end": 4.1, "text": "bye", "words": []}
+        ],
+        "language": "en",
+        "processing_time": 0.5,
+        "audio_duration": 4.0,
+        "real_time_factor": 0.125,
+        "status": "success",
+        "speakers": [{"speaker": "S1", "start": 0.0, "end": 2.5}, {"speaker": "S2", "start": 2.5, "end": 4.0}]
+    }
+    
+    split = orchestrator._split_window_result(result, window)
+    assert [r["chunk_idx"] for r in split] == [3, 4, 5]
+    assert [r["transcript"] for r in split] == ["hello there", "friend", "bye"]
+    assert [r["audio_duration"] for r in split] == [1.0, 2.0, 1.0]
+    assert all(r["window_chunks"] == [3, 4, 5] for r in split)
+    # Timestamps are relative to each chunk
+    assert abs(split[1]["segments"][0]["start"] - 1.2) < 1e-9
+    assert abs(split[2]["segments"][0]["start"] - 0.2) < 1e-9
+    assert [(t["speaker"], t["start"], t["end"]) for t in split[1]["speakers"]] == [("S1", 0.0, 1.5), ("S2", 1.5, 2.0)]
+    
+    busy = orchestrator._split_window_result({"chunk_idx": 3, "transcript": "", "status": "busy"}, window)
+    assert [(r["chunk_idx"], r["status"]) for r in busy] == [(3, "busy"), (4, "busy"), (5, "busy")]
+    orchestrator.shutdown()
+    
+    return True
+
+
+def test_incremental_log_mel():
+    """Test incremental log-mel frames against a one-shot Whisper-style extraction."""
+    logger.info("Testing incremental log-mel features...")
+    
+    def whisper_log_mel(audio: np.ndarray) -> np.ndarray:
+        padded = np.pad(np.pad(audio.astype(np.float64), (0, 160)), 200, mode="reflect")
+        frames = np.stack([padded[i:i + 400] for i in range(0, len(padded) - 399, 160)])[:-1]
+        power = np.abs(np.fft.rfft(frames * np.hanning(401)[:-1], axis=1)) ** 2
+        log_spec = np.log10(np.maximum(slaney_mel_filterbank(16000, 400, 80) @ power.T, 1e-10))
+        return (np.maximum(log_spec, log_spec.max() - 8.0) + 4.0) / 4.0
+    
+    rng = np.random.default_rng(0)
+    audio = (0.1 * rng.standard_normal(16000 * 3)).astype(np.float32)
+    log_mel = IncrementalLogMel()
+    for start in range(0, len(audio), 3333):
+        log_mel.append(audio[start:start + 3333])
+    
+    full = log_mel.window(0, len(audio))
+    assert full.shape == (80, 301) and full.dtype == np.float32
+    assert np.abs(full - whisper_log_mel(audio)).max() < 1e-4
+    assert log_mel.frames_computed <= 301 + 2  # Only the incomplete tail frames are computed on demand
+    
+    # Re-slicing after a trim reuses frames; only the slice's leading edge differs from a fresh extraction
+    log_mel.trim(8000)
+    computed = log_mel.frames_computed
+    tail = log_mel.window(8000, len(audio) - 8000, gain=2.0)
+    assert np.abs(tail[:, 3:] - whisper_log_mel(2.0 * audio[8000:])[:, 3:]).max() < 1e-4
+    assert log_mel.frames_computed - computed <= 2
+    try:
+        log_mel.window(0, 16000)
+        assert False, "Trimmed audio must not be served"
+    except ValueError:
+        pass
+    
+    # Layout with 30 s of trailing padding (faster-whisper < 1.1)
+    padded = IncrementalLogMel(trailing_frames=2999)
+    padded.append(audio)
+    assert padded.window(0, len(audio)).shape == (80, 3300)
+    
+    # The wrapped extractor serves registered features once, on the registering thread
+    calls = []
+    
+    class Extractor:
+        hop_length = 160
+        
+        def __call__(self, waveform, chunk_length=None):
+            calls.append(len(waveform))
+            return np.zeros((80, len(waveform) // 160 + 1), dtype=np.float32)
+    
+    wrapper = PrecomputedFeatureExtractor.wrap(Extractor())
+    assert wrapper is not None and (wrapper.n_mels, wrapper.trailing_frames) == (80, 0)
+    with wrapper.use(audio, full):
+        assert wrapper(audio, chunk_length=None) is full
+        assert wrapper(audio) is not full
+    with wrapper.use(audio, full[:, :-1]):
+        assert wrapper(audio) is not full  # Wrong shape falls back to extraction
+    
+    # A streamer hands every re-decode its buffer's features
+    seen = []
+    
+    def transcribe(buffer, language, initial_prompt=None, word_timestamps=False, features=None):
+        seen.append((len(buffer), features.shape))
+        end = len(buffer) / 16000
+        return {"segments": [{"words": [{"start": 0.0, "end": 0.5, "word": " hi"},
+                                        {"start": 0.5, "end": end, "word": " there"}]}]}
+    
+    streamer = StreamingTranscriber(transcribe, features=IncrementalLogMel())
+    streamer.insert_audio(audio[:16000])
+    streamer.process()
+    streamer.insert_audio(audio[16000:32000])
+    streamer.process()
+    assert streamer.buffer_sample % 160 == 0 and streamer.buffer_sample > 0
+    streamer.insert_audio(audio[32000:])
+    streamer.process()
+    assert all(shape == (80, samples // 160 + 1) for samples, shape in seen)
+    assert streamer.features.first_frame == streamer.buffer_sample // 160
+    
+    return True
+
+
+def test_session_backpressure():
+    """Test overflow policies of the per-session queue and RTF-based admission control."""
+    logger.info("Testing session backpressure...")
+    
+    def chunk(idx: int, seconds: float = 1.0) -> QueuedChunk:
+        return QueuedChunk(np.zeros(int(16000 * seconds), dtype=np.float32), 16000, idx, float(idx))
+    
+    queue = SessionQueue(max_depth=2, policy="drop_oldest", slow_down_depth=2)
+    assert queue.put(chunk(0)) == [] and not queue.should_slow_down()
+    assert queue.put(chunk(1)) == [] and queue.should_slow_down()
+    assert not queue.should_slow_down()  # one warning per excursion
+    dropped = queue.put(chunk(2))
+    assert [c.chunk_idx for c in dropped] == [0] and len(queue) == 2
+    
+    queue = SessionQueue(max_depth=2, policy="coalesce", max_coalesce_seconds=2.5)
+    for idx in range(3):
+        assert queue.put(chunk(idx)) == []
+    assert len(queue) == 2 and queue.queued_seconds == 3.0 and queue.coalesced == 1
+    dropped = queue.put(chunk(3))  # merging the 2 s chunk again would exceed 2.5 s
+    assert [c.chunk_indices for c in dropped] == [[0, 1]]
+    assert queue.put(chunk(4)) == [] and queue.coalesced == 2
+    
+    # One session at RTF 0.5 sending real time fills half of one worker
+    admission = AdmissionController(capacity=1, max_load=0.8, window_seconds=10.0)
+    for t in range(10):
+        admission.observe("a", 1.0, 0.5, now=float(t + 1))
+    assert abs(admission.load(now=10.0) - 0.5) < 1e-6
+    for t in range(10):
+        admission.observe("b", 1.0, 0.5, now=float(t + 1))
+    assert abs(admission.load(now=10.0) - 1.0) < 1e-6
+    admission.forget("b")
+    assert abs(admission.load(now=10.0) - 0.5) < 1e-6
+    assert admission.load(now=100.0) == 0.0  # idle sessions age out of the window
+    
+    admission = AdmissionController(capacity=1, max_load=0.8)
+    assert admission.admit()
+    admission.observe("a", 1.0, 2.0)  # slower than real time
+    assert not admission.admit() and admission.rejected == 1
+    logger.info(f"Admission stats: {admission.get_stats()}")
+    
+    return True
+
+
 async def main():
     """Run all tests."""
     logger.info("Starting pipeline tests...")
     
     # Test individual components
     audio_ok = test_audio_processor()
+    frames_ok = test_binary_frames()
+    resample_ok = test_resample_audio()
+    vad_ok = test_voice_activity_detector()
+    merge_ok = test_merge_chunk_results()
+    cache_ok = test_transcription_cache()
+    registry_ok = test_model_registry()
+    metrics_ok = test_pipeline_metrics()
+    diarization_ok = test_speaker_diarization()
+    emotion_ok = test_emotion_detection()
+    scene_ok = test_scene_classifier()
+    routing_ok = test_worker_routing()
+    ring_ok = test_shared_audio_ring()
+    backpressure_ok = test_session_backpressure()
+    window_ok = test_window_split()
+    features_ok = test_incremental_log_mel()
+    pool_ok = test_inference_pool_waiters()
+    batching_ok = test_batch_scheduler()
+    batch_decode_ok = test_transcribe_batch()
+    stream_timeout_ok = test_stream_decode_timeout()
+    two_pass_ok = test_two_pass_refinement()
+    parallel_file_ok = test_parallel_file_chunks()
+    file_stream_ok = test_file_streaming()
     transcription_ok = test_transcription_processor()
     pipeline_ok = await test_pipeline_orchestrator()
     
     # Summary
     logger.info("Test Results:")
     logger.info(f"  AudioProcessor: {'✅ PASS' if audio_ok else '❌ FAIL'}")
+    logger.info(f"  Binary frames: {'✅ PASS' if frames_ok else '❌ FAIL'}")
+    logger.info(f"  Resampling: {'✅ PASS' if resample_ok else '❌ FAIL'}")
+    logger.info(f"  VoiceActivityDetector: {'✅ PASS' if vad_ok else '❌ FAIL'}")
+    logger.info(f"  Segment merging: {'✅ PASS' if merge_ok else '❌ FAIL'}")
+    logger.info(f"  Transcription cache: {'✅ PASS' if cache_ok else '❌ FAIL'}")
+    logger.info(f"  Model registry: {'✅ PASS' if registry_ok else '❌ FAIL'}")
+    logger.info(f"  Pipeline metrics: {'✅ PASS' if metrics_ok else '❌ FAIL'}")
+    logger.info(f"  Speaker diarization: {'✅ PASS' if diarization_ok else '❌ FAIL'}")
+    logger.info(f"  Emotion detection: {'✅ PASS' if emotion_ok else '❌ FAIL'}")
+    logger.info(f"  Scene classification: {'✅ PASS' if scene_ok else '❌ FAIL'}")
+    logger.info(f"  Worker routing: {'✅ PASS' if routing_ok else '❌ FAIL'}")
+    logger.info(f"  Shared audio ring: {'✅ PASS' if ring_ok else '❌ FAIL'}")
+    logger.info(f"  Session backpressure: {'✅ PASS' if backpressure_ok else '❌ FAIL'}")
+    logger.info(f"  Window split: {'✅ PASS' if window_ok else '❌ FAIL'}")
+    logger.info(f"  Incremental log-mel: {'✅ PASS' if features_ok else '❌ FAIL'}")
+    logger.info(f"  Inference pool waiters: {'✅ PASS' if pool_ok else '❌ FAIL'}")
+    logger.info(f"  Batch scheduler: {'✅ PASS' if batching_ok else '❌ FAIL'}")
+    logger.info(f"  Batched transcription: {'✅ PASS' if batch_decode_ok else '❌ FAIL'}")
+    logger.info(f"  Stream decode timeout: {'✅ PASS' if stream_timeout_ok else '❌ FAIL'}")
+    logger.info(f"  Two-pass refinement: {'✅ PASS' if two_pass_ok else '❌ FAIL'}")
+    logger.info(f"  Parallel file chunks: {'✅ PASS' if parallel_file_ok else '❌ FAIL'}")
+    logger.info(f"  File streaming: {'✅ PASS' if file_stream_ok else '❌ FAIL'}")
     logger.info(f"  TranscriptionProcessor: {'✅ PASS' if transcription_ok else '❌ FAIL'}")
     logger.info(f"  PipelineOrchestrator: {'✅ PASS' if pipeline_ok else '❌ FAIL'}")
     
-    if all([audio_ok, transcription_ok, pipeline_ok]):
+    if all([audio_ok, frames_ok, resample_ok, vad_ok, merge_ok, cache_ok, registry_ok, metrics_ok, diarization_ok, emotion_ok, scene_ok, routing_ok, ring_ok, backpressure_ok, window_ok, features_ok, pool_ok, batching_ok, batch_decode_ok, stream_timeout_ok, two_pass_ok, parallel_file_ok, file_stream_ok, transcription_ok, pipeline_ok]):
         logger.info("🎉 All tests passed!")
     else:
         logger.warning("⚠️  Some tests failed")
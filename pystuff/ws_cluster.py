@@ -0,0 +1,817 @@
+"""
+Multi-Process WebSocket Deployment
+A front process accepts /ws/audio connections and relays each session to one of
+N inference worker processes over Unix sockets. Every worker owns a full
+PipelineOrchestrator and serves relayed sessions with ws_main's endpoint, so a
+session's streaming state, speakers and scene stay on the worker it was routed to.
+
+Audio is decoded in the front and handed to the worker through a shared-memory
+ring (pipeline.shm_ring); only the slot reference crosses the socket.
+
+Usage:
+    python ws_cluster.py --workers 4
+    python ws_cluster.py --workers 2 --port 8001 --orchestrator-factory benchmark_pipeline:create_stub_orchestrator
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import tempfile
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from fastapi import FastAPI, WebSocket
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from pipeline import AudioProcessor, PipelineConfig, PipelineOrchestrator
+from pipeline.ipc import read_message, write_message
+from pipeline.shm_ring import SharedAudioRing
+from pipeline.metrics import METRIC_PREFIX, PipelineMetrics
+
+logger = logging.getLogger("ws_cluster")
+
+app = FastAPI()
+
+# Set by main() (or a test harness) before startup
+worker_pool = None
+
+WORKER_UNAVAILABLE = {"type": "error", "status": "error", "error": "Inference worker unavailable"}
+# What to do with a chunk when every slot of the worker's audio ring is leased
+RING_OVERFLOW_POLICIES = ("inline", "drop", "block")
+RING_BLOCK_POLL = 0.005  # seconds between retries under the "block" policy
+
+
+# ---------------------------------------------------------------------------
+# Worker process
+# ---------------------------------------------------------------------------
+
+class RelayedWebSocket:
+    """
+    Stand-in for a Starlette WebSocket so ws_main.websocket_endpoint can serve a
+    session whose client socket lives in the front process.
+    """
+    
+    def __init__(self, session_id: str, send: Callable[..., Any]):
+        """
+        Initialize the relayed socket.
+        
+        Args:
+            session_id: Session id assigned by the front (reused by the endpoint)
+            send: Coroutine function writing one IPC message to the front
+        """
+        self.session_id = session_id
+        self._send = send
+        self._incoming: asyncio.Queue = asyncio.Queue()
+    
+    async def accept(self) -> None:
+        """The front already accepted the client connection."""
+    
+    async def receive(self) -> Dict[str, Any]:
+        """Next client message in Starlette's ASGI message shape."""
+        return await self._incoming.get()
+    
+    async def send_json(self, data: Any) -> None:
+        """Relay one JSON reply to the client through the front."""
+        await self._send({"op": "send", "session": self.session_id, "data": data})
+    
+    def feed(self, message: Dict[str, Any]) -> None:
+        """Queue a client message (or disconnect) relayed by the front."""
+        self._incoming.put_nowait(message)
+
+
+class WorkerServer:
+    """Serves sessions relayed by the front over a Unix socket inside a worker process."""
+    
+    def __init__(self, worker_id: int, orchestrator: PipelineOrchestrator,
+                 ring: Optional[SharedAudioRing] = None):
+        """
+        Initialize the worker server.
+        
+        Args:
+            worker_id: Index of this worker in the pool
+            orchestrator: The worker's pipeline (also installed as ws_main.pipeline_orchestrator)
+            ring: Audio ring the front writes decoded chunks into
+        """
+        self.worker_id = worker_id
+        self.orchestrator = orchestrator
+        self.ring = ring
+        self.started_at = time.time()
+    
+    def health(self) -> Dict[str, Any]:
+        """Liveness and load report sent to the front's health monitor."""
+        orchestrator = self.orchestrator
+        return {
+            "worker": self.worker_id,
+            "pid": os.getpid(),
+            "ready": orchestrator.ready,
+            "sessions": len(orchestrator.sessions),
+            "inference_pending": orchestrator.inference_pool.pending,
+            "inference_capacity": orchestrator.inference_pool.max_pending,
+            "rtf_p50": orchestrator.metrics.get_stats()["real_time_factor"]["p50"],
+            "admission_load": orchestrator.admission.load(),
+            "uptime": time.time() - self.started_at
+        }
+    
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Dispatch messages from one front connection until it closes."""
+        import ws_main
+        
+        write_lock = asyncio.Lock()
+        sessions: Dict[str, RelayedWebSocket] = {}
+        
+        async def send(header: Dict[str, Any], payload: Optional[bytes] = None) -> None:
+            async with write_lock:
+                write_message(writer, header, payload)
+                await writer.drain()
+        
+        async def serve_session(websocket: RelayedWebSocket) -> None:
+            try:
+                await ws_main.websocket_endpoint(websocket)
+            finally:
+                sessions.pop(websocket.session_id, None)
+                try:
+                    await send({"op": "closed", "session": websocket.session_id})
+                except ConnectionError:
+                    pass
+        
+        try:
+            while True:
+                header, payload = await read_message(reader)
+                op = header["op"]
+                if op == "message":
+                    websocket = sessions.get(header["session"])
+                    if websocket is not None:
+                        if payload is not None:
+                            websocket.feed({"type": "websocket.receive", "bytes": payload})
+                        else:
+                            websocket.feed({"type": "websocket.receive", "text": header["text"]})
+                elif op == "audio":
+                    websocket = sessions.get(header["session"])
+                    if websocket is not None:
+                        try:
+                            audio_np, chunk_idx, sample_rate = self.ring.read(header["slot"], header["sequence"])
+                        except (AttributeError, ValueError) as e:
+                            logger.error(f"Worker {self.worker_id} could not map ring slot: {e}")
+                            await websocket.send_json({
+                                "chunk_idx": header.get("chunk_idx"),
+                                "transcript": f"[ERROR] {str(e)}",
+                                "status": "error"
+                            })
+                            continue
+                        websocket.feed({"type": "websocket.receive", "audio": (audio_np, sample_rate, chunk_idx)})
+                        # Only the session may keep the view alive: it holds the slot's lease
+                        del audio_np
+                elif op == "open":
+                    websocket = RelayedWebSocket(header["session"], send)
+                    sessions[websocket.session_id] = websocket
+                    asyncio.create_task(serve_session(websocket))
+                elif op == "close":
+                    websocket = sessions.get(header["session"])
+                    if websocket is not None:
+                        websocket.feed({"type": "websocket.disconnect", "code": 1000})
+                elif op == "health":
+                    await send({"op": "reply", "id": header["id"], **self.health()})
+                elif op == "metrics":
+                    await send({"op": "reply", "id": header["id"], "text": self.orchestrator.render_metrics()})
+                else:
+                    logger.warning(f"Worker {self.worker_id} ignoring unknown op {op!r}")
+        except (asyncio.IncompleteReadError, ConnectionError):
+            logger.info(f"Worker {self.worker_id}: front disconnected")
+        except asyncio.CancelledError:
+            # Worker shutting down; the front sees the connection drop
+            pass
+        finally:
+            for websocket in sessions.values():
+                websocket.feed({"type": "websocket.disconnect", "code": 1001})
+            writer.close()
+
+
+def _create_orchestrator(config_path: str, orchestrator_factory: Optional[str]) -> PipelineOrchestrator:
+    """Build the worker pipeline from the shared config file or a "module:function" factory."""
+    if orchestrator_factory:
+        module_name, _, function_name = orchestrator_factory.partition(":")
+        return getattr(importlib.import_module(module_name), function_name)()
+    config = PipelineConfig.load_from_file(config_path) or PipelineConfig()
+    return PipelineOrchestrator(config, load_model=False)
+
+
+async def _serve_worker(worker_id: int, socket_path: str, config_path: str,
+                        orchestrator_factory: Optional[str], ring_name: Optional[str]) -> None:
+    """Run one worker: load the pipeline, listen on socket_path until SIGTERM/SIGINT."""
+    import ws_main
+    
+    orchestrator = _create_orchestrator(config_path, orchestrator_factory)
+    ws_main.pipeline_orchestrator = orchestrator
+    warm_up = asyncio.create_task(ws_main.warm_up_pipeline()) if not orchestrator.ready else None
+    
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop.set)
+    
+    ring = SharedAudioRing.attach(ring_name) if ring_name else None
+    server = WorkerServer(worker_id, orchestrator, ring)
+    unix_server = await asyncio.start_unix_server(server.handle_connection, path=socket_path)
+    logger.info(f"Worker {worker_id} (pid {os.getpid()}) listening on {socket_path}")
+    try:
+        async with unix_server:
+            await stop.wait()
+    finally:
+        if warm_up is not None:
+            warm_up.cancel()
+        orchestrator.shutdown()
+        if ring is not None:
+            ring.close()
+
+
+def run_worker(worker_id: int, socket_path: str, config_path: str,
+               orchestrator_factory: Optional[str] = None, ring_name: Optional[str] = None) -> None:
+    """Entry point of an inference worker process."""
+    logging.basicConfig(level=logging.INFO, format=f"[worker {worker_id}] %(levelname)s:%(name)s:%(message)s")
+    asyncio.run(_serve_worker(worker_id, socket_path, config_path, orchestrator_factory, ring_name))
+
+
+# ---------------------------------------------------------------------------
+# Front process
+# ---------------------------------------------------------------------------
+
+class WorkerHandle:
+    """Front-side view of one worker process: its IPC connection, sessions and last health report."""
+    
+    def __init__(self, worker_id: int, socket_path: str):
+        """
+        Initialize the handle.
+        
+        Args:
+            worker_id: Index of the worker in the pool
+            socket_path: Unix socket the worker listens on
+        """
+        self.worker_id = worker_id
+        self.socket_path = socket_path
+        self.process: Optional[multiprocessing.process.BaseProcess] = None
+        self.healthy = False
+        self.health: Dict[str, Any] = {}
+        self.last_seen: Optional[float] = None
+        self.restarts = 0
+        # session id -> replies waiting for the client (None ends the session)
+        self.sessions: Dict[str, asyncio.Queue] = {}
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._write_lock = asyncio.Lock()
+        self._requests: Dict[int, asyncio.Future] = {}
+        self._next_request = 0
+        self._read_task: Optional[asyncio.Task] = None
+        # Audio handoff to this worker; None sends audio inline over the socket
+        self.ring: Optional[SharedAudioRing] = None
+    
+    @property
+    def connected(self) -> bool:
+        """Whether the IPC connection is open."""
+        return self._writer is not None
+    
+    def load(self) -> float:
+        """Routing score: sessions routed here plus the reported inference queue fill and admission load."""
+        capacity = self.health.get("inference_capacity") or 1
+        return (len(self.sessions) + self.health.get("inference_pending", 0) / capacity
+                + self.health.get("admission_load", 0.0))
+    
+    def start(self, config_path: str, orchestrator_factory: Optional[str]) -> None:
+        """Spawn the worker process (spawn, not fork: the front runs an event loop and threads)."""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        if self.ring is not None:
+            # Leases held by a previous process died with it
+            self.ring.reset()
+        context = multiprocessing.get_context("spawn")
+        self.process = context.Process(
+            target=run_worker,
+            args=(self.worker_id, self.socket_path, config_path, orchestrator_factory,
+                  self.ring.name if self.ring is not None else None),
+            name=f"tone-worker-{self.worker_id}",
+            daemon=True
+        )
+        self.process.start()
+    
+    async def connect(self, timeout: float) -> None:
+        """Connect to the worker socket, waiting for the process to start listening."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            if self.process is not None and not self.process.is_alive():
+                raise ConnectionError(f"Worker {self.worker_id} exited with code {self.process.exitcode}")
+            try:
+                self._reader, self._writer = await asyncio.open_unix_connection(self.socket_path)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                if loop.time() > deadline:
+                    raise TimeoutError(f"Worker {self.worker_id} did not listen within {timeout}s")
+                await asyncio.sleep(0.1)
+        self.healthy = True
+        self._read_task = asyncio.create_task(self._read_loop())
+    
+    async def _read_loop(self) -> None:
+        """Route worker messages to session queues and pending requests."""
+        try:
+            while True:
+                header, _ = await read_message(self._reader)
+                op = header["op"]
+                if op == "send":
+                    queue = self.sessions.get(header["session"])
+                    if queue is not None:
+                        queue.put_nowait(header["data"])
+                elif op == "closed":
+                    queue = self.sessions.pop(header["session"], None)
+                    if queue is not None:
+                        queue.put_nowait(None)
+                elif op == "reply":
+                    future = self._requests.pop(header["id"], None)
+                    if future is not None and not future.done():
+                        future.set_result(header)
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            if self._writer is not None:  # not a shutdown we initiated
+                logger.warning(f"Lost connection to worker {self.worker_id}: {e!r}")
+        finally:
+            self._disconnect()
+    
+    def _disconnect(self) -> None:
+        """Drop the connection and end every session routed here."""
+        self.healthy = False
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+        for queue in self.sessions.values():
+            queue.put_nowait(WORKER_UNAVAILABLE)
+            queue.put_nowait(None)
+        self.sessions.clear()
+        for future in self._requests.values():
+            if not future.done():
+                future.set_exception(ConnectionError(f"Worker {self.worker_id} disconnected"))
+        self._requests.clear()
+    
+    async def send(self, header: Dict[str, Any], payload: Optional[bytes] = None) -> None:
+        """Write one message to the worker (raises ConnectionError when it is gone)."""
+        async with self._write_lock:
+            if self._writer is None:
+                raise ConnectionError(f"Worker {self.worker_id} is not connected")
+            write_message(self._writer, header, payload)
+            await self._writer.drain()
+    
+    async def request(self, op: str, timeout: float) -> Dict[str, Any]:
+        """Send a request ("health", "metrics") and wait for the matching reply."""
+        self._next_request += 1
+        request_id = self._next_request
+        future = asyncio.get_running_loop().create_future()
+        self._requests[request_id] = future
+        try:
+            await self.send({"op": op, "id": request_id})
+            reply = await asyncio.wait_for(future, timeout)
+        finally:
+            self._requests.pop(request_id, None)
+        del reply["op"], reply["id"]
+        return reply
+    
+    async def open_session(self, session_id: str) -> asyncio.Queue:
+        """Start a relayed session on the worker; returns the queue of its replies."""
+        queue: asyncio.Queue = asyncio.Queue()
+        self.sessions[session_id] = queue
+        await self.send({"op": "open", "session": session_id})
+        return queue
+    
+    async def close_session(self, session_id: str) -> None:
+        """End a relayed session (client disconnected)."""
+        if self.sessions.pop(session_id, None) is not None and self.connected:
+            try:
+                await self.send({"op": "close", "session": session_id})
+            except ConnectionError:
+                pass
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Health and load summary for /status."""
+        return {
+            "worker": self.worker_id,
+            "pid": self.process.pid if self.process is not None else None,
+            "alive": self.process is not None and self.process.is_alive(),
+            "healthy": self.healthy,
+            "sessions": len(self.sessions),
+            "load": self.load(),
+            "restarts": self.restarts,
+            "last_seen": self.last_seen,
+            "ring": self.ring.get_stats() if self.ring is not None else None,
+            "report": self.health
+        }
+
+
+class WorkerPool:
+    """
+    Spawns and supervises inference workers and assigns sessions to them.
+    
+    A session is pinned to the worker chosen when it opens; new sessions go to the
+    least-loaded healthy worker, preferring workers whose model is warm. Dead
+    workers are respawned, and workers that stop answering health checks get no
+    new sessions until they recover. Client audio is decoded here and written
+    into each worker's shared-memory ring.
+    """
+    
+    def __init__(self, num_workers: int, socket_dir: str, config_path: str = "pipeline_config.json",
+                 orchestrator_factory: Optional[str] = None, health_interval: float = 2.0,
+                 health_timeout: float = 2.0, start_timeout: float = 60.0,
+                 ring_slots: int = 16, ring_slot_samples: int = 288000,
+                 ring_overflow: str = "inline", ring_block_timeout: float = 1.0):
+        """
+        Initialize the pool.
+        
+        Args:
+            num_workers: Number of worker processes
+            socket_dir: Directory for the workers' Unix sockets
+            config_path: Pipeline config file each worker loads
+            orchestrator_factory: Optional "module:function" building each worker's orchestrator
+            health_interval: Seconds between health checks
+            health_timeout: Seconds a worker has to answer a health check
+            start_timeout: Seconds a (re)spawned worker has to start listening
+            ring_slots: Chunks in flight per worker in shared memory (0 sends audio inline)
+            ring_slot_samples: Capacity of one ring slot; longer chunks are sent inline
+            ring_overflow: When every slot is leased: "inline" (send over the socket),
+                "drop" (answer busy) or "block" (wait up to ring_block_timeout, then drop)
+            ring_block_timeout: Longest wait for a free slot under the "block" policy
+        """
+        if ring_overflow not in RING_OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown ring overflow policy {ring_overflow!r}; expected one of {RING_OVERFLOW_POLICIES}")
+        self.config_path = config_path
+        self.orchestrator_factory = orchestrator_factory
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.start_timeout = start_timeout
+        self.socket_dir = socket_dir
+        self.workers = [
+            WorkerHandle(worker_id, os.path.join(socket_dir, f"worker-{worker_id}.sock"))
+            for worker_id in range(max(1, num_workers))
+        ]
+        self.ring_slots = ring_slots
+        self.ring_slot_samples = ring_slot_samples
+        self.ring_overflow = ring_overflow
+        self.ring_block_timeout = ring_block_timeout
+        self.audio_processor = AudioProcessor()
+        self.metrics = PipelineMetrics()
+        self._monitor: Optional[asyncio.Task] = None
+    
+    async def start(self) -> None:
+        """Spawn every worker, connect to it and start the health monitor."""
+        os.makedirs(self.socket_dir, exist_ok=True)
+        for worker in self.workers:
+            if self.ring_slots > 0 and worker.ring is None:
+                try:
+                    worker.ring = SharedAudioRing.create(self.ring_slots, self.ring_slot_samples)
+                except OSError as e:
+                    logger.warning(f"No audio ring for worker {worker.worker_id} ({e}); sending audio inline")
+            worker.start(self.config_path, self.orchestrator_factory)
+        await asyncio.gather(*(worker.connect(self.start_timeout) for worker in self.workers))
+        await asyncio.gather(*(self._check(worker) for worker in self.workers))
+        self._monitor = asyncio.create_task(self._monitor_loop())
+        logger.info(f"Started {len(self.workers)} inference workers in {self.socket_dir}")
+    
+    def assign(self, session_id: str) -> Optional[WorkerHandle]:
+        """Pick the worker for a new session (None when no worker is healthy)."""
+        candidates = [worker for worker in self.workers if worker.healthy]
+        if not candidates:
+            return None
+        worker = min(candidates, key=lambda w: (not w.health.get("ready", False), w.load(), w.worker_id))
+        logger.info(f"Session {session_id} -> worker {worker.worker_id}")
+        return worker
+    
+    async def relay(self, worker: WorkerHandle, session_id: str, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Forward one client message to the worker serving the session.
+        
+        Audio is decoded and written into the worker's ring so only the slot
+        reference crosses the socket. Control messages, undecodable audio (the
+        worker reports the error) and chunks that do not fit are forwarded as received.
+        
+        Returns:
+            A busy reply for the client when the ring was full and the chunk dropped
+        """
+        decoded = self._decode(message) if worker.ring is not None else None
+        if decoded is not None:
+            audio_np, sample_rate, chunk_idx = decoded
+            if len(audio_np) <= worker.ring.slot_samples:
+                lease = await self._write_ring(worker.ring, audio_np, chunk_idx, sample_rate)
+                if lease is not None:
+                    slot, sequence = lease
+                    await worker.send({
+                        "op": "audio", "session": session_id, "slot": slot, "sequence": sequence, "chunk_idx": chunk_idx
+                    })
+                    return None
+                if self.ring_overflow != "inline":
+                    self.metrics.increment("ring_dropped_chunks")
+                    return {
+                        "chunk_idx": chunk_idx,
+                        "transcript": "",
+                        "status": "busy",
+                        "error": "Audio ring full",
+                        "retry_after": 1.0
+                    }
+            self.metrics.increment("ring_inline_chunks")
+        
+        if message.get("bytes") is not None:
+            await worker.send({"op": "message", "session": session_id}, message["bytes"])
+        else:
+            await worker.send({"op": "message", "session": session_id, "text": message["text"]})
+        return None
+    
+    def _decode(self, message: Dict[str, Any]) -> Optional[Tuple[np.ndarray, int, int]]:
+        """Decode a client audio message to (audio, sample_rate, chunk_idx); None for anything else."""
+        try:
+            with self.metrics.time("decode"):
+                if message.get("bytes") is not None:
+                    return self.audio_processor.decode_binary_frame(message["bytes"])
+                msg = json.loads(message["text"])
+                if not isinstance(msg, dict) or "audio" not in msg:
+                    return None
+                audio_np, _ = self.audio_processor.decode_base64_audio(msg["audio"])
+                return audio_np, msg["sample_rate"], msg["chunk_idx"]
+        except Exception:
+            return None
+    
+    async def _write_ring(self, ring: SharedAudioRing, audio_np: np.ndarray, chunk_idx: int,
+                          sample_rate: int) -> Optional[Tuple[int, int]]:
+        """Copy a chunk into the ring, waiting for a free slot under the "block" policy."""
+        wait = self.ring_block_timeout if self.ring_overflow == "block" else 0.0
+        deadline = time.monotonic() + wait
+        while True:
+            with self.metrics.time("ring_write"):
+                lease = ring.try_write(audio_np, chunk_idx, sample_rate)
+            if lease is not None or time.monotonic() >= deadline:
+                return lease
+            await asyncio.sleep(RING_BLOCK_POLL)
+    
+    def route(self, session_id: str) -> Optional[WorkerHandle]:
+        """Worker currently serving a session, if any."""
+        return next((worker for worker in self.workers if session_id in worker.sessions), None)
+    
+    @property
+    def ready(self) -> bool:
+        """At least one healthy worker has its model warm."""
+        return any(worker.healthy and worker.health.get("ready") for worker in self.workers)
+    
+    async def _monitor_loop(self) -> None:
+        """Periodically health-check every worker."""
+        while True:
+            await asyncio.sleep(self.health_interval)
+            await asyncio.gather(*(self._check(worker) for worker in self.workers))
+    
+    async def _check(self, worker: WorkerHandle) -> None:
+        """Respawn a dead worker, reconnect a dropped one, then refresh its health report."""
+        try:
+            if worker.process is None or not worker.process.is_alive():
+                exitcode = worker.process.exitcode if worker.process is not None else None
+                logger.warning(f"Worker {worker.worker_id} exited ({exitcode}); respawning")
+                worker._disconnect()
+                worker.health = {}
+                worker.restarts += 1
+                self.metrics.increment("worker_restarts")
+                worker.start(self.config_path, self.orchestrator_factory)
+                await worker.connect(self.start_timeout)
+            elif not worker.connected:
+                await worker.connect(self.start_timeout)
+            
+            worker.health = await worker.request("health", self.health_timeout)
+            worker.healthy = True
+            worker.last_seen = time.time()
+        except (asyncio.TimeoutError, ConnectionError) as e:
+            if worker.healthy:
+                logger.warning(f"Worker {worker.worker_id} failed its health check: {e!r}")
+            worker.healthy = False
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Pool summary for /status."""
+        return {
+            "ready": self.ready,
+            "workers": [worker.get_status() for worker in self.workers],
+            "sessions": sum(len(worker.sessions) for worker in self.workers),
+            "relay": self.metrics.get_stats()
+        }
+    
+    def render_metrics(self) -> str:
+        """Front relay metrics plus per-worker health and load gauges (Prometheus text format)."""
+        lines = [self.metrics.render_prometheus({
+            "ready": float(self.ready),
+            "workers": len(self.workers),
+            "healthy_workers": sum(worker.healthy for worker in self.workers),
+            "active_sessions": sum(len(worker.sessions) for worker in self.workers)
+        }).rstrip("\n")]
+        gauges = {
+            "worker_up": lambda w: float(w.healthy),
+            "worker_ready": lambda w: float(bool(w.health.get("ready"))),
+            "worker_sessions": lambda w: len(w.sessions),
+            "worker_inference_queue_depth": lambda w: w.health.get("inference_pending", 0),
+            "worker_admission_load": lambda w: w.health.get("admission_load", 0.0),
+            "worker_ring_slots_in_use": lambda w: w.ring.slots_in_use if w.ring is not None else 0,
+            "worker_restarts": lambda w: w.restarts
+        }
+        for gauge, value in gauges.items():
+            name = f"{METRIC_PREFIX}_{gauge}"
+            lines.append(f"# TYPE {name} gauge")
+            for worker in self.workers:
+                lines.append(f'{name}{{worker="{worker.worker_id}"}} {value(worker):g}')
+        return "\n".join(lines) + "\n"
+    
+    async def shutdown(self, timeout: float = 5.0) -> None:
+        """Stop the monitor and terminate every worker."""
+        if self._monitor is not None:
+            self._monitor.cancel()
+        for worker in self.workers:
+            worker._disconnect()
+            if worker.process is not None and worker.process.is_alive():
+                worker.process.terminate()
+        for worker in self.workers:
+            if worker.process is not None:
+                await asyncio.to_thread(worker.process.join, timeout)
+                if worker.process.is_alive():
+                    worker.process.kill()
+            if os.path.exists(worker.socket_path):
+                os.unlink(worker.socket_path)
+            if worker.ring is not None:
+                worker.ring.close()
+                worker.ring = None
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Spawn the worker pool (one worker unless configured by main())."""
+    global worker_pool
+    if worker_pool is None:
+        worker_pool = WorkerPool(1, tempfile.mkdtemp(prefix="tone-workers-"))
+    await worker_pool.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Terminate the workers."""
+    if worker_pool is not None:
+        await worker_pool.shutdown()
+
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the front process is up and serving HTTP."""
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: at least one healthy worker has a warm model (503 until then)."""
+    if worker_pool is None or not worker_pool.ready:
+        return JSONResponse(status_code=503, content={"status": "unavailable"})
+    return {
+        "status": "ready",
+        "ready_workers": sum(bool(worker.healthy and worker.health.get("ready")) for worker in worker_pool.workers),
+        "workers": len(worker_pool.workers)
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    """Relay metrics and per-worker gauges (Prometheus text format)."""
+    if worker_pool is None:
+        return PlainTextResponse("", status_code=503)
+    return PlainTextResponse(worker_pool.render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/workers/{worker_id}/metrics")
+async def worker_metrics(worker_id: int):
+    """One worker's full pipeline metrics, fetched over IPC."""
+    if worker_pool is None or not 0 <= worker_id < len(worker_pool.workers):
+        return PlainTextResponse("", status_code=404)
+    try:
+        reply = await worker_pool.workers[worker_id].request("metrics", worker_pool.health_timeout)
+    except (asyncio.TimeoutError, ConnectionError):
+        return PlainTextResponse("", status_code=503)
+    return PlainTextResponse(reply["text"], media_type="text/plain; version=0.0.4")
+
+
+@app.get("/status")
+async def get_status():
+    """Worker health, load and session placement."""
+    if worker_pool is None:
+        return {"error": "Worker pool not initialized"}
+    return worker_pool.get_status()
+
+
+@app.websocket("/ws/audio")
+async def websocket_endpoint(websocket: WebSocket):
+    """
+    Relay one client session to the worker it is pinned to.
+    
+    The protocol is ws_main's /ws/audio unchanged: client messages are forwarded
+    verbatim and every reply (including background two-pass corrections) comes
+    back from the worker. If the worker dies the client gets an error and the
+    socket is closed; reconnecting lands on a healthy worker.
+    """
+    await websocket.accept()
+    session_id = uuid.uuid4().hex
+    worker = worker_pool.assign(session_id) if worker_pool is not None else None
+    if worker is None:
+        if worker_pool is not None:
+            worker_pool.metrics.increment("sessions_rejected")
+        await websocket.send_json({**WORKER_UNAVAILABLE, "status": "busy", "retry_after": 1.0})
+        await websocket.close(code=1013)
+        return
+    worker_pool.metrics.increment("sessions_routed")
+    
+    try:
+        replies = await worker.open_session(session_id)
+    except ConnectionError:
+        await websocket.send_json(WORKER_UNAVAILABLE)
+        await websocket.close(code=1011)
+        return
+    
+    async def relay_replies() -> None:
+        while True:
+            data = await replies.get()
+            if data is None:
+                return
+            await websocket.send_json(data)
+    
+    relay = asyncio.create_task(relay_replies())
+    receive: Optional[asyncio.Future] = None
+    client_gone = False
+    try:
+        while True:
+            receive = asyncio.ensure_future(websocket.receive())
+            await asyncio.wait((receive, relay), return_when=asyncio.FIRST_COMPLETED)
+            if not receive.done():
+                # The worker ended the session (or died)
+                break
+            message = receive.result()
+            if message["type"] == "websocket.disconnect":
+                client_gone = True
+                break
+            with worker_pool.metrics.time("relay"):
+                reply = await worker_pool.relay(worker, session_id, message)
+            if reply is not None:
+                await websocket.send_json(reply)
+    except ConnectionError:
+        pass
+    except Exception as e:
+        logger.error(f"[WS] Relay error for session {session_id}: {e}")
+    finally:
+        if receive is not None and not receive.done():
+            receive.cancel()
+        await worker.close_session(session_id)
+        if not client_gone:
+            try:
+                await relay
+                await websocket.close(code=1011)
+            except Exception:
+                pass
+        relay.cancel()
+
+
+def main() -> None:
+    """Parse arguments, configure the worker pool and serve the front app."""
+    global worker_pool
+    import uvicorn
+    
+    parser = argparse.ArgumentParser(description="Serve /ws/audio from several inference worker processes")
+    parser.add_argument("--workers", type=int, default=2, help="Number of inference worker processes")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--config", default="pipeline_config.json", help="Pipeline config loaded by every worker")
+    parser.add_argument("--socket-dir", default=None, help="Directory for worker Unix sockets (default: a temp dir)")
+    parser.add_argument("--health-interval", type=float, default=2.0, help="Seconds between worker health checks")
+    parser.add_argument("--ring-slots", type=int, default=16,
+                        help="Shared-memory audio slots per worker (0 sends audio over the socket)")
+    parser.add_argument("--ring-slot-seconds", type=float, default=6.0,
+                        help="Longest chunk a slot holds, at 48 kHz; longer chunks are sent inline")
+    parser.add_argument("--ring-overflow", choices=RING_OVERFLOW_POLICIES, default="inline",
+                        help="When every slot is in use: send inline, drop (busy reply) or block briefly")
+    parser.add_argument("--orchestrator-factory", default=None,
+                        help='Build worker pipelines with "module:function" (e.g. a stub model for load tests)')
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO)
+    worker_pool = WorkerPool(
+        args.workers,
+        args.socket_dir or tempfile.mkdtemp(prefix="tone-workers-"),
+        config_path=args.config,
+        orchestrator_factory=args.orchestrator_factory,
+        health_interval=args.health_interval,
+        ring_slots=args.ring_slots,
+        ring_slot_samples=int(args.ring_slot_seconds * 48000),
+        ring_overflow=args.ring_overflow
+    )
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main() 
\ No newline at end of file
@@ -6,14 +6,19 @@ Uses the new modular pipeline system for better maintainability.
 import asyncio
 import json
 import logging
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse
+import tempfile
+import time
+import uuid
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
 
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from pipeline import PipelineOrchestrator, PipelineConfig
+from pipeline.audio_processor import FRAME_HEADER, FRAME_DTYPES
+from pipeline.backpressure import QueuedChunk, SessionQueue
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -21,13 +26,20 @@ logger = logging.getLogger(__name__)
 
 app = FastAPI()
 
+# Seconds a client refused by admission control should wait before reconnecting
+ADMISSION_RETRY_AFTER = 5.0
+
 # Initialize pipeline orchestrator
 pipeline_orchestrator = None
+warm_up_task = None
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize the pipeline on startup."""
-    global pipeline_orchestrator
+    """Initialize the pipeline on startup; the model loads in the background."""
+    global pipeline_orchestrator, warm_up_task
+    if pipeline_orchestrator is not None:
+        # Injected before startup (e.g. the benchmark harness with a stub model)
+        return
     try:
         # Load configuration if available, otherwise use defaults
         config = PipelineConfig.load_from_file("pipeline_config.json")
@@ -35,17 +47,32 @@ async def startup_event():
             config = PipelineConfig()
             config.save_to_file("pipeline_config.json")
         
-        pipeline_orchestrator = PipelineOrchestrator(config)
-        logger.info("Pipeline orchestrator initialized successfully")
-        
-        # Log pipeline status
-        status = pipeline_orchestrator.get_pipeline_status()
-        logger.info(f"Pipeline status: {status}")
+        # Don't block startup on the model: health checks must answer immediately
+        pipeline_orchestrator = PipelineOrchestrator(config, load_model=False)
+        warm_up_task = asyncio.create_task(warm_up_pipeline())
+        logger.info("Pipeline orchestrator initialized, model warming up in the background")
         
     except Exception as e:
         logger.error(f"Failed to initialize pipeline: {e}")
         pipeline_orchestrator = None
 
+async def warm_up_pipeline():
+    """Load and warm up the model, then log the pipeline status."""
+    try:
+        await pipeline_orchestrator.warm_up()
+        status = pipeline_orchestrator.get_pipeline_status()
+        logger.info(f"Pipeline status: {status}")
+    except Exception as e:
+        logger.error(f"Failed to warm up pipeline: {e}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pipeline resources on shutdown."""
+    if warm_up_task is not None:
+        warm_up_task.cancel()
+    if pipeline_orchestrator is not None:
+        pipeline_orchestrator.shutdown()
+
 @app.get("/")
 def index():
     """Main page with server information."""
@@ -74,6 +101,10 @@ def index():
                     <strong>WebSocket Endpoint:</strong> <code>ws://127.0.0.1:8000/ws/audio</code>
                 </div>
                 
+                <div class='endpoint'>
+                    <strong>File Endpoint:</strong> <code>POST /transcribe/file</code> (raw audio body, streams NDJSON results per chunk)
+                </div>
+                
                 <div class='endpoint'>
                     <strong>Status Endpoint:</strong> <code>GET /status</code>
                 </div>
@@ -82,6 +113,14 @@ def index():
                     <strong>Config Endpoint:</strong> <code>GET /config</code>
                 </div>
                 
+                <div class='endpoint'>
+                    <strong>Metrics Endpoint:</strong> <code>GET /metrics</code> (Prometheus)
+                </div>
+                
+                <div class='endpoint'>
+                    <strong>Health Endpoints:</strong> <code>GET /healthz</code> (process up), <code>GET /readyz</code> (model warm)
+                </div>
+                
                 <h3>Pipeline Status</h3>
                 <div class='status'>
                     <pre id='status'>Loading...</pre>
@@ -90,12 +129,16 @@ def index():
                 <h3>Features</h3>
                 <ul>
                     <li>✅ Modular pipeline architecture</li>
-                    <li>✅ Real-time audio chunk processing</li>
-                    <li>✅ Overlapping chunk support</li>
-                    <li>✅ Configurable Whisper models</li>
-                    <li>✅ Async processing</li>
-                    <li>🔄 Speaker diarization (coming soon)</li>
-                    <li>🔄 Emotion detection (coming soon)</li>
+                    <li>✅ Real-time audio chunk processing (binary frames or base64 JSON on <code>/ws/audio</code>)</li>
+                    <li>✅ Streaming transcription with confirmed/tentative words (<code>"mode": "streaming"</code> in the hello message)</li>
+                    <li>✅ Two-pass drafts with background corrections (<code>transcription.two_pass</code>)</li>
+                    <li>✅ Voice activity detection skips silent chunks</li>
+                    <li>✅ Speaker diarization (<code>enable_speaker_diarization</code>; <code>"speakers"</code> turns in each result)</li>
+                    <li>✅ Emotion detection from prosody (<code>enable_emotion_detection</code>; <code>"emotion"</code> in each result)</li>
+                    <li>✅ Scene-beat classification (<code>enable_scene_classification</code>; <code>"scene"</code> in each result)</li>
+                    <li>✅ Streamed file transcription (<code>POST /transcribe/file</code>)</li>
+                    <li>✅ Per-session backpressure, chunk coalescing and cross-session batching</li>
+                    <li>✅ Configurable Whisper models per session (<code>"model"</code> in the hello message)</li>
                 </ul>
                 
                 <script>
@@ -115,6 +158,32 @@ def index():
         """
     )
 
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving HTTP."""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: the model is loaded and warmed up (503 until then)."""
+    if pipeline_orchestrator is None or not pipeline_orchestrator.ready:
+        warming = warm_up_task is not None and not warm_up_task.done()
+        return JSONResponse(status_code=503, content={"status": "warming_up" if warming else "unavailable"})
+    return {
+        "status": "ready",
+        "model_size": pipeline_orchestrator.transcription_processor.model_size
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Per-stage latency histograms, real-time factor and load gauges (Prometheus text format)."""
+    if pipeline_orchestrator is None:
+        return PlainTextResponse("", status_code=503)
+    return PlainTextResponse(
+        pipeline_orchestrator.render_metrics(),
+        media_type="text/plain; version=0.0.4"
+    )
+
 @app.get("/status")
 async def get_status():
     """Get pipeline status."""
@@ -131,9 +200,101 @@ async def get_config():
     
     return pipeline_orchestrator.config.to_dict()
 
+@app.post("/transcribe/file")
+async def transcribe_file_stream(request: Request):
+    """
+    Transcribe an uploaded audio file, streaming one JSON line per chunk.
+    
+    The request body is the raw file (any format soundfile or ffmpeg can decode).
+    It is spooled to a temporary file in blocks and read back lazily, so neither
+    the upload nor the decoded audio is held in memory whole; results follow in
+    chunk order as soon as each chunk is transcribed.
+    """
+    if pipeline_orchestrator is None:
+        return JSONResponse(status_code=503, content={"error": "Pipeline not initialized"})
+    
+    fd, path = tempfile.mkstemp(prefix="tone-upload-")
+    size = 0
+    with os.fdopen(fd, "wb") as upload:
+        async for block in request.stream():
+            upload.write(block)
+            size += len(block)
+    if size == 0:
+        os.unlink(path)
+        return JSONResponse(status_code=400, content={"error": "Empty request body"})
+    
+    async def results():
+        try:
+            async for result in pipeline_orchestrator.stream_audio_file(path):
+                yield json.dumps(result) + "\n"
+        except Exception as e:
+            logger.error(f"[HTTP] Failed to transcribe uploaded file: {e}")
+            yield json.dumps({"status": "error", "error": str(e)}) + "\n"
+        finally:
+            os.unlink(path)
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+async def send_chunk_result(websocket: WebSocket, result: dict) -> None:
+    """Send a processed chunk result back to the client."""
+    response = {
+        "chunk_idx": result["chunk_idx"],
+        "transcript": result["transcript"],
+        "language": result.get("language"),
+        "processing_time": result.get("processing_time"),
+        "status": result["status"]
+    }
+    # Two-pass mode: drafts are marked, and corrections replace the draft for the same chunk_idx
+    if "pass" in result:
+        response["pass"] = result["pass"]
+    if result.get("type") == "correction":
+        response["type"] = "correction"
+        response["draft_transcript"] = result["draft_transcript"]
+        response["corrected"] = result["corrected"]
+    # Backpressure: chunks merged into this decode, and the smaller model used while behind
+    if "coalesced" in result:
+        response["coalesced"] = result["coalesced"]
+    if "downgraded" in result:
+        response["downgraded"] = result["downgraded"]
+    # Coalescing: chunks decoded together in one window (each still gets its own reply)
+    if "window_chunks" in result:
+        response["window_chunks"] = result["window_chunks"]
+    # Speaker diarization: turns are relative to the chunk start
+    if "speakers" in result:
+        response["speakers"] = result["speakers"]
+    if "emotion" in result:
+        response["emotion"] = result["emotion"]
+    if "scene" in result:
+        response["scene"] = result["scene"]
+    # Backpressure: tell the client to slow down and resend later
+    if result["status"] in ("busy", "timeout"):
+        response["retry_after"] = 1.0
+        response["error"] = result.get("error")
+    with pipeline_orchestrator.metrics.time("send"):
+        await websocket.send_json(response)
+    logger.info(f"[WS] Sent transcript for chunk {result['chunk_idx'] + 1}")
+
 @app.websocket("/ws/audio")
 async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time audio processing."""
+    """
+    WebSocket endpoint for real-time audio processing.
+    
+    Audio can be sent either as binary frames (FRAME_HEADER + raw PCM, preferred)
+    or as JSON text messages with base64 audio (fallback). Clients may negotiate
+    up front by sending {"type": "hello", "format": "binary" | "json", "mode": "chunk" | "streaming",
+    "model": "<whisper size>"}; "model" selects a per-session model tier (omit for the server default).
+    In streaming mode the server answers each chunk with "partial" and "final" transcript events,
+    and {"type": "end"} flushes the remaining tentative words as final. With two_pass enabled,
+    chunk mode replies carry "pass": "draft" and are followed by a {"type": "correction"} message
+    for the same chunk_idx once the accurate model has re-decoded it.
+    
+    Chunks wait in a bounded per-session queue (see BackpressureConfig). A client that gets
+    ahead of the pipeline receives one {"type": "slow_down"} per excursion; chunks discarded by
+    the overflow policy are reported as {"type": "dropped"}, merged chunks are answered once with
+    "coalesced": [chunk_idx, ...], and results decoded by the smaller fallback model carry
+    "downgraded": "<model>". While live sessions already saturate inference, new connections get
+    {"type": "rejected"} and are closed.
+    """
     await websocket.accept()
     logger.info("[WS] Client connected")
     
@@ -143,47 +304,236 @@ async def websocket_endpoint(websocket: WebSocket):
         })
         return
     
+    # Admission control: refuse new sessions while live ones already use the inference capacity
+    if not pipeline_orchestrator.admission.admit():
+        load = pipeline_orchestrator.admission.load()
+        logger.warning(f"[WS] Rejected session at load {load:.2f}")
+        pipeline_orchestrator.metrics.increment("sessions_rejected")
+        await websocket.send_json({
+            "type": "rejected",
+            "status": "busy",
+            "error": "Server at capacity",
+            "load": load,
+            "retry_after": ADMISSION_RETRY_AFTER
+        })
+        await websocket.close(code=1013)
+        return
+    
+    # Sessions relayed by ws_cluster keep the id the front process assigned
+    session_id = getattr(websocket, "session_id", None) or uuid.uuid4().hex
+    session = pipeline_orchestrator.open_session(session_id)
+    backpressure = pipeline_orchestrator.config.backpressure
+    queue = SessionQueue(
+        max_depth=backpressure.max_queue_depth,
+        policy=backpressure.overflow_policy,
+        slow_down_depth=backpressure.slow_down_depth,
+        max_coalesce_seconds=backpressure.max_coalesce_seconds
+    )
+    
+    async def send_correction(result: dict) -> None:
+        """Deliver a background two-pass refinement; the client may already be gone."""
+        try:
+            await send_chunk_result(websocket, result)
+        except Exception as e:
+            logger.info(f"[WS] Dropped correction for chunk {result['chunk_idx'] + 1}: {e}")
+    
+    async def process_chunk(chunk: QueuedChunk, windowed: bool = False) -> None:
+        """Run one queued chunk through the pipeline and send the result (windowed: decoded in a shared window)."""
+        chunk_idx = chunk.chunk_idx
+        
+        # Model still warming up: ask the client to resend later
+        if not pipeline_orchestrator.ready:
+            await send_chunk_result(websocket, {
+                "chunk_idx": chunk_idx,
+                "transcript": "",
+                "status": "busy",
+                "error": "Model warming up"
+            })
+            return
+        
+        downgraded = None
+        if queue.policy == "downgrade":
+            downgraded = pipeline_orchestrator.set_session_downgraded(session_id, queue.behind)
+        
+        # Process the audio chunk through the pipeline
+        started = time.perf_counter()
+        try:
+            if session.streaming:
+                events = await pipeline_orchestrator.process_stream_chunk(
+                    session_id, chunk.audio_np, chunk_idx, chunk.sample_rate, chunk.received_at
+                )
+                decoded = not any(event["type"] in ("busy", "timeout", "error") for event in events)
+                with pipeline_orchestrator.metrics.time("send"):
+                    for event in events:
+                        await websocket.send_json(event)
+            else:
+                result = await pipeline_orchestrator.process_audio_array(
+                    chunk.audio_np, chunk_idx, chunk.sample_rate, chunk.received_at, session_id,
+                    on_refined=send_correction
+                )
+                # VAD-skipped chunks ("skipped": True) succeed too; their near-zero cost is the session's real load
+                decoded = result["status"] == "success"
+                if len(chunk.chunk_indices) > 1:
+                    result["coalesced"] = chunk.chunk_indices
+                if downgraded is not None:
+                    result["downgraded"] = downgraded
+                await send_chunk_result(websocket, result)
+            if decoded:
+                busy_seconds = time.perf_counter() - started
+                if windowed:
+                    # The wait for window-mates is not load; charge this chunk's share of the decode
+                    busy_seconds = (result.get("real_time_factor") or 0.0) * chunk.duration
+                pipeline_orchestrator.admission.observe(session_id, chunk.duration, busy_seconds)
+            
+        except Exception as e:
+            logger.error(f"[WS] Error processing chunk {chunk_idx + 1}: {e}")
+            await websocket.send_json({
+                "chunk_idx": chunk_idx,
+                "transcript": f"[ERROR] {str(e)}",
+                "status": "error"
+            })
+    
+    async def deliver(chunk: QueuedChunk, windowed: bool = False) -> None:
+        """Process one queued chunk, logging delivery failures."""
+        try:
+            await process_chunk(chunk, windowed)
+        except Exception as e:
+            logger.info(f"[WS] Could not deliver chunk {chunk.chunk_idx + 1}: {e}")
+    
+    in_window = set()  # Delivery tasks whose chunks wait in the session's decode window
+    
+    async def consume_queue() -> None:
+        """Feed queued chunks to the pipeline in order."""
+        while True:
+            chunk = await queue.get()
+            try:
+                # Coalescing sessions hand chunks to the orchestrator's accumulator without waiting
+                # for each result, so consecutive chunks can share one decode window
+                if await pipeline_orchestrator.wait_for_window(session_id):
+                    task = asyncio.create_task(deliver(chunk, windowed=True))
+                    in_window.add(task)
+                    task.add_done_callback(in_window.discard)
+                    # Let the chunk reach the accumulator before checking for room again
+                    await asyncio.sleep(0)
+                else:
+                    await deliver(chunk)
+            finally:
+                # A chunk held for its window is not a backlog; the accumulator bounds those
+                queue.task_done()
+    
+    async def drain() -> None:
+        """Wait until every received chunk has been answered."""
+        await queue.join()
+        if in_window:
+            await asyncio.wait(set(in_window))
+    
+    consumer = asyncio.create_task(consume_queue())
+    
     try:
         while True:
-            # Receive audio chunk data
-            data = await websocket.receive_text()
-            msg = json.loads(data)
-            
-            chunk_idx = msg["chunk_idx"]
-            sample_rate = msg["sample_rate"]
-            audio_b64 = msg["audio"]
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            received_at = time.time()
             
-            logger.info(f"[WS] Received chunk {chunk_idx + 1}, samples={len(audio_b64)} chars")
-            
-            # Process the audio chunk through the pipeline
-            try:
-                result = await pipeline_orchestrator.process_audio_chunk(
-                    audio_b64, chunk_idx, sample_rate
-                )
+            if message.get("audio") is not None:
+                # Decoded by the ws_cluster front, mapped from its shared-memory ring
+                audio_np, sample_rate, chunk_idx = message["audio"]
+            elif message.get("bytes") is not None:
+                # Binary frame: header + raw PCM, decoded zero-copy
+                frame = message["bytes"]
+                try:
+                    with pipeline_orchestrator.metrics.time("decode"):
+                        audio_np, sample_rate, chunk_idx = pipeline_orchestrator.audio_processor.decode_binary_frame(frame)
+                except Exception as e:
+                    logger.error(f"[WS] Invalid binary frame ({len(frame)} bytes): {e}")
+                    await websocket.send_json({
+                        "transcript": f"[ERROR] {str(e)}",
+                        "status": "error"
+                    })
+                    continue
+            else:
+                msg = json.loads(message["text"])
                 
-                # Send result back to client
-                await websocket.send_json({
-                    "chunk_idx": chunk_idx,
-                    "transcript": result["transcript"],
-                    "language": result.get("language"),
-                    "processing_time": result.get("processing_time"),
-                    "status": result["status"]
-                })
+                # Format / mode negotiation
+                if msg.get("type") == "hello":
+                    await drain()
+                    audio_format = "binary" if msg.get("format") == "binary" else "json"
+                    streaming = msg.get("mode") == "streaming"
+                    model_size = msg.get("model")
+                    if streaming != session.streaming or model_size != session.model_size:
+                        pipeline_orchestrator.close_session(session_id)
+                        try:
+                            session = pipeline_orchestrator.open_session(
+                                session_id, streaming=streaming, model_size=model_size
+                            )
+                        except ValueError as e:
+                            session = pipeline_orchestrator.open_session(session_id, streaming=streaming)
+                            await websocket.send_json({"type": "error", "status": "error", "error": str(e)})
+                    await websocket.send_json({
+                        "type": "hello",
+                        "session_id": session_id,
+                        "format": audio_format,
+                        "mode": "streaming" if streaming else "chunk",
+                        "model": session.model_size or pipeline_orchestrator.config.transcription.model_size,
+                        "frame_header": FRAME_HEADER.format,
+                        "dtypes": {str(code): dtype.name for code, dtype in FRAME_DTYPES.items()}
+                    })
+                    logger.info(f"[WS] Negotiated {audio_format} audio format, streaming={streaming}")
+                    continue
                 
-                logger.info(f"[WS] Sent transcript for chunk {chunk_idx + 1}")
+                # End of stream: flush tentative words as final
+                if msg.get("type") == "end":
+                    await drain()
+                    for event in pipeline_orchestrator.close_session(session_id):
+                        await websocket.send_json(event)
+                    session = pipeline_orchestrator.open_session(
+                        session_id, streaming=session.streaming, model_size=session.model_size
+                    )
+                    continue
                 
-            except Exception as e:
-                logger.error(f"[WS] Error processing chunk {chunk_idx + 1}: {e}")
+                # JSON fallback: base64 encoded float32 audio
+                chunk_idx = msg["chunk_idx"]
+                sample_rate = msg["sample_rate"]
+                logger.info(f"[WS] Received chunk {chunk_idx + 1}, samples={len(msg['audio'])} chars")
+                try:
+                    with pipeline_orchestrator.metrics.time("decode"):
+                        audio_np, _ = pipeline_orchestrator.audio_processor.decode_base64_audio(msg["audio"])
+                except Exception as e:
+                    await websocket.send_json({
+                        "chunk_idx": chunk_idx,
+                        "transcript": f"[ERROR] {str(e)}",
+                        "status": "error"
+                    })
+                    continue
+            
+            # Queue for the consumer; a full queue applies the session's overflow policy
+            dropped = queue.put(QueuedChunk(audio_np, sample_rate, chunk_idx, received_at))
+            for stale in dropped:
+                logger.info(f"[WS] Dropped chunk {stale.chunk_idx + 1}: session queue full")
+                pipeline_orchestrator.metrics.increment("chunks_dropped", len(stale.chunk_indices))
+                for idx in stale.chunk_indices:
+                    await websocket.send_json({
+                        "type": "dropped",
+                        "chunk_idx": idx,
+                        "status": "dropped",
+                        "reason": "queue_full"
+                    })
+            if queue.should_slow_down():
                 await websocket.send_json({
-                    "chunk_idx": chunk_idx,
-                    "transcript": f"[ERROR] {str(e)}",
-                    "status": "error"
+                    "type": "slow_down",
+                    "queue_depth": len(queue),
+                    "max_depth": queue.max_depth,
+                    "retry_after": queue.queued_seconds
                 })
-                
+    
     except WebSocketDisconnect:
         logger.info("[WS] Client disconnected")
     except Exception as e:
         logger.error(f"[WS] WebSocket error: {e}")
+    finally:
+        consumer.cancel()
+        pipeline_orchestrator.close_session(session_id)
 
 if __name__ == "__main__":
     import uvicorn